@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CBR 检索基准测试
+比较 CBRSystem.retrieve_top_k（预归一化、预加权的案例矩阵上一次向量化计算）与原来逐案例调用
+calculate_similarity 的循环检索，在 130 个合成案例（synthetic_tunnel_casebook_130.json）
+和按其取值分布生成的大规模案例库上计时，并校验两种检索的相似度一致；
+另外对 KD 树索引（use_index=True）计时，并校验其 top-k 结果与全量计算逐位一致。
+用法:
+    python cbr_benchmark.py --casebook ../synthetic_tunnel_casebook_130.json --cases 1000000
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from cbr_system import CBRSystem
+
+
+# 特征编码与 my_tunnel_app 一致：[长度, 地质, 水文, 土壤, 类型, 直径]
+FEATURE_WEIGHTS = [0.2, 0.15, 0.1, 0.1, 0.15, 0.3]
+GEOLOGY_CODES = {"I": 1, "II": 2, "III": 3, "IV": 4, "V": 5}
+HYDRO_CODES = {"Dry": 1, "Medium": 3, "WaterRich": 5}
+SOIL_CODES = {"StrongSoil": 1, "MediumSoil": 3, "WeakSoil": 4}
+TUNNEL_TYPE_CODES = {"MountainTunnelProject": 1, "UnderwaterTunnelProject": 2, "ShallowTunnelProject": 3,
+                     "DeepTunnelProject": 4, "UrbanTunnelProject": 5}
+
+DEFAULT_CASEBOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "synthetic_tunnel_casebook_130.json")
+
+
+def casebook_to_case_base(casebook):
+    """把 condition / solution 格式的案例转换为 CBRSystem 使用的 {features, label, outputs}"""
+    case_base = []
+    for item in casebook:
+        condition = item["condition"]
+        case_base.append({
+            "features": [
+                float(condition["hasTunnelLength"]),
+                GEOLOGY_CODES[condition["hasGeologicalCondition"]],
+                HYDRO_CODES[condition["hasHydroCondition"]],
+                SOIL_CODES[condition["hasSoilType"].replace(" ", "")],
+                TUNNEL_TYPE_CODES[condition["hasTunnelType"]],
+                float(condition["hasTunnelDiameter"]),
+            ],
+            "label": item.get("name", f"Case_{item.get('id')}"),
+            "outputs": item.get("solution", {}),
+        })
+    return case_base
+
+
+def synthetic_case_base(template, count, seed=42):
+    """按模板案例库各特征的取值范围均匀生成案例（特征为 NumPy 行视图，减少大案例库的内存占用）"""
+    rng = np.random.default_rng(seed)
+    features = np.array([case["features"] for case in template], dtype=float)
+    low, high = features.min(axis=0), features.max(axis=0)
+    matrix = rng.uniform(low, high, size=(count, features.shape[1]))
+    matrix[:, 1:5] = np.rint(matrix[:, 1:5])  # 分类编码取整
+    return [{"features": row, "label": f"Synthetic_{i:07d}", "outputs": {}} for i, row in enumerate(matrix)]
+
+
+def loop_retrieve(cbr, target_case, cases=None):
+    """原来的检索：逐案例调用 calculate_similarity，再整体排序（cases 默认为整个案例库）"""
+    similarities = []
+    for case in cbr.case_base if cases is None else cases:
+        sim = cbr.calculate_similarity(target_case['features'], case['features'])
+        similarities.append((case, sim))
+    return sorted(similarities, key=lambda x: x[1], reverse=True)
+
+
+def benchmark(case_base, targets, loop_limit=None, repeat=3):
+    """
+    返回 (建立矩阵耗时, 向量化每次查询耗时, 循环每次查询耗时, 循环是否外推, 相似度最大误差,
+          建立 KD 树耗时, KD 树每次查询耗时, KD 树结果是否与全量计算一致)
+
+    案例数超过 loop_limit 时，循环只在前 loop_limit 个案例上计时并按案例数线性外推，
+    一致性也只在这部分案例上校验
+    """
+    start = time.perf_counter()
+    cbr = CBRSystem(case_base, FEATURE_WEIGHTS, use_index=False)
+    build_seconds = time.perf_counter() - start
+
+    vectorized_seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for target in targets:
+            cbr.retrieve_top_k(target, 1)
+        vectorized_seconds = min(vectorized_seconds, (time.perf_counter() - start) / len(targets))
+
+    extrapolated = loop_limit is not None and len(case_base) > loop_limit
+    cases = case_base[:loop_limit] if extrapolated else case_base
+    error, loop_seconds = 0.0, 0.0
+    for target in targets:
+        start = time.perf_counter()
+        expected = loop_retrieve(cbr, target, cases)
+        loop_seconds += time.perf_counter() - start
+        position = {id(case): i for i, case in enumerate(cases)}
+        vectorized = cbr.similarities(target["features"])
+        error = max(error, max(abs(sim - vectorized[position[id(case)]]) for case, sim in expected))
+    loop_seconds /= len(targets)
+    if extrapolated:
+        loop_seconds *= len(case_base) / loop_limit
+
+    indexed = CBRSystem(case_base, FEATURE_WEIGHTS, use_index=True)
+    start = time.perf_counter()
+    indexed._index()
+    tree_seconds = time.perf_counter() - start
+    tree_query_seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for target in targets:
+            indexed.retrieve_top_k(target, 1)
+        tree_query_seconds = min(tree_query_seconds, (time.perf_counter() - start) / len(targets))
+    identical = all(np.array_equal(a, b)
+                    for target in targets for k in (1, 10)
+                    for a, b in zip(cbr.retrieve_top_k(target, k), indexed.retrieve_top_k(target, k)))
+    return (build_seconds, vectorized_seconds, loop_seconds, extrapolated, error,
+            tree_seconds, tree_query_seconds, identical)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="CBR 检索基准测试")
+    arg_parser.add_argument("--casebook", default=DEFAULT_CASEBOOK, help="condition / solution 格式的案例库")
+    arg_parser.add_argument("--cases", type=int, default=1_000_000, help="大规模合成案例库的案例数")
+    arg_parser.add_argument("--queries", type=int, default=5, help="查询次数")
+    arg_parser.add_argument("--loop-limit", type=int, default=20_000, help="循环检索实际计时的最大案例数")
+    args = arg_parser.parse_args()
+
+    with open(args.casebook, encoding="utf-8") as f:
+        case_base = casebook_to_case_base(json.load(f))
+    rng = np.random.default_rng(7)
+    targets = [{"features": case["features"]} for case in rng.choice(case_base, args.queries)]
+
+    sizes = [("案例库", case_base)]
+    if args.cases:
+        sizes.append(("合成案例库", synthetic_case_base(case_base, args.cases)))
+    for name, cases in sizes:
+        build, vectorized, loop, extrapolated, error, tree, tree_query, identical = benchmark(
+            cases, targets, args.loop_limit)
+        note = f"（按 {args.loop_limit} 个案例外推）" if extrapolated else ""
+        print(f"{name} {len(cases)} 个案例: 建立矩阵 {build:.3f} s，向量化检索 (k=1) {vectorized * 1e3:.3f} ms/次，"
+              f"循环检索{note} {loop * 1e3:.3f} ms/次 (加速 {loop / vectorized:.1f}x)，相似度最大误差 {error:.1e}")
+        print(f"  KD 树: 建立 {tree:.3f} s，检索 (k=1) {tree_query * 1e3:.3f} ms/次 "
+              f"(相对向量化 {vectorized / tree_query:.1f}x)，结果{'一致' if identical else '不一致'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,51 @@
+import importlib.util
+
 import numpy as np
 
+# 案例数达到该值且安装了 SciPy 时，默认用 KD 树索引检索
+INDEX_MIN_CASES = 4096
+
+
 class CBRSystem:
-    def __init__(self, case_base, feature_weights, threshold=0.85):
+    def __init__(self, case_base, feature_weights, threshold=0.85, use_index=None):
+        """
+        use_index: 是否用 KD 树（scipy.spatial.cKDTree）做精确的近邻检索；
+                   None 时在安装了 SciPy 且案例数不少于 INDEX_MIN_CASES 时使用
+        """
         self.case_base = case_base
-        self.feature_weights = feature_weights
         self.threshold = threshold
+        if use_index and importlib.util.find_spec("scipy") is None:
+            raise ImportError("KD 树索引需要 SciPy")
+        self.use_index = use_index
+        self._tree = None
         self.feature_mins, self.feature_maxs = self.compute_feature_ranges()
+        denom = self.feature_maxs - self.feature_mins
+        self._denom = np.where(denom == 0, 1, denom)
+        # 案例库的归一化特征矩阵（行与 case_base 对应），_scaled 为按 sqrt(权重) 缩放后的矩阵
+        self._normalized = self.normalize([case["features"] for case in self.case_base])
+        self.feature_weights = feature_weights
+
+    @property
+    def feature_weights(self):
+        return self._feature_weights
+
+    @feature_weights.setter
+    def feature_weights(self, feature_weights):
+        """
+        更换权重时重新缩放归一化矩阵：加权欧式距离 = 按 sqrt(权重) 缩放后的欧式距离
+
+        KD 树建在缩放后的矩阵上，树上的距离就是加权距离，权重相差悬殊时球查询也只覆盖真正的近邻；
+        代价是更换权重后树失效，下一次索引检索时重建（10 万个案例约几十毫秒）。
+        频繁更换权重、每组权重只查询几次时（如权重寻优），用 use_index=False 做全量计算更快
+        """
+        weights = np.array(feature_weights, dtype=float)
+        if (weights < 0).any():
+            raise ValueError("特征权重不能为负")
+        self._feature_weights = feature_weights
+        self._weights = weights
+        self._scale = np.sqrt(weights)
+        self._scaled = self._normalized * self._scale
+        self._tree = None
 
     def compute_feature_ranges(self):
         all_features = np.array([case["features"] for case in self.case_base])
@@ -15,32 +55,136 @@ class CBRSystem:
 
     def normalize(self, features):
         features = np.array(features, dtype=float)
-        denom = self.feature_maxs - self.feature_mins
-        denom = np.where(denom == 0, 1, denom)
-        return (features - self.feature_mins) / denom
+        return (features - self.feature_mins) / self._denom
 
     def calculate_similarity(self, target_features, case_features):
         norm_target = self.normalize(target_features)
         norm_case = self.normalize(case_features)
         diff = norm_target - norm_case
-        weights = np.array(self.feature_weights, dtype=float)
-        weighted_squared = weights * diff ** 2
+        weighted_squared = self._weights * diff ** 2
         distance = np.sqrt(weighted_squared.sum())
         similarity = 1 / (1 + distance)
         return similarity
 
-    def retrieve(self, target_case):
-        similarities = []
-        for case in self.case_base:
-            sim = self.calculate_similarity(target_case['features'], case['features'])
-            similarities.append((case, sim))
-        return sorted(similarities, key=lambda x: x[1], reverse=True)
+    def _sync(self):
+        """
+        案例库被直接追加、或权重列表被原地修改时更新矩阵
+
+        新案例按建立时的归一化范围补进矩阵（与 retain 一致）；案例被删除时整体重建
+        """
+        if not np.array_equal(self._feature_weights, self._weights):
+            self.feature_weights = self._feature_weights
+        known = self._normalized.shape[0]
+        if len(self.case_base) == known:
+            return
+        if len(self.case_base) > known:
+            added = self.normalize([case["features"] for case in self.case_base[known:]])
+            self._normalized = np.vstack([self._normalized, added])
+        else:
+            self._normalized = self.normalize([case["features"] for case in self.case_base])
+        self._scaled = self._normalized * self._scale
+        self._tree = None
+
+    def similarities(self, target_features):
+        """目标与全部案例的相似度（一次向量化计算，顺序与案例库一致）"""
+        self._sync()
+        diff = self._scaled - self.normalize(target_features) * self._scale
+        return 1 / (1 + np.sqrt(np.einsum("ij,ij->i", diff, diff)))
+
+    def _index(self):
+        """
+        按 sqrt(权重) 缩放后的矩阵上的 KD 树（第一次检索时建立，案例或权重变化后重建），
+        不使用索引时返回 None。树上的欧式距离即加权距离，权重为 0 的特征在树上退化为同一坐标
+        """
+        self._sync()
+        use_index = self.use_index
+        if use_index is None:
+            use_index = len(self.case_base) >= INDEX_MIN_CASES and importlib.util.find_spec("scipy") is not None
+        if not use_index or len(self.case_base) == 0:
+            return None
+        if self._tree is None:
+            from scipy.spatial import cKDTree
+            self._tree = cKDTree(self._scaled)
+        return self._tree
+
+    def _candidate_similarities(self, indices, norm_target):
+        """候选案例的相似度（与 similarities 相同的计算，结果逐位一致）"""
+        diff = self._scaled[indices] - norm_target * self._scale
+        return 1 / (1 + np.sqrt(np.einsum("ij,ij->i", diff, diff)))
+
+    def _ball(self, tree, norm_target, distance):
+        """加权距离不超过 distance 的全部案例（及舍入误差内稍远的候选）的下标"""
+        indices = tree.query_ball_point(norm_target * self._scale, distance * (1 + 1e-9) + 1e-12,
+                                        return_sorted=False)
+        return np.asarray(indices, dtype=np.intp)
+
+    @staticmethod
+    def _select(indices, sims, k):
+        """候选中相似度最高的 k 个，按相似度降序；相似度相同时下标小的在前"""
+        k = max(0, min(k, len(sims)))
+        if k == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        if k < len(sims):
+            kth = -np.partition(-sims, k - 1)[k - 1]
+            above = np.flatnonzero(sims > kth)
+            ties = np.flatnonzero(sims == kth)
+            ties = ties[np.argsort(indices[ties], kind="stable")][:k - len(above)]
+            chosen = np.concatenate([above, ties])
+            indices, sims = indices[chosen], sims[chosen]
+        order = np.lexsort((indices, -sims))
+        return indices[order], sims[order]
+
+    def retrieve_top_k(self, target_case, k):
+        """
+        相似度最高的 k 个案例，返回 (案例下标数组, 相似度数组)，按相似度降序
+
+        只做部分选择，不为每个案例构造元组；相似度相同时下标小的在前（与完整排序的顺序一致）。
+        使用 KD 树时先取树上最近的 k 个案例，再以其中最大的加权距离为半径做一次球查询补上距离相同的案例，
+        在这些候选上精确计算相似度后取舍，结果与全量计算相同
+        """
+        tree = self._index()
+        if tree is None or not 0 < k < len(self.case_base):
+            sims = self.similarities(target_case['features'])
+            return self._select(np.arange(len(sims)), sims, k)
+        norm_target = self.normalize(target_case['features'])
+        _, nearest = tree.query(norm_target * self._scale, k)
+        nearest = np.atleast_1d(nearest)
+        distance = 1 / self._candidate_similarities(nearest, norm_target).min() - 1
+        indices = self._ball(tree, norm_target, distance)
+        return self._select(indices, self._candidate_similarities(indices, norm_target), k)
+
+    def retrieve_within(self, target_case, threshold=None):
+        """
+        相似度不低于阈值（默认 self.threshold，即 reuse 的判定条件）的全部案例，
+        返回 (案例下标数组, 相似度数组)，按相似度降序
+
+        相似度 1/(1+d) ≥ 阈值 等价于加权距离 d ≤ 1/阈值 - 1，使用 KD 树时为一次球查询
+        """
+        threshold = self.threshold if threshold is None else threshold
+        if threshold <= 0:
+            return self.retrieve_top_k(target_case, len(self.case_base))
+        tree = self._index()
+        if tree is None:
+            indices = np.arange(len(self.case_base))
+            sims = self.similarities(target_case['features'])
+        else:
+            norm_target = self.normalize(target_case['features'])
+            indices = self._ball(tree, norm_target, 1 / threshold - 1)
+            sims = self._candidate_similarities(indices, norm_target)
+        keep = sims >= threshold
+        return self._select(indices[keep], sims[keep], len(sims))
+
+    def retrieve(self, target_case, k=None):
+        """按相似度降序返回 (案例, 相似度)；k 为 None 时返回全部案例"""
+        indices, scores = self.retrieve_top_k(target_case, len(self.case_base) if k is None else k)
+        return [(self.case_base[i], float(score)) for i, score in zip(indices, scores)]
 
     def adapt_case(self, source_case, target_case):
         print(f"\n✅ 采用案例【{source_case['label']}】的参数作为推荐方案")
         return source_case
 
     def reuse(self, retrieved_case, target_case):
+        """相似度不低于阈值时重用检索到的案例（阈值对应 retrieve_within 的检索半径）"""
         if retrieved_case[1] >= self.threshold:
             print(f"✅ 相似度 {retrieved_case[1]:.3f} ≥ 阈值 {self.threshold}")
             return self.adapt_case(retrieved_case[0], target_case)
@@ -54,6 +198,7 @@ class CBRSystem:
 
     def retain(self, new_case):
         self.case_base.append(new_case)
+        self._sync()
         print(f"✅ 新案例【{new_case['label']}】已加入案例库。")
 
     def print_outputs(self, case):
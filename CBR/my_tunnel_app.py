@@ -53,7 +53,12 @@ def main():
     
     # 1. Retrieve - 检索
     print(f"\n📖 第1步: Retrieve (检索)")
-    retrieved_list = cbr.retrieve(target_case)
+    # 相似度阈值即检索半径：只取相似度 ≥ 阈值的案例；没有可重用的案例时取最相似的一个用于展示
+    indices, scores = cbr.retrieve_within(target_case)
+    print(f"📏 相似度 ≥ {cbr.threshold} 的案例: {len(indices)} 个")
+    retrieved_list = [(cbr.case_base[i], float(score)) for i, score in zip(indices, scores)]
+    if not retrieved_list:
+        retrieved_list = cbr.retrieve(target_case, k=1)
     best_case, best_similarity = retrieved_list[0]
     
     print(f"\n🏆 最相似案例: {best_case['label']}")
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推理基准测试套件
+为 swrl_reasoner.SWRLInferenceEngine、next_program.TunnelSWRLInference 与
+tunnel_rules.comprehensive_tunnel_design 生成 10 / 1k / 10k / 100k 个合成隧道，
+记录解析耗时、加载耗时、推理耗时、峰值内存与每秒推出事实数，结果写为 JSON，便于跨提交对比。
+
+每个 (目标, 规模) 在独立子进程中运行，峰值内存取子进程的最大常驻内存，互不干扰。
+用法:
+    python benchmark_suite.py --sizes 10 1000 --output results.json
+    python benchmark_suite.py --compare old_results.json
+    python benchmark_suite.py --sizes --startup          # 只测量启动耗时（python -X importtime）
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，峰值内存记为 None
+    resource = None
+
+from swrl_benchmark import generate_synthetic_tunnels, to_parameter_record
+
+
+TARGETS = ("swrl_reasoner", "next_program", "tunnel_rules")
+DEFAULT_SIZES = (10, 1000, 10000, 100000)
+ENGINES = ("stratified", "semi_naive", "interned", "rete")
+# --startup 默认测量的模块（命令行入口与生成的规则模块）
+STARTUP_MODULES = ("next_program", "tunnel_rules")
+
+# comprehensive_tunnel_design 结果中原样返回的输入参数，不计为推出的事实
+DESIGN_INPUT_KEYS = ("tunnel_type", "tunnel_length", "tunnel_diameter")
+
+
+def peak_memory_mb() -> Optional[float]:
+    """当前进程的最大常驻内存（MB）"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+@contextlib.contextmanager
+def quiet():
+    """屏蔽被测代码的控制台输出"""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def bench_swrl_reasoner(tunnels: List[Dict[str, Any]], rules_path: str, engine: str) -> Dict[str, Any]:
+    from swrl_reasoner import StreamingSWRLParser, SWRLInferenceEngine
+    from swrl_interned import InternedInferenceEngine
+    from swrl_rete import ReteInferenceEngine
+
+    start = time.perf_counter()
+    rules = StreamingSWRLParser(rules_path, use_cache=False).parse_file()
+    parse_seconds = time.perf_counter() - start
+
+    engine_class = {"interned": InternedInferenceEngine, "rete": ReteInferenceEngine}.get(engine, SWRLInferenceEngine)
+    chain_options = {"stratified": {"stratified": True}, "semi_naive": {"semi_naive": True, "stratified": False}}
+    start = time.perf_counter()
+    inference = engine_class(rules)
+    for tunnel in tunnels:
+        inference.kb.add_tunnel_individual(**tunnel)
+    load_seconds = time.perf_counter() - start
+    facts_before = count_facts(inference.kb)
+
+    with quiet():
+        start = time.perf_counter()
+        inference.forward_chain(**chain_options.get(engine, {}))
+        inference_seconds = time.perf_counter() - start
+    return {"parse_seconds": parse_seconds, "load_seconds": load_seconds, "inference_seconds": inference_seconds,
+            "facts": count_facts(inference.kb) - facts_before, "rules": len(rules)}
+
+
+def count_facts(kb) -> int:
+    """知识库中的事实总数"""
+    return (sum(len(classes) for classes in kb.class_facts.values())
+            + sum(len(objects) for objects in kb.object_property_facts.values())
+            + sum(len(values) for values in kb.data_property_facts.values()))
+
+
+def bench_next_program(tunnels: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # next_program 从 TUNNEL_RULES 预编译调度，“解析”记为模块导入与规则编译耗时；
+    # 分类取值由 next_program 统一规范化，直接传规则词汇
+    start = time.perf_counter()
+    from next_program import TunnelSWRLInference
+    inference = TunnelSWRLInference()
+    parse_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    records = [to_parameter_record(tunnel) for tunnel in tunnels]
+    load_seconds = time.perf_counter() - start
+
+    facts = 0
+    with quiet():
+        start = time.perf_counter()
+        for record in records:
+            facts += len(inference.apply_all_rules(record))
+        inference_seconds = time.perf_counter() - start
+    return {"parse_seconds": parse_seconds, "load_seconds": load_seconds,
+            "inference_seconds": inference_seconds, "facts": facts}
+
+
+def bench_tunnel_rules(tunnels: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # 生成模块的规则表在导入时构建，“解析”记为模块导入耗时
+    start = time.perf_counter()
+    from tunnel_rules import comprehensive_tunnel_design
+    parse_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    args_list = [(t["tunnel_type"], t["tunnel_length"], t["tunnel_diameter"], t["rock_grade"],
+                  t["hydro_condition"], t["soil_type"]) for t in tunnels]
+    load_seconds = time.perf_counter() - start
+
+    facts = 0
+    start = time.perf_counter()
+    for args in args_list:
+        result = comprehensive_tunnel_design(*args)
+        facts += sum(1 for key, value in result.items() if value is not None and key not in DESIGN_INPUT_KEYS)
+    inference_seconds = time.perf_counter() - start
+    return {"parse_seconds": parse_seconds, "load_seconds": load_seconds,
+            "inference_seconds": inference_seconds, "facts": facts}
+
+
+def run_case(target: str, size: int, seed: int, rules_path: str, engine: str) -> Dict[str, Any]:
+    """在当前进程中运行一个 (目标, 规模)；合成数据的生成不计入任何阶段"""
+    tunnels = generate_synthetic_tunnels(size, seed)
+    baseline_mb = peak_memory_mb()
+    if target == "swrl_reasoner":
+        result = bench_swrl_reasoner(tunnels, rules_path, engine)
+        result["engine"] = engine
+    elif target == "next_program":
+        result = bench_next_program(tunnels)
+    else:
+        result = bench_tunnel_rules(tunnels)
+    peak_mb = peak_memory_mb()
+    result.update({
+        "target": target,
+        "tunnels": size,
+        "peak_memory_mb": peak_mb,
+        "memory_growth_mb": None if peak_mb is None else peak_mb - baseline_mb,
+        "facts_per_second": result["facts"] / result["inference_seconds"] if result["inference_seconds"] else None,
+    })
+    return result
+
+
+def run_isolated(target: str, size: int, args) -> Dict[str, Any]:
+    """在子进程中运行一个用例，返回其 JSON 结果；失败时记录错误信息"""
+    command = [sys.executable, os.path.abspath(__file__), "--case", target, "--sizes", str(size),
+               "--seed", str(args.seed), "--rules", args.rules, "--engine", args.engine]
+    completed = subprocess.run(command, capture_output=True, text=True, timeout=args.timeout)
+    if completed.returncode != 0:
+        error = (completed.stderr.strip().splitlines() or ["unknown error"])[-1]
+        return {"target": target, "tunnels": size, "error": error}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure_startup(module: str, repeat: int = 5) -> Dict[str, Any]:
+    """
+    用 python -X importtime 测量在新解释器中导入模块的耗时，取多次运行的最小值
+
+    Returns:
+        import_ms: 该模块的累计导入耗时；wall_ms: 解释器启动到退出的总耗时；
+        modules: 导入的模块数；heaviest: 累计耗时最大的几个顶层依赖；rdflib / numpy: 是否被导入
+    """
+    best: Optional[Dict[str, Any]] = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                   capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        wall_ms = (time.perf_counter() - start) * 1000
+        if completed.returncode != 0:
+            error = (completed.stderr.strip().splitlines() or ["unknown error"])[-1]
+            return {"module": module, "error": error}
+
+        # 每行: "import time: self [us] | cumulative | imported package"，包名前的缩进表示嵌套深度
+        entries = []
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "imported package" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            entries.append((name.rstrip(), int(cumulative)))
+        names = {name.strip() for name, _ in entries}
+        indent = lambda name: len(name) - len(name.lstrip())
+        position = next((i for i, (name, _) in enumerate(entries) if name.strip() == module), None)
+        total, children = 0, []
+        if position is not None:
+            # 子模块在父模块之前输出，缩进比父模块多两格
+            name, total = entries[position]
+            depth, i = indent(name), position - 1
+            while i >= 0 and indent(entries[i][0]) > depth:
+                if indent(entries[i][0]) == depth + 2:
+                    children.append((entries[i][0].strip(), entries[i][1]))
+                i -= 1
+            children.sort(key=lambda item: -item[1])
+        result = {
+            "module": module,
+            "import_ms": total / 1000,
+            "wall_ms": wall_ms,
+            "modules": len(entries),
+            "heaviest": [[name, us / 1000] for name, us in children[:5]],
+            "rdflib": any(name.split(".")[0] == "rdflib" for name in names),
+            "numpy": any(name.split(".")[0] == "numpy" for name in names),
+        }
+        if best is None or result["wall_ms"] < best["wall_ms"]:
+            best = result
+    return best
+
+
+def git_revision() -> Optional[str]:
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        return completed.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]):
+    """按 (目标, 规模) 对比两份结果的推理耗时"""
+    old = {(r["target"], r["tunnels"]): r for r in previous["results"] if "error" not in r}
+    print(f"\n对比 {previous.get('revision')} → {current.get('revision')}")
+    for result in current["results"]:
+        before = old.get((result["target"], result["tunnels"]))
+        if before is None or "error" in result:
+            continue
+        print(f"{result['target']:<14} {result['tunnels']:>7}  推理 {before['inference_seconds']:.3f} s → "
+              f"{result['inference_seconds']:.3f} s ({before['inference_seconds'] / max(result['inference_seconds'], 1e-9):.2f}x)")
+    old_startup = {r["module"]: r for r in previous.get("startup", []) if "error" not in r}
+    for result in current.get("startup", []):
+        before = old_startup.get(result["module"])
+        if before is None or "error" in result:
+            continue
+        print(f"{result['module']:<14} 启动  导入 {before['import_ms']:.1f} ms → {result['import_ms']:.1f} ms，"
+              f"进程 {before['wall_ms']:.1f} ms → {result['wall_ms']:.1f} ms")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="推理基准测试套件")
+    arg_parser.add_argument("--sizes", type=int, nargs="*", default=list(DEFAULT_SIZES), help="合成隧道数量")
+    arg_parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS), help="被测对象")
+    arg_parser.add_argument("--engine", choices=ENGINES, default="stratified", help="swrl_reasoner 使用的推理引擎")
+    arg_parser.add_argument("--rules", default="pure_swrl_rules.txt", help="SWRL规则文件")
+    arg_parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    arg_parser.add_argument("--timeout", type=float, default=3600, help="单个用例的超时时间（秒）")
+    arg_parser.add_argument("--output", default="benchmark_results.json", help="结果 JSON 文件")
+    arg_parser.add_argument("--compare", help="用于对比的旧结果 JSON 文件")
+    arg_parser.add_argument("--startup", nargs="*", metavar="MODULE",
+                            help="用 python -X importtime 测量模块的启动耗时（默认 next_program 与 tunnel_rules）")
+    arg_parser.add_argument("--case", choices=TARGETS, help=argparse.SUPPRESS)  # 子进程内部使用
+    args = arg_parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.sizes[0], args.seed, args.rules, args.engine)))
+        return
+
+    results = []
+    for size in args.sizes:
+        for target in args.targets:
+            result = run_isolated(target, size, args)
+            results.append(result)
+            if "error" in result:
+                print(f"{target:<14} {size:>7}  失败: {result['error']}")
+                continue
+            print(f"{target:<14} {size:>7}  解析 {result['parse_seconds']:.3f} s  加载 {result['load_seconds']:.3f} s  "
+                  f"推理 {result['inference_seconds']:.3f} s  峰值内存 {result['peak_memory_mb'] or 0:.1f} MB  "
+                  f"{result['facts_per_second'] or 0:,.0f} 事实/秒")
+
+    startup = []
+    modules = [] if args.startup is None else args.startup or list(STARTUP_MODULES)
+    for module in modules:
+        result = measure_startup(module)
+        startup.append(result)
+        if "error" in result:
+            print(f"{module:<14} 启动  失败: {result['error']}")
+            continue
+        heaviest = "，".join(f"{name} {ms:.1f} ms" for name, ms in result["heaviest"])
+        print(f"{module:<14} 启动  导入 {result['import_ms']:.1f} ms  进程 {result['wall_ms']:.1f} ms  "
+              f"{result['modules']} 个模块  rdflib: {'是' if result['rdflib'] else '否'}  "
+              f"NumPy: {'是' if result['numpy'] else '否'}  主要依赖: {heaviest}")
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "engine": args.engine,
+        "results": results,
+        "startup": startup,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
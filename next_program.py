@@ -1,327 +1,136 @@
 import sys
 import json
 import os
-import math
-from rdflib import Graph, Namespace, Literal, URIRef
-from rdflib.namespace import RDF, RDFS, XSD, OWL
+import glob
+import argparse
+
+from tunnel_dispatch import get_dispatcher
+from tunnel_rules import calculate_bolt_length
+from tunnel_vocabulary import normalize_params
+
+# 命名空间；rdflib 只在导出 OWL 时导入，推理路径不依赖它
+NAMESPACE_URIS = {
+    "OWL": "http://www.w3.org/2002/07/owl#",
+    "SWRL": "http://www.w3.org/2003/11/swrl#",
+    "SWRLA": "http://swrl.stanford.edu/ontologies/3.3/swrla.owl#",
+    "DLS": "http://example.com/dlsafe#",
+}
+
+
+def __getattr__(name):
+    """模块属性 OWL / SWRL / SWRLA / DLS 首次访问时才导入 rdflib 并构造 Namespace"""
+    if name in NAMESPACE_URIS:
+        from rdflib import Namespace
+        namespace = globals()[name] = Namespace(NAMESPACE_URIS[name])
+        return namespace
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# 输出属性（按输出顺序）
+OUTPUT_PROPERTIES = [
+    "hasConstructionMethod", "hasLiningThickness", "hasSteelArchSpacing", "hasSteelArchThickness",
+    "hasWaterproofLayerThickness", "hasBoltLength", "hasBoltSpacing", "hasBoltRowCount",
+    "hasBoltColumnCount", "hasSteelArchCount",
+]
+
+# 没有规则给出取值时的默认值（规则之前写入，读取该属性的规则会看到默认值）
+DEFAULT_VALUES = {
+    "hasLiningThickness": 25.0,
+    "hasSteelArchSpacing": 0.8,
+    "hasSteelArchThickness": 10,
+    "hasWaterproofLayerThickness": 3.5,
+}
+
+# 参数记录至少要含其中一个键，否则不是隧道参数（如目录中的案例库 JSON），批量模式中记为错误
+PARAMETER_KEYS = ("tunnelType", "hasTunnelLength", "hasTunnelDiameter",
+                  "hasGeologicalCondition", "hasHydroCondition", "hasSoilType")
+
+# 保留两位小数的属性；与改用规则表之前的 CLI 一致，写入后立即舍入，锚杆间距、行列数按舍入后的取值计算
+ROUNDED_PROPERTIES = ("hasBoltLength", "hasBoltSpacing")
+
+# 施工方法在规则中是个体 TBM_001 / DrillAndBlast_001，CLI 输出沿用原来的标签（main-add+.py 读取该输出）
+CONSTRUCTION_METHOD_LABELS = {
+    "TBM_001": "TBM",
+    "DrillAndBlast_001": "DrillAndBlast",
+}
+CONSTRUCTION_METHOD_INDIVIDUALS = {label: individual for individual, label in CONSTRUCTION_METHOD_LABELS.items()}
+
+
+def cli_bolt_length(tunnel_diameter, rock_grade):
+    """锚杆长度默认值：III 级围岩沿用原 CLI 的 L = D / 3，其它等级按 tunnel_rules 的系数表"""
+    if rock_grade == "RockGrade_III":
+        return tunnel_diameter / 3
+    return calculate_bolt_length(tunnel_diameter, rock_grade)
+
+
+def cli_label(prop, value):
+    """把规则个体换回 CLI 输出的标签"""
+    if prop != "hasConstructionMethod":
+        return value
+    if isinstance(value, tuple):
+        return tuple(CONSTRUCTION_METHOD_LABELS.get(method, method) for method in value)
+    return CONSTRUCTION_METHOD_LABELS.get(value, value)
 
-# 定义命名空间
-OWL = Namespace("http://www.w3.org/2002/07/owl#")
-SWRL = Namespace("http://www.w3.org/2003/11/swrl#")
-SWRLA = Namespace("http://swrl.stanford.edu/ontologies/3.3/swrla.owl#")
-DLS = Namespace("http://example.com/dlsafe#")
 
 class TunnelSWRLInference:
-    """隧道工程SWRL规则推理引擎"""
+    """隧道工程SWRL规则推理引擎（按 tunnel_rules.TUNNEL_RULES 预编译的调度求值）"""
     
     def __init__(self):
         self.results = {}
+        self.dispatcher = get_dispatcher()
         
     def apply_all_rules(self, params):
         """应用所有SWRL规则进行推理"""
-        self.results = {}
-        
-        # 获取基本参数
-        tunnel_type = params.get("tunnelType", "TunnelProject")
+        params = normalize_params(params)
         rock_grade = params.get("hasGeologicalCondition", "")
-        hydro_condition = params.get("hasHydroCondition", "")
-        soil_type = params.get("hasSoilType", "")
-        tunnel_length = params.get("hasTunnelLength", 0)
-        tunnel_diameter = params.get("hasTunnelDiameter", 0)
-        
-        # 1. 施工方法推理
-        self._infer_construction_method(tunnel_length)
-        
-        # 2. 衬砌厚度推理
-        self._infer_lining_thickness(tunnel_type, rock_grade, hydro_condition, soil_type)
-        
-        # 3. 钢拱架间距推理
-        self._infer_steel_arch_spacing(tunnel_type, rock_grade, hydro_condition)
-        
-        # 4. 钢拱架厚度推理
-        self._infer_steel_arch_thickness(rock_grade, hydro_condition)
-        
-        # 5. 防水层厚度推理
-        self._infer_waterproof_thickness(tunnel_type, soil_type, hydro_condition)
-        
-        # 6. 锚杆长度推理
-        self._infer_bolt_length(rock_grade, tunnel_diameter)
-        
-        # 7. 锚杆间距推理
-        if "hasBoltLength" in self.results:
-            self._infer_bolt_spacing(self.results["hasBoltLength"])
-        
-        # 8. 锚杆行列数推理
-        if "hasBoltSpacing" in self.results:
-            self._infer_bolt_counts(tunnel_length, tunnel_diameter, self.results["hasBoltSpacing"])
         
-        # 9. 钢拱架数量推理
-        if "hasSteelArchSpacing" in self.results:
-            self._infer_steel_arch_count(tunnel_length, self.results["hasSteelArchSpacing"])
+        defaults = dict(DEFAULT_VALUES)
+        # 规则 S03-3 / S03-5（III、V 级围岩）的规则头为空，锚杆长度默认按 cli_bolt_length 计算，
+        # 其它围岩等级由 S03 规则覆盖
+        defaults["hasBoltLength"] = lambda values: (
+            cli_bolt_length(values["hasTunnelDiameter"], rock_grade)
+            if values.get("hasTunnelDiameter", 0) > 0 else None)
         
+        inferred = self.dispatcher.infer_params(params, defaults,
+                                                rounding={prop: 2 for prop in ROUNDED_PROPERTIES})
+        self.results = {prop: cli_label(prop, inferred[prop]) for prop in OUTPUT_PROPERTIES if prop in inferred}
         return self.results
-    
-    def _infer_construction_method(self, tunnel_length):
-        """推理施工方法 - 规则S01, S02"""
-        if tunnel_length > 3000:
-            self.results["hasConstructionMethod"] = "DrillAndBlast"
-        else:
-            self.results["hasConstructionMethod"] = "TBM"
-    
-    def _infer_lining_thickness(self, tunnel_type, rock_grade, hydro_condition, soil_type):
-        """推理衬砌厚度 - 基于149条规则中的衬砌厚度规则"""
-        
-        # 特殊规则：极差围岩+弱土+富水条件
-        if rock_grade == "V" and soil_type == "WeakSoil" and hydro_condition == "water-rich":
-            self.results["hasLiningThickness"] = 45.0
-            return
-        
-        # 深埋隧道规则 (S09系列)
-        if tunnel_type == "DeepTunnelProject":
-            thickness_map = {
-                ("I", "dry"): 25.0, ("I", "water-rich"): 27.5,
-                ("II", "dry"): 27.5, ("II", "water-rich"): 30.0,
-                ("III", "dry"): 30.0, ("III", "water-rich"): 32.5,
-                ("IV", "dry"): 32.5, ("IV", "water-rich"): 35.0,
-                ("V", "dry"): 35.0, ("V", "water-rich"): 37.5
-            }
-        
-        # 山岭隧道规则 (S06系列)
-        elif tunnel_type == "MountainTunnelProject":
-            thickness_map = {
-                ("I", "dry"): 20.0, ("I", "water-rich"): 22.5,
-                ("II", "dry"): 22.5, ("II", "water-rich"): 25.0,
-                ("III", "dry"): 25.0, ("III", "water-rich"): 27.5,
-                ("IV", "dry"): 27.5, ("IV", "water-rich"): 30.0,
-                ("V", "dry"): 30.0, ("V", "water-rich"): 32.5
-            }
-        
-        # 浅埋隧道规则 (S08系列)
-        elif tunnel_type == "ShallowTunnelProject":
-            thickness_map = {
-                ("I", "dry"): 22.5, ("I", "water-rich"): 25.0,
-                ("II", "dry"): 25.0, ("II", "water-rich"): 27.5,
-                ("III", "dry"): 27.5, ("III", "water-rich"): 30.0,
-                ("IV", "dry"): 30.0, ("IV", "water-rich"): 32.5,
-                ("V", "dry"): 32.5, ("V", "water-rich"): 35.0
-            }
-        
-        # 水下隧道规则 (S07系列)
-        elif tunnel_type == "UnderwaterTunnelProject":
-            thickness_map = {
-                ("I", "dry"): 25.0, ("I", "water-rich"): 27.5,
-                ("II", "dry"): 27.5, ("II", "water-rich"): 30.0,
-                ("III", "dry"): 30.0, ("III", "water-rich"): 32.5,
-                ("IV", "dry"): 32.5, ("IV", "water-rich"): 35.0,
-                ("V", "dry"): 35.0, ("V", "water-rich"): 37.5
-            }
-        
-        # 城市隧道规则 (S05系列)
-        elif tunnel_type == "UrbanTunnelProject":
-            thickness_map = {
-                ("I", "dry"): 22.5, ("I", "water-rich"): 25.0,
-                ("II", "dry"): 25.0, ("II", "water-rich"): 27.5,
-                ("III", "dry"): 27.5, ("III", "water-rich"): 30.0,
-                ("IV", "dry"): 30.0, ("IV", "water-rich"): 32.5,
-                ("V", "dry"): 32.5, ("V", "water-rich"): 35.0
-            }
-        
-        # 默认规则
-        else:
-            thickness_map = {
-                ("I", "dry"): 20.0, ("I", "water-rich"): 22.5,
-                ("II", "dry"): 22.5, ("II", "water-rich"): 25.0,
-                ("III", "dry"): 25.0, ("III", "water-rich"): 27.5,
-                ("IV", "dry"): 27.5, ("IV", "water-rich"): 30.0,
-                ("V", "dry"): 30.0, ("V", "water-rich"): 32.5
-            }
-        
-        key = (rock_grade, hydro_condition)
-        self.results["hasLiningThickness"] = thickness_map.get(key, 25.0)
-    
-    def _infer_steel_arch_spacing(self, tunnel_type, rock_grade, hydro_condition):
-        """推理钢拱架间距 - 基于S10-S14系列规则"""
-        
-        # 深埋隧道规则 (S14系列)
-        if tunnel_type == "DeepTunnelProject":
-            spacing_map = {
-                ("I", "dry"): 1.2, ("I", "water-rich"): 1.0,
-                ("II", "dry"): 1.0, ("II", "water-rich"): 0.8,
-                ("III", "dry"): 0.8, ("III", "water-rich"): 0.6,
-                ("IV", "dry"): 0.6, ("IV", "water-rich"): 0.5,
-                ("V", "dry"): 0.5, ("V", "water-rich"): 0.5
-            }
-        
-        # 山岭隧道规则 (S11系列)
-        elif tunnel_type == "MountainTunnelProject":
-            spacing_map = {
-                ("I", "dry"): 1.4, ("I", "water-rich"): 1.2,
-                ("II", "dry"): 1.2, ("II", "water-rich"): 1.0,
-                ("III", "dry"): 1.0, ("III", "water-rich"): 0.8,
-                ("IV", "dry"): 0.8, ("IV", "water-rich"): 0.6,
-                ("V", "dry"): 0.6, ("V", "water-rich"): 0.5
-            }
-        
-        # 浅埋隧道规则 (S13系列)
-        elif tunnel_type == "ShallowTunnelProject":
-            spacing_map = {
-                ("I", "dry"): 1.2, ("I", "water-rich"): 1.0,
-                ("II", "dry"): 1.0, ("II", "water-rich"): 0.8,
-                ("III", "dry"): 0.8, ("III", "water-rich"): 0.6,
-                ("IV", "dry"): 0.6, ("IV", "water-rich"): 0.5,
-                ("V", "dry"): 0.5, ("V", "water-rich"): 0.5
-            }
-        
-        # 水下隧道规则 (S12系列)
-        elif tunnel_type == "UnderwaterTunnelProject":
-            spacing_map = {
-                ("I", "dry"): 1.2, ("I", "water-rich"): 1.0,
-                ("II", "dry"): 1.0, ("II", "water-rich"): 0.8,
-                ("III", "dry"): 0.8, ("III", "water-rich"): 0.6,
-                ("IV", "dry"): 0.6, ("IV", "water-rich"): 0.5,
-                ("V", "dry"): 0.5, ("V", "water-rich"): 0.5
-            }
-        
-        # 城市隧道规则 (S10系列)
-        elif tunnel_type == "UrbanTunnelProject":
-            spacing_map = {
-                ("I", "dry"): 1.2, ("I", "water-rich"): 1.0,
-                ("II", "dry"): 1.0, ("II", "water-rich"): 0.8,
-                ("III", "dry"): 0.8, ("III", "water-rich"): 0.6,
-                ("IV", "dry"): 0.5, ("IV", "water-rich"): 0.5,
-                ("V", "dry"): 0.5, ("V", "water-rich"): 0.5
-            }
-        
-        # 默认规则
-        else:
-            spacing_map = {
-                ("I", "dry"): 1.2, ("I", "water-rich"): 1.0,
-                ("II", "dry"): 1.0, ("II", "water-rich"): 0.8,
-                ("III", "dry"): 0.8, ("III", "water-rich"): 0.6,
-                ("IV", "dry"): 0.6, ("IV", "water-rich"): 0.5,
-                ("V", "dry"): 0.5, ("V", "water-rich"): 0.5
-            }
-        
-        key = (rock_grade, hydro_condition)
-        self.results["hasSteelArchSpacing"] = spacing_map.get(key, 0.8)
-    
-    def _infer_steel_arch_thickness(self, rock_grade, hydro_condition):
-        """推理钢拱架厚度 - 基于S16系列规则"""
-        thickness_map = {
-            ("I", "dry"): 6, ("I", "water-rich"): 8,
-            ("II", "dry"): 8, ("II", "water-rich"): 10,
-            ("III", "dry"): 10, ("III", "water-rich"): 12,
-            ("IV", "dry"): 12, ("IV", "water-rich"): 14,
-            ("V", "dry"): 14, ("V", "water-rich"): 16
-        }
-        
-        key = (rock_grade, hydro_condition)
-        self.results["hasSteelArchThickness"] = thickness_map.get(key, 10)
-    
-    def _infer_waterproof_thickness(self, tunnel_type, soil_type, hydro_condition):
-        """推理防水层厚度 - 基于W01-W05系列规则"""
-        
-        # 城市隧道 (W01系列)
-        if tunnel_type == "UrbanTunnelProject":
-            thickness_map = {
-                ("MediumSoil", "dry"): 3.0, ("MediumSoil", "water-rich"): 4.0,
-                ("StrongSoil", "dry"): 2.5, ("StrongSoil", "water-rich"): 3.5,
-                ("WeakSoil", "dry"): 4.0, ("WeakSoil", "water-rich"): 5.0
-            }
-        
-        # 山岭隧道 (W02系列)
-        elif tunnel_type == "MountainTunnelProject":
-            thickness_map = {
-                ("MediumSoil", "dry"): 3.5, ("MediumSoil", "water-rich"): 4.5,
-                ("StrongSoil", "dry"): 3.0, ("StrongSoil", "water-rich"): 4.0,
-                ("WeakSoil", "dry"): 4.5, ("WeakSoil", "water-rich"): 5.0
-            }
-        
-        # 水下隧道 (W03系列)
-        elif tunnel_type == "UnderwaterTunnelProject":
-            thickness_map = {
-                ("MediumSoil", "water-rich"): 5.5,
-                ("StrongSoil", "water-rich"): 5.0,
-                ("WeakSoil", "water-rich"): 6.0
-            }
-        
-        # 浅埋隧道 (W04-W05系列)
-        elif tunnel_type == "ShallowTunnelProject":
-            thickness_map = {
-                ("MediumSoil", "dry"): 3.5, ("MediumSoil", "water-rich"): 4.5,
-                ("StrongSoil", "dry"): 3.0, ("StrongSoil", "water-rich"): 4.0,
-                ("WeakSoil", "dry"): 4.5, ("WeakSoil", "water-rich"): 5.5
-            }
-        
-        # 默认规则
-        else:
-            thickness_map = {
-                ("MediumSoil", "dry"): 3.5, ("MediumSoil", "water-rich"): 4.5,
-                ("StrongSoil", "dry"): 3.0, ("StrongSoil", "water-rich"): 4.0,
-                ("WeakSoil", "dry"): 4.5, ("WeakSoil", "water-rich"): 5.5
-            }
-        
-        key = (soil_type, hydro_condition)
-        self.results["hasWaterproofLayerThickness"] = thickness_map.get(key, 3.5)
-    
-    def _infer_bolt_length(self, rock_grade, tunnel_diameter):
-        """推理锚杆长度 - 基于S03系列规则"""
-        if tunnel_diameter <= 0:
-            return
-            
-        # 规则S03系列：锚杆长度与围岩等级的关系
-        if rock_grade == "I":
-            # L = 0.25 × D
-            bolt_length = tunnel_diameter * 0.25
-        elif rock_grade == "II":
-            # L = 0.3 × D
-            bolt_length = tunnel_diameter * 0.3
-        elif rock_grade == "III":
-            # L = D / 3
-            bolt_length = tunnel_diameter / 3
-        elif rock_grade == "IV":
-            # L = 0.45 × D
-            bolt_length = tunnel_diameter * 0.45
-        elif rock_grade == "V":
-            # L = 0.5 × D
-            bolt_length = tunnel_diameter * 0.5
+
+
+def results_to_graph(params, results, tunnel_id="Tunnel_001"):
+    """
+    把隧道参数与推理结果构造为 rdflib 图（隧道个体及其属性断言，位于 DLS 命名空间）
+
+    需要 rdflib，只在导出 OWL 时导入
+    """
+    from rdflib import Graph, Literal, Namespace
+    from rdflib.namespace import RDF, OWL
+
+    dls = Namespace(NAMESPACE_URIS["DLS"])
+    params = normalize_params(params)
+    graph = Graph()
+    graph.bind("dls", dls)
+    tunnel = dls[tunnel_id]
+    graph.add((tunnel, RDF.type, OWL.NamedIndividual))
+    graph.add((tunnel, RDF.type, dls[params.get("tunnelType") or "TunnelProject"]))
+    for prop in ("hasGeologicalCondition", "hasHydroCondition", "hasSoilType"):
+        if params.get(prop):
+            graph.add((tunnel, dls[prop], dls[params[prop]]))
+    values = {prop: params[prop] for prop in ("hasTunnelLength", "hasTunnelDiameter") if prop in params}
+    values.update(results)
+    for prop, value in values.items():
+        if prop == "hasConstructionMethod":
+            for method in (value if isinstance(value, tuple) else (value,)):
+                graph.add((tunnel, dls[prop], dls[CONSTRUCTION_METHOD_INDIVIDUALS.get(method, method)]))
         else:
-            bolt_length = tunnel_diameter * 0.3  # 默认值
-        
-        self.results["hasBoltLength"] = round(bolt_length, 2)
-    
-    def _infer_bolt_spacing(self, bolt_length):
-        """推理锚杆间距 - 规则S04-0：间距=长度/2"""
-        bolt_spacing = bolt_length / 2
-        self.results["hasBoltSpacing"] = round(bolt_spacing, 2)
-    
-    def _infer_bolt_counts(self, tunnel_length, tunnel_diameter, bolt_spacing):
-        """推理锚杆行列数 - 规则S04-1, S04-2"""
-        if bolt_spacing <= 0:
-            return
-        
-        # 计算行数（隧道长度 / 锚杆间距）
-        row_count = int(tunnel_length / bolt_spacing)
-        self.results["hasBoltRowCount"] = row_count
-        
-        # 计算列数（圆弧长度 / 间距）
-        if tunnel_diameter > 0:
-            arc_length = tunnel_diameter * math.pi
-            col_count = int(arc_length / bolt_spacing)
-            self.results["hasBoltColumnCount"] = col_count
-    
-    def _infer_steel_arch_count(self, tunnel_length, steel_arch_spacing):
-        """推理钢拱架数量 - 规则S15-0"""
-        if steel_arch_spacing <= 0:
-            return
-        
-        count = round(tunnel_length / steel_arch_spacing)
-        self.results["hasSteelArchCount"] = count
+            graph.add((tunnel, dls[prop], Literal(value)))
+    return graph
 
 
-def json_to_owl_inference(json_path, output_json_path=None):
+def json_to_owl_inference(json_path, output_json_path=None, output_owl_path=None):
     """
     将JSON隧道参数转换为OWL个体，并应用SWRL规则进行推理
+
+    指定 output_owl_path 时把隧道个体与推理结果导出为 OWL（RDF/XML，需要 rdflib）
     """
     try:
         # 1. 读取JSON参数
@@ -340,6 +149,12 @@ def json_to_owl_inference(json_path, output_json_path=None):
             with open(output_json_path, 'w', encoding='utf-8') as f:
                 json.dump(results, f, ensure_ascii=False, indent=2)
             print(f"[推理程序] 已保存推理结果到 {output_json_path}")
+        
+        # 5. 导出OWL（按需导入 rdflib）
+        if output_owl_path:
+            tunnel_id = str(params.get("tunnel_id") or "Tunnel_001")
+            results_to_graph(params, results, tunnel_id).serialize(output_owl_path, format="xml")
+            print(f"[推理程序] 已导出OWL到 {output_owl_path}")
             
         return results
         
@@ -348,6 +163,125 @@ def json_to_owl_inference(json_path, output_json_path=None):
         return f"推理失败: {str(e)}"
 
 
+def iter_parameter_records(sources):
+    """
+    逐条读取参数记录，产出 (来源, 参数字典或异常)
+
+    来源可以是：'-'（标准输入的 NDJSON，每行一个 JSON 对象）、目录（其中的 *.json 按文件名排序）、
+    glob 模式（如 'tunnel_parameters_*.json'）、.ndjson / .jsonl 文件或单个 JSON 文件
+    （内容为对象或对象数组）。单条记录无法解析时产出异常，不中断后续记录；
+    记录是否为隧道参数由 batch_inference 检查。
+    """
+    for source in sources:
+        if source == "-":
+            yield from _iter_ndjson(sys.stdin, "<stdin>")
+            continue
+        if os.path.isdir(source):
+            paths = sorted(glob.glob(os.path.join(source, "*.json")))
+        elif glob.has_magic(source):
+            paths = sorted(glob.glob(source))
+        else:
+            paths = [source]
+        if not paths:
+            yield source, FileNotFoundError(f"没有匹配的参数文件: {source}")
+        for path in paths:
+            if path.endswith((".ndjson", ".jsonl")):
+                try:
+                    f = open(path, 'r', encoding='utf-8')
+                except OSError as e:
+                    yield path, e
+                    continue
+                with f:
+                    yield from _iter_ndjson(f, path)
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                yield path, e
+                continue
+            if isinstance(data, list):
+                for i, params in enumerate(data):
+                    yield f"{path}[{i}]", params
+            else:
+                yield path, data
+
+
+def _iter_ndjson(stream, name):
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield f"{name}:{line_number}", json.loads(line)
+        except ValueError as e:
+            yield f"{name}:{line_number}", e
+
+
+def batch_inference(sources, output=None):
+    """
+    批量推理：一个进程内复用同一个推理引擎（规则只编译一次），结果逐条写为 NDJSON
+
+    每行输出 {"source": 来源, "results": 推理结果}，参数中有 tunnel_id 时一并输出；
+    记录出错（包括不含 PARAMETER_KEYS 中任何键的记录）时输出 {"source": 来源, "error": 错误信息}
+    并继续处理后续记录。
+
+    Args:
+        sources: 输入来源列表，见 iter_parameter_records
+        output: 可写的文本流，默认标准输出
+
+    Returns:
+        (成功条数, 失败条数)
+    """
+    output = output or sys.stdout
+    inference_engine = TunnelSWRLInference()
+    succeeded = failed = 0
+    for source, params in iter_parameter_records(sources):
+        line = {"source": source}
+        try:
+            if isinstance(params, Exception):
+                raise params
+            if not isinstance(params, dict):
+                raise ValueError("参数记录不是 JSON 对象")
+            if not any(key in params for key in PARAMETER_KEYS):
+                raise ValueError(f"参数记录不含任何隧道参数（{', '.join(PARAMETER_KEYS)}）")
+            if "tunnel_id" in params:
+                line["tunnel_id"] = params["tunnel_id"]
+            line["results"] = inference_engine.apply_all_rules(params)
+            succeeded += 1
+        except Exception as e:
+            line["error"] = str(e)
+            failed += 1
+        output.write(json.dumps(line, ensure_ascii=False) + "\n")
+        output.flush()
+    return succeeded, failed
+
+
+def batch_main(argv):
+    """批量模式的命令行入口"""
+    arg_parser = argparse.ArgumentParser(prog="next_program.py --batch",
+                                         description="批量SWRL推理，结果写为 NDJSON")
+    arg_parser.add_argument("sources", nargs="*", default=["-"],
+                            help="目录、glob 模式、.ndjson 文件或 JSON 文件；'-' 或省略时读取标准输入的 NDJSON")
+    arg_parser.add_argument("-o", "--output", default="-", help="NDJSON 输出文件，默认标准输出")
+    args = arg_parser.parse_args(argv)
+
+    if args.output == "-":
+        try:
+            succeeded, failed = batch_inference(args.sources, sys.stdout)
+        except BrokenPipeError:
+            # 下游提前退出（如管道到 head）：停止推理，把标准输出指向空设备，避免解释器退出时再次报错；
+            # 退出码 141（128 + SIGPIPE）与被 SIGPIPE 终止的命令行工具一致
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            return 141
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            succeeded, failed = batch_inference(args.sources, f)
+    print(f"[推理程序] 批量推理完成: 成功 {succeeded} 条，失败 {failed} 条", file=sys.stderr)
+    return 0 if failed == 0 else 1
+
+
 def create_sample_input():
     """创建示例输入文件"""
     sample_data = {
@@ -365,18 +299,23 @@ def create_sample_input():
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        sys.exit(batch_main(sys.argv[2:]))
+    
     if len(sys.argv) < 2:
-        print("[推理程序] 用法: python tunnel_swrl_inference.py <json文件路径> [输出json文件路径]")
+        print("[推理程序] 用法: python tunnel_swrl_inference.py <json文件路径> [输出json文件路径] [输出owl文件路径]")
         print("[推理程序] 示例: python tunnel_swrl_inference.py input.json output.json")
+        print("[推理程序] 批量: python next_program.py --batch <目录|glob|NDJSON文件|-> [-o 输出.ndjson]")
         print("[推理程序] 创建示例输入文件...")
         create_sample_input()
         sys.exit(1)
         
     json_path = sys.argv[1]
     output_json_path = sys.argv[2] if len(sys.argv) > 2 else "swrl_inference_results.json"
+    output_owl_path = sys.argv[3] if len(sys.argv) > 3 else None
     
     # 执行SWRL推理
-    result = json_to_owl_inference(json_path, output_json_path)
+    result = json_to_owl_inference(json_path, output_json_path, output_owl_path)
     
     print("\n[推理程序] SWRL推理完成！")
     print("推理结果:")
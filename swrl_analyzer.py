@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SWRL规则静态分析
+找出重复、冲突、被遮蔽、相互重叠、规则头为空或规则体不可满足的规则，并生成去重后的调度结果：
+- dispatch_rules：去掉永远会被后面的规则覆盖的规则头后的等价规则列表，用于检查分析结论
+  （推理引擎仍使用完整规则集；tunnel_dispatch 与 tunnel_rules_vectorized 按 dead_heads 跳过这些规则头）；
+- decision_table：按 (隧道类型, 分类取值...) 键的决策表，键唯一，后面的规则覆盖前面的规则，
+  含有限定属性条件（如衬砌厚度规则中的土壤类型）的规则以加长键进入决策表，
+  规则体含有其它键以外条件的规则不进入决策表（查表无法表达这些条件）。
+
+分析基于 add_tunnel_individual 的建模约定：每个隧道恰有一个具体隧道类型（同时属于 TunnelProject），
+围岩等级、水文条件、土壤类型对每个主语只有一个取值，每个隧道只关联一个地质条件个体和一个围岩等级常量；
+数据属性按引擎的处理方式视为函数式属性（同一主语只保留一个取值，后写入的覆盖先写入的）。
+规则体之间的蕴含用同态判定：规则B的规则体能映射进规则A的规则体（按上述约定补全后）时，
+A 触发的每个绑定 B 都会在同一主语上触发。
+用法:
+    python swrl_analyzer.py pure_swrl_rules.txt
+"""
+
+import argparse
+from dataclasses import dataclass
+from typing import Dict, List, Any, Iterator, Optional, Set, Tuple
+
+from swrl_reasoner import (
+    Atom, ClassAtom, ObjectPropertyAtom, DataPropertyAtom, BuiltInAtom, SWRLRule, StreamingSWRLParser,
+    RuleDependencyGraph,
+)
+from swrl_builtins import BUILTINS
+
+
+ROOT_CLASS = "TunnelProject"
+# 每个主语只有一个取值的对象属性
+FUNCTIONAL_PROPERTIES = frozenset({"hasRockGrade", "hasHydroCondition", "hasSoilType"})
+# 每个主语只关联一个个体和一个词汇常量的对象属性（如 hasGeologicalCondition(:t, :gc) 与 hasGeologicalCondition(:t, RockGrade_I)）
+SINGLE_INDIVIDUAL_PROPERTIES = frozenset({"hasGeologicalCondition"})
+
+# 数值比较内置函数 → (方向, 是否严格)，用于区间推理
+COMPARISONS = {
+    "greaterThan": ("lower", True),
+    "greaterThanOrEqual": ("lower", False),
+    "lessThan": ("upper", True),
+    "lessThanOrEqual": ("upper", False),
+}
+MIRRORED = {"greaterThan": "lessThan", "greaterThanOrEqual": "lessThanOrEqual",
+            "lessThan": "greaterThan", "lessThanOrEqual": "greaterThanOrEqual"}
+
+# 发现的类别
+DUPLICATE = "duplicate"          # 规则体等价、规则头取值相同：前一条是多余的
+CONFLICT = "conflict"            # 规则体等价、规则头取值不同：前一条永远被覆盖
+SUBSUMED = "subsumed"            # 前一条更具体，后面更一般的规则给出相同取值：前一条是多余的
+SHADOWED = "shadowed"            # 前一条更具体，后面更一般的规则给出不同取值：前一条永远被覆盖
+OVERRIDE = "override"            # 后一条更具体，取值不同：有意的例外，后一条在其范围内生效
+OVERLAP = "overlap"              # 互不蕴含但可能同时触发、取值不同：结果取决于规则顺序
+ORDER_DEPENDENT = "order_dependent"  # 分层后的评估顺序与规则顺序不一致，覆盖关系因引擎而异
+EMPTY_HEAD = "empty_head"        # 规则头为空，规则不产生任何事实
+UNSATISFIABLE = "unsatisfiable"  # 规则体自相矛盾，规则永远不会触发
+
+
+def _is_variable(term: Any) -> bool:
+    return isinstance(term, str) and term.startswith(':')
+
+
+@dataclass
+class RuleFinding:
+    """一条分析结果；rules 为规则下标，按规则顺序排列"""
+    kind: str
+    rules: Tuple[int, ...]
+    property_name: Optional[str] = None
+    values: Tuple[Any, ...] = ()
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """
+    决策表定义
+
+    property_name: 规则头中的数据属性
+    key_properties: 键中隧道类型之后的对象属性，取值为词汇常量
+    via: 键属性的主语；None 为隧道本身，否则为沿该对象属性到达的个体（如地质条件）
+    qualifier: 规则体中可以额外出现的对象属性（与键属性同一主语）；含该条件的规则
+               以 (隧道类型, 键取值..., 限定取值) 的加长键进入决策表
+    """
+    property_name: str
+    key_properties: Tuple[str, ...]
+    via: Optional[str] = None
+    qualifier: Optional[str] = None
+
+
+# 与 tunnel_rules 中快速推理函数对应的决策表
+TUNNEL_TABLES = {
+    "LINING_THICKNESS_TABLE": TableSpec("hasLiningThickness", ("hasRockGrade", "hasHydroCondition"),
+                                        "hasGeologicalCondition", "hasSoilType"),
+    "STEEL_ARCH_SPACING_TABLE": TableSpec("hasSteelArchSpacing", ("hasRockGrade", "hasHydroCondition"),
+                                          "hasGeologicalCondition", "hasSoilType"),
+    "WATERPROOF_THICKNESS_TABLE": TableSpec("hasWaterproofLayerThickness", ("hasSoilType", "hasHydroCondition")),
+}
+
+
+def tunnel_class_hierarchy(rules: List[SWRLRule]) -> Dict[str, Set[str]]:
+    """规则中出现的具体隧道类型（名称以 TunnelProject 结尾）→ 父类"""
+    hierarchy = {}
+    for rule in rules:
+        for atom in rule.body:
+            if isinstance(atom, ClassAtom) and atom.class_name != ROOT_CLASS and atom.class_name.endswith(ROOT_CLASS):
+                hierarchy[atom.class_name] = {ROOT_CLASS}
+    return hierarchy
+
+
+def rules_from_dicts(rule_dicts: Dict[str, Dict[str, Any]]) -> List[SWRLRule]:
+    """把 RuleExporter 导出的规则字典（如 tunnel_rules.TUNNEL_RULES）还原为 SWRLRule 列表"""
+    def to_atom(atom: Dict[str, Any]) -> Atom:
+        kind = atom["type"]
+        if kind == "class":
+            return ClassAtom(atom["class_name"], atom["individual"])
+        if kind == "object_property":
+            return ObjectPropertyAtom(atom["property_name"], atom["subject"], atom["object"])
+        if kind == "data_property":
+            return DataPropertyAtom(atom["property_name"], atom["subject"], atom["value"])
+        return BuiltInAtom(atom["function_name"], list(atom["variables"]))
+
+    return [SWRLRule(rule_id, rule["label"], rule["comment"], [to_atom(a) for a in rule["body"]],
+                     [to_atom(a) for a in rule["head"]])
+            for rule_id, rule in rule_dicts.items()]
+
+
+class _Instance:
+    """
+    规则体的规范实例：变量用 (标签, 变量名) 表示，常量原样保留；
+    按函数式属性合并变量（并查集）后得到类事实、对象事实、数据事实、内置原子与数值区间
+    """
+
+    def __init__(self, bodies: List[Tuple[Any, List[Atom]]], analyzer: "RuleAnalyzer",
+                 equalities: Tuple[Tuple[Any, Any], ...] = ()):
+        self.parent: Dict[Any, Any] = {}
+        self.consistent = True
+        hierarchy = analyzer.hierarchy
+
+        classes, objects, data, builtins = [], [], [], []
+        for tag, atoms in bodies:
+            term = lambda t: (tag, t) if _is_variable(t) else t
+            for atom in atoms:
+                if isinstance(atom, ClassAtom):
+                    classes.append((term(atom.individual), atom.class_name))
+                elif isinstance(atom, ObjectPropertyAtom):
+                    objects.append((term(atom.subject), atom.property_name, term(atom.object)))
+                elif isinstance(atom, DataPropertyAtom):
+                    data.append((term(atom.subject), atom.property_name, term(atom.value)))
+                elif isinstance(atom, BuiltInAtom):
+                    builtins.append((atom.function_name,
+                                     tuple((tag, var) if var is not None else value for var, value in atom.arguments)))
+        for a, b in equalities:
+            self._union(a, b)
+
+        # 按函数式属性合并，直到没有新的合并
+        changed = True
+        while changed and self.consistent:
+            changed = False
+            seen: Dict[tuple, Any] = {}
+            for s, p, o in objects:
+                if p in analyzer.functional:
+                    key = (self.find(s), p)
+                elif p in analyzer.single_individual:
+                    key = (self.find(s), p, isinstance(o, tuple))  # 个体与常量分开合并
+                else:
+                    continue
+                if key in seen and self.find(seen[key]) != self.find(o):
+                    changed |= self._union(seen[key], o)
+                seen.setdefault(key, o)
+            seen = {}
+            for s, p, v in data:
+                key = (self.find(s), p)
+                if key in seen and self.find(seen[key]) != self.find(v):
+                    changed |= self._union(seen[key], v)
+                seen.setdefault(key, v)
+
+        find = self.find
+        self.classes: Set[Tuple[Any, str]] = set()
+        for individual, class_name in classes:
+            individual = find(individual)
+            self.classes.add((individual, class_name))
+            self.classes.update((individual, parent) for parent in hierarchy.get(class_name, ()))
+        self.objects = {(find(s), p, find(o)) for s, p, o in objects}
+        self.data = {(find(s), p, find(v)) for s, p, v in data}
+        self.builtins = {(name, tuple(find(arg) for arg in args)) for name, args in builtins}
+
+        # 具体隧道类型两两不相交
+        types: Dict[Any, Set[str]] = {}
+        for individual, class_name in self.classes:
+            if class_name in hierarchy:
+                types.setdefault(individual, set()).add(class_name)
+        if any(len(names) > 1 for names in types.values()):
+            self.consistent = False
+
+        # 与常量比较的内置原子 → 区间
+        self.intervals: Dict[Any, List[Any]] = {}
+        for name, args in self.builtins:
+            if name not in COMPARISONS or len(args) < 2:
+                continue
+            left, right = args[0], args[1]
+            if isinstance(left, tuple) and not isinstance(right, tuple):
+                self._bound(left, name, right)
+            elif isinstance(right, tuple) and not isinstance(left, tuple):
+                self._bound(right, MIRRORED[name], left)
+            elif not isinstance(left, tuple) and not isinstance(right, tuple):
+                if not BUILTINS[name].scalar(left, right):
+                    self.consistent = False
+        for lower, lower_strict, upper, upper_strict in self.intervals.values():
+            if lower is not None and upper is not None and (
+                    lower > upper or (lower == upper and (lower_strict or upper_strict))):
+                self.consistent = False
+
+    def find(self, term: Any) -> Any:
+        root = term
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while self.parent.get(term, term) != root:
+            self.parent[term], term = root, self.parent[term]
+        return root
+
+    def _union(self, a: Any, b: Any) -> bool:
+        """合并两个项；两个不同常量不能合并，实例矛盾。常量总是作为代表元"""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if not isinstance(a, tuple) and not isinstance(b, tuple):
+            self.consistent = False
+            return False
+        if isinstance(a, tuple):
+            self.parent[a] = b
+        else:
+            self.parent[b] = a
+        return True
+
+    def _bound(self, term: Any, name: str, value: Any):
+        direction, strict = COMPARISONS[name]
+        interval = self.intervals.setdefault(term, [None, False, None, False])
+        if direction == "lower":
+            if interval[0] is None or value > interval[0] or (value == interval[0] and strict):
+                interval[0], interval[1] = value, strict
+        elif interval[2] is None or value < interval[2] or (value == interval[2] and strict):
+            interval[2], interval[3] = value, strict
+
+    def entails(self, term: Any, name: str, value: Any) -> bool:
+        """实例的区间是否蕴含 term <name> value"""
+        if not isinstance(term, tuple):
+            return bool(BUILTINS[name].scalar(term, value))
+        interval = self.intervals.get(term)
+        if interval is None:
+            return False
+        lower, lower_strict, upper, upper_strict = interval
+        direction, strict = COMPARISONS[name]
+        if direction == "lower":
+            return lower is not None and (lower > value or (lower == value and (lower_strict or not strict)))
+        return upper is not None and (upper < value or (upper == value and (upper_strict or not strict)))
+
+
+class RuleAnalyzer:
+    """
+    规则冲突、重复与蕴含分析
+
+    只比较规则头写同一数据属性的规则对（数据属性是函数式的，同一主语上后写入的取值覆盖先写入的）；
+    对象属性规则头之间不会覆盖，只检查是否被其它规则重复推出。
+    """
+
+    def __init__(self, rules: List[SWRLRule], functional_properties=FUNCTIONAL_PROPERTIES,
+                 single_individual_properties=SINGLE_INDIVIDUAL_PROPERTIES,
+                 hierarchy: Optional[Dict[str, Set[str]]] = None):
+        self.rules = rules
+        self.functional = frozenset(functional_properties)
+        self.single_individual = frozenset(single_individual_properties)
+        self.hierarchy = tunnel_class_hierarchy(rules) if hierarchy is None else hierarchy
+        self._instances: Dict[int, _Instance] = {}
+
+        graph = RuleDependencyGraph(rules)
+        self.stratum = [0] * len(rules)
+        for level, components in enumerate(graph.strata()):
+            for component in components:
+                for i in component:
+                    self.stratum[i] = level
+        self.read_predicates = {atom.property_name for rule in rules for atom in rule.body
+                                if isinstance(atom, (ObjectPropertyAtom, DataPropertyAtom))}
+
+        self.findings: List[RuleFinding] = []
+        # 规则下标 → 永远不会生效的规则头原子下标
+        self.dead_heads: Dict[int, Set[int]] = {}
+        self._analyze()
+
+    # ---- 规范实例与蕴含 ----
+    def instance(self, index: int) -> _Instance:
+        instance = self._instances.get(index)
+        if instance is None:
+            instance = self._instances[index] = _Instance([(index, self.rules[index].body)], self)
+        return instance
+
+    def implies(self, a: int, b: int, a_terms: Tuple[str, ...], b_terms: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        """
+        规则 a 的规则体是否蕴含规则 b 的规则体，且 b 的 b_terms 与 a 的 a_terms 取同一个值
+
+        Returns:
+            蕴含时返回 b 的变量 → a 的规范项的映射，否则返回 None
+        """
+        return self._implies(self.instance(a), a, self.rules[b].body, a_terms, b_terms)
+
+    def _implies(self, source: _Instance, tag: Any, body: List[Atom], source_terms: Tuple[str, ...],
+                 terms: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        """source 实例（变量标签为 tag）是否蕴含规则体 body，且 terms 映射到 source_terms"""
+        mapping: Dict[str, Any] = {}
+        for source_term, term in zip(source_terms, terms):
+            target = source.find((tag, source_term)) if _is_variable(source_term) else source_term
+            if _is_variable(term):
+                if mapping.setdefault(term, target) != target:
+                    return None
+            elif term != target:
+                return None
+        atoms = [atom for atom in body if not isinstance(atom, BuiltInAtom)]
+        builtins = [atom for atom in body if isinstance(atom, BuiltInAtom)]
+        for result in self._homomorphisms(source, atoms, mapping):
+            if self._map_builtins(source, builtins, result):
+                return result
+        return None
+
+    def _homomorphisms(self, source: _Instance, atoms: List[Atom], mapping: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        if not atoms:
+            yield mapping
+            return
+        atom, remaining = atoms[0], atoms[1:]
+        if isinstance(atom, ClassAtom):
+            pattern = [(atom.individual, None)]
+            candidates = [(individual,) for individual, name in source.classes if name == atom.class_name]
+        elif isinstance(atom, ObjectPropertyAtom):
+            pattern = [(atom.subject, None), (atom.object, None)]
+            candidates = [(s, o) for s, p, o in source.objects if p == atom.property_name]
+        else:
+            pattern = [(atom.subject, None), (atom.value, None)]
+            candidates = [(s, v) for s, p, v in source.data if p == atom.property_name]
+        for candidate in candidates:
+            extended = dict(mapping)
+            for (term, _), value in zip(pattern, candidate):
+                if _is_variable(term):
+                    if extended.setdefault(term, value) != value:
+                        break
+                elif term != value:
+                    break
+            else:
+                yield from self._homomorphisms(source, remaining, extended)
+
+    def _map_builtins(self, source: _Instance, builtins: List[BuiltInAtom], mapping: Dict[str, Any]) -> bool:
+        """内置原子：比较可由区间蕴含，其余需要在源规则中有相同的内置原子（赋值型绑定输出变量）"""
+        for atom in builtins:
+            args = [mapping.get(var) if var is not None else value for var, value in atom.arguments]
+            if atom.function_name in COMPARISONS and len(args) >= 2 and None not in args[:2]:
+                left, right = args[0], args[1]
+                if not isinstance(right, tuple) and source.entails(left, atom.function_name, right):
+                    continue
+                if not isinstance(left, tuple) and source.entails(right, MIRRORED[atom.function_name], left):
+                    continue
+            spec = BUILTINS.get(atom.function_name)
+            output = atom.variables[0] if spec is not None and spec.assigns and atom.variables[0] not in mapping else None
+            for name, candidate in source.builtins:
+                if name != atom.function_name or len(candidate) != len(args):
+                    continue
+                if all(arg == value for arg, value in zip(args, candidate) if arg is not None) and \
+                        all(arg is not None or j == 0 and output is not None for j, arg in enumerate(args)):
+                    if output is not None:
+                        mapping[output] = candidate[0]
+                    break
+            else:
+                return False
+        return True
+
+    def fact_instance(self, facts: List[Atom]) -> _Instance:
+        """把一组事实原子（变量表示匿名个体）构造为规范实例，供 matches 反复使用"""
+        return _Instance([("facts", facts)], self)
+
+    def matches(self, facts: _Instance, index: int, subject: str, term: str = ":t") -> bool:
+        """
+        规则 index 规则体中的类原子与对象属性原子能否在 facts 上匹配，且规则的 subject 映射到 facts 的 term
+
+        数据属性原子与内置原子不参与判定，由调用方在具体取值上求值
+        """
+        body = [atom for atom in self.rules[index].body if isinstance(atom, (ClassAtom, ObjectPropertyAtom))]
+        return self._implies(facts, "facts", body, (term,), (subject,)) is not None
+
+    def overlaps(self, a: int, b: int, a_subject: str, b_subject: str) -> bool:
+        """两条规则能否在同一主语上同时触发"""
+        instance = _Instance([(a, self.rules[a].body), (b, self.rules[b].body)], self,
+                             (((a, a_subject), (b, b_subject)),))
+        return instance.consistent
+
+    # ---- 分析 ----
+    def _bound_terms(self, index: int) -> Set[str]:
+        terms = set()
+        for atom in self.rules[index].body:
+            if isinstance(atom, ClassAtom):
+                terms.add(atom.individual)
+            elif isinstance(atom, ObjectPropertyAtom):
+                terms.update((atom.subject, atom.object))
+            elif isinstance(atom, DataPropertyAtom):
+                terms.update((atom.subject, atom.value))
+            elif isinstance(atom, BuiltInAtom) and atom.variables:
+                terms.add(atom.variables[0])
+        return terms
+
+    def _analyze(self):
+        writers: Dict[str, List[Tuple[int, int, DataPropertyAtom]]] = {}
+        object_heads: List[Tuple[int, int, ObjectPropertyAtom]] = []
+        for i, rule in enumerate(self.rules):
+            if not rule.head:
+                self.findings.append(RuleFinding(EMPTY_HEAD, (i,)))
+                continue
+            if not self.instance(i).consistent:
+                self.findings.append(RuleFinding(UNSATISFIABLE, (i,)))
+                self.dead_heads[i] = set(range(len(rule.head)))
+                continue
+            bound = self._bound_terms(i)
+            for h, atom in enumerate(rule.head):
+                if isinstance(atom, DataPropertyAtom) and _is_variable(atom.subject) and \
+                        (not _is_variable(atom.value) or atom.value in bound):
+                    writers.setdefault(atom.property_name, []).append((i, h, atom))
+                elif isinstance(atom, ObjectPropertyAtom):
+                    object_heads.append((i, h, atom))
+
+        for property_name, heads in writers.items():
+            for x, (i, hi, first) in enumerate(heads):
+                for j, hj, second in heads[x + 1:]:
+                    if i == j or not self.overlaps(i, j, first.subject, second.subject):
+                        continue
+                    forward = self.implies(i, j, (first.subject,), (second.subject,))
+                    backward = self.implies(j, i, (second.subject,), (first.subject,))
+                    same = self._same_value(i, first, j, second, forward)
+                    if same and not forward and not backward:
+                        continue
+                    finding = RuleFinding(self._classify(forward, backward, same), (i, j), property_name,
+                                          (first.value, second.value))
+                    if self.stratum[i] > self.stratum[j]:
+                        finding.kind = ORDER_DEPENDENT
+                    self.findings.append(finding)
+                    if forward is not None and finding.kind != ORDER_DEPENDENT:
+                        self.dead_heads.setdefault(i, set()).add(hi)
+
+        for i, hi, first in object_heads:
+            for j, hj, second in object_heads:
+                if i == j or first.property_name != second.property_name:
+                    continue
+                mapping = self.implies(i, j, (first.subject, first.object), (second.subject, second.object))
+                if mapping is None:
+                    continue
+                equivalent = self.implies(j, i, (second.subject, second.object), (first.subject, first.object))
+                if equivalent is not None and j < i:
+                    continue  # 等价时保留后一条
+                if hj not in self.dead_heads.get(j, ()):
+                    self.findings.append(RuleFinding(DUPLICATE if equivalent is not None else SUBSUMED,
+                                                     tuple(sorted((i, j))), first.property_name))
+                    self.dead_heads.setdefault(i, set()).add(hi)
+                    break
+
+    @staticmethod
+    def _classify(forward, backward, same: bool) -> str:
+        if forward is not None and backward is not None:
+            return DUPLICATE if same else CONFLICT
+        if forward is not None:
+            return SUBSUMED if same else SHADOWED
+        if backward is not None:
+            return OVERRIDE
+        return OVERLAP
+
+    def _same_value(self, i: int, first: DataPropertyAtom, j: int, second: DataPropertyAtom,
+                    mapping: Optional[Dict[str, Any]]) -> bool:
+        if not _is_variable(first.value) and not _is_variable(second.value):
+            return first.value == second.value
+        if mapping is not None and _is_variable(first.value) and _is_variable(second.value):
+            return mapping.get(second.value) == self.instance(i).find((i, first.value))
+        return False
+
+    # ---- 调度结果 ----
+    def dispatch_rules(self, stratified: bool = True) -> List[SWRLRule]:
+        """
+        去掉永远不会生效的规则头后的规则列表（规则头全部无效的规则整条去掉）
+
+        与完整规则集推理结果相同，用于校验分析结论，不用于加速推理：规则引擎的耗时在规则体的连接上，
+        去掉的规则头不减少连接，规则减少后分层与执行顺序的变化反而可能使推理稍慢。
+
+        被覆盖的取值在覆盖之前可能被读取它的规则看到；stratified=False 时，
+        规则头属性出现在任何规则体中的规则头予以保留，保证非分层求值的结果不变。
+        空规则头的规则也去掉。
+        """
+        dispatched = []
+        for i, rule in enumerate(self.rules):
+            dead = self.dead_heads.get(i, set())
+            if not stratified:
+                dead = {h for h in dead if rule.head[h].property_name not in self.read_predicates}
+            head = [atom for h, atom in enumerate(rule.head) if h not in dead]
+            if not head:
+                continue
+            dispatched.append(rule if len(head) == len(rule.head) else
+                              SWRLRule(rule.rule_id, rule.label, rule.comment, rule.body, head))
+        return dispatched
+
+    def decision_table(self, spec: TableSpec) -> Dict[Tuple[str, ...], Any]:
+        """
+        按规则顺序填写决策表，后面的规则覆盖前面的规则；键唯一
+
+        只有规则体恰好等价于“隧道类型 + 键属性取值（+ 限定属性取值）”的规则进入决策表；
+        规则体是 TunnelProject 时展开到每个具体隧道类型。带限定条件的规则写入加长键，
+        查表时先查加长键；后面不带限定条件的规则覆盖同一键下所有的加长键。
+        """
+        table: Dict[Tuple[str, ...], Any] = {}
+        width = 1 + len(spec.key_properties)
+        for i, rule in enumerate(self.rules):
+            for atom in rule.head:
+                if not isinstance(atom, DataPropertyAtom) or atom.property_name != spec.property_name \
+                        or _is_variable(atom.value) or atom.value is None:
+                    continue
+                key = self._table_key(i, atom.subject, spec)
+                if key is None:
+                    continue
+                tunnel_type, values = key[0], key[1:]
+                types = [tunnel_type]
+                if tunnel_type == ROOT_CLASS:
+                    types += sorted(name for name, parents in self.hierarchy.items() if ROOT_CLASS in parents)
+                for name in types:
+                    if len(key) == width:
+                        for qualified in [k for k in table if len(k) > width and k[:width] == (name,) + values]:
+                            del table[qualified]
+                    table[(name,) + values] = atom.value
+        return table
+
+    def unrepresentable(self, spec: TableSpec) -> List[int]:
+        """规则头写该属性、但含有键以外条件而不能进入决策表的规则"""
+        return [i for i, rule in enumerate(self.rules)
+                for atom in rule.head
+                if isinstance(atom, DataPropertyAtom) and atom.property_name == spec.property_name
+                and self._table_key(i, atom.subject, spec) is None]
+
+    def _table_key(self, index: int, subject: str, spec: TableSpec) -> Optional[Tuple[str, ...]]:
+        body = self.rules[index].body
+        tunnel_type = next((atom.class_name for atom in body
+                            if isinstance(atom, ClassAtom) and atom.individual == subject), None)
+        if tunnel_type is None:
+            return None
+        values = []
+        for prop in spec.key_properties:
+            value = next((atom.object for atom in body if isinstance(atom, ObjectPropertyAtom)
+                          and atom.property_name == prop and not _is_variable(atom.object)), None)
+            if value is None:
+                return None
+            values.append(value)
+        properties = list(spec.key_properties)
+        if spec.qualifier:
+            value = next((atom.object for atom in body if isinstance(atom, ObjectPropertyAtom)
+                          and atom.property_name == spec.qualifier and not _is_variable(atom.object)), None)
+            if value is not None:
+                properties.append(spec.qualifier)
+                values.append(value)
+        # 用键构造模板规则体，与原规则体互相蕴含时规则可以用键完整表达
+        node = ":gc" if spec.via else ":t"
+        template = [ClassAtom(tunnel_type, ":t")]
+        if spec.via:
+            template.append(ObjectPropertyAtom(spec.via, ":t", node))
+        template += [ObjectPropertyAtom(prop, node, value) for prop, value in zip(properties, values)]
+        expected = _Instance([("template", template)], self)
+        if self._implies(self.instance(index), index, template, (subject,), (":t",)) is None or \
+                self._implies(expected, "template", body, (":t",), (subject,)) is None:
+            return None
+        return (tunnel_type, *values)
+
+    # ---- 报告 ----
+    def describe(self, index: int) -> str:
+        rule = self.rules[index]
+        return f"规则{rule.rule_id}({rule.label})"
+
+    def summary(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for finding in self.findings:
+            counts[finding.kind] = counts.get(finding.kind, 0) + 1
+        counts["dead_heads"] = sum(len(heads) for heads in self.dead_heads.values())
+        return counts
+
+    def report(self) -> List[str]:
+        """可读的分析结果，每条发现一行"""
+        texts = {
+            DUPLICATE: "重复", CONFLICT: "冲突（规则体等价、取值不同）", SUBSUMED: "被更一般的规则重复推出",
+            SHADOWED: "被后面更一般的规则覆盖", OVERRIDE: "后面更具体的规则覆盖", OVERLAP: "重叠（结果取决于规则顺序）",
+            ORDER_DEPENDENT: "分层顺序与规则顺序不一致", EMPTY_HEAD: "规则头为空", UNSATISFIABLE: "规则体不可满足",
+        }
+        lines = []
+        for finding in self.findings:
+            rules = " / ".join(self.describe(i) for i in finding.rules)
+            detail = f" {finding.property_name}" if finding.property_name else ""
+            if finding.values:
+                detail += f" {' vs '.join(repr(value) for value in finding.values)}"
+            lines.append(f"[{texts[finding.kind]}] {rules}{detail}")
+        return lines
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="SWRL规则冲突与蕴含分析")
+    arg_parser.add_argument("rules", nargs="?", default="pure_swrl_rules.txt", help="SWRL规则文件")
+    args = arg_parser.parse_args()
+
+    rules = StreamingSWRLParser(args.rules).parse_file()
+    analyzer = RuleAnalyzer(rules)
+    for line in analyzer.report():
+        print(line)
+    dispatched = analyzer.dispatch_rules()
+    print(f"\n规则数: {len(rules)}，去重后: {len(dispatched)}，分析结果: {analyzer.summary()}")
+    for name, spec in TUNNEL_TABLES.items():
+        skipped = analyzer.unrepresentable(spec)
+        print(f"{name}: {len(analyzer.decision_table(spec))} 个键"
+              + (f"，无法用键表达: {', '.join(analyzer.describe(i) for i in skipped)}" if skipped else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SWRL批量推理接口
+把大量隧道参数一次性加载为知识库个体，只运行一次前向链推理，按列返回推理结果。
+输入可以是参数字典的可迭代对象，也可以是 pandas DataFrame、NumPy 结构化数组或按列组织的字典。
+"""
+
+import contextlib
+import os
+from typing import Dict, List, Any, Iterable, Optional
+
+from swrl_reasoner import SWRLRule, SWRLInferenceEngine, ObjectPropertyAtom, DataPropertyAtom
+from tunnel_vocabulary import normalize_params
+
+
+# 参数字典键（与 next_program / Web 端生成的 JSON 一致）→ KnowledgeBase.add_tunnel_individual 参数
+PARAMETER_KEYS = {
+    "tunnelType": "tunnel_type",
+    "hasGeologicalCondition": "rock_grade",
+    "hasHydroCondition": "hydro_condition",
+    "hasSoilType": "soil_type",
+    "hasTunnelLength": "tunnel_length",
+    "hasTunnelDiameter": "tunnel_diameter",
+}
+
+
+def iter_records(table: Any) -> Iterable[Dict[str, Any]]:
+    """
+    把各种输入形式统一为逐行的参数字典
+
+    支持：参数字典的可迭代对象、pandas DataFrame、NumPy 结构化数组、{列名: 列值序列} 字典。
+    pandas / NumPy 只通过鸭子类型识别，不强制依赖。
+    """
+    columns = None
+    if hasattr(table, "columns") and hasattr(table, "__getitem__") and not isinstance(table, dict):
+        columns = {str(name): table[name] for name in table.columns}  # pandas DataFrame
+    elif getattr(getattr(table, "dtype", None), "names", None):
+        columns = {name: table[name] for name in table.dtype.names}  # NumPy 结构化数组
+    elif isinstance(table, dict):
+        columns = table
+
+    if columns is None:
+        yield from table
+        return
+
+    names = list(columns)
+    values = [col.tolist() if hasattr(col, "tolist") else list(col) for col in columns.values()]
+    for row in zip(*values):
+        yield dict(zip(names, row))
+
+
+def inferred_properties(rules: List[SWRLRule]) -> List[str]:
+    """规则头中出现的属性，即批量结果的输出列"""
+    properties = []
+    for rule in rules:
+        for atom in rule.head:
+            if isinstance(atom, (DataPropertyAtom, ObjectPropertyAtom)) and atom.property_name not in properties:
+                properties.append(atom.property_name)
+    return properties
+
+
+def record_tunnel_ids(records: List[Dict[str, Any]], id_key: str = "tunnel_id") -> List[str]:
+    """
+    每条记录的隧道个体名：记录自带 id_key 时用它，否则按序号命名为 Tunnel_{序号:06d}
+
+    默认名与批次中记录自带的名字相同时追加 _1、_2 ... 后缀，否则两个隧道的事实会合并到同一个体
+    """
+    taken = {str(record[id_key]) for record in records if record.get(id_key)}
+    tunnel_ids = []
+    for i, record in enumerate(records):
+        if record.get(id_key):
+            tunnel_ids.append(str(record[id_key]))
+            continue
+        tunnel_id = base = f"Tunnel_{i:06d}"
+        suffix = 0
+        while tunnel_id in taken:
+            suffix += 1
+            tunnel_id = f"{base}_{suffix}"
+        taken.add(tunnel_id)
+        tunnel_ids.append(tunnel_id)
+    return tunnel_ids
+
+
+def load_records(engine: SWRLInferenceEngine, table: Any, id_key: str = "tunnel_id") -> List[str]:
+    """把参数记录加载为知识库中的隧道个体，返回按输入顺序排列的个体名（见 record_tunnel_ids）"""
+    records = list(iter_records(table))
+    tunnel_ids = record_tunnel_ids(records, id_key)
+    for tunnel_id, record in zip(tunnel_ids, records):
+        record = normalize_params(record)
+        kwargs = {arg: record[key] for key, arg in PARAMETER_KEYS.items() if record.get(key) is not None}
+        kwargs.setdefault("tunnel_type", "TunnelProject")
+        engine.kb.add_tunnel_individual(tunnel_id, **kwargs)
+    return tunnel_ids
+
+
+def collect_columns(engine: SWRLInferenceEngine, tunnel_ids: List[str],
+                    properties: List[str]) -> Dict[str, List[Any]]:
+    """按列收集推理结果；对象属性取唯一的宾语，多个宾语时取排序后的元组"""
+    kb = engine.kb
+    result: Dict[str, List[Any]] = {"tunnel_id": list(tunnel_ids)}
+    for prop in properties:
+        column = []
+        for tunnel_id in tunnel_ids:
+            value = kb.get_data_property_value(tunnel_id, prop)
+            if value is None:
+                objects = kb.get_objects(tunnel_id, prop)
+                if objects:
+                    value = next(iter(objects)) if len(objects) == 1 else tuple(sorted(objects))
+            column.append(value)
+        result[prop] = column
+    return result
+
+
+def infer_batch(rules: List[SWRLRule], table: Any, engine_class=SWRLInferenceEngine,
+                quiet: bool = True, as_dataframe: bool = False, workers: Optional[int] = None,
+                **chain_options) -> Any:
+    """
+    批量推理：所有隧道共用一个知识库，只运行一次前向链
+
+    Args:
+        rules: 解析得到的SWRL规则
+        table: 参数记录（见 iter_records）
+        engine_class: 推理引擎类，默认 SWRLInferenceEngine，也可传入 ReteInferenceEngine
+        quiet: 是否屏蔽推理过程中的逐条输出
+        as_dataframe: 为 True 时返回 pandas DataFrame（需要安装 pandas）
+        workers: 大于 1 时切分输入记录，用多进程并行推理（见 swrl_parallel.parallel_infer_batch）
+        chain_options: 透传给 forward_chain 的参数
+
+    Returns:
+        {列名: 列值列表}，每个隧道一行，每个推理属性一列
+    """
+    if workers and workers > 1:
+        from swrl_parallel import parallel_infer_batch  # swrl_parallel 依赖本模块，延迟导入
+        columns = parallel_infer_batch(rules, table, workers, engine_class, **chain_options)
+    else:
+        engine = engine_class(rules)
+        tunnel_ids = load_records(engine, table)
+        if quiet:
+            with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+                engine.forward_chain(**chain_options)
+        else:
+            engine.forward_chain(**chain_options)
+        columns = collect_columns(engine, tunnel_ids, inferred_properties(rules))
+
+    if as_dataframe:
+        import pandas as pd
+        return pd.DataFrame(columns)
+    return columns
+
+
+def infer_single(rules: List[SWRLRule], params: Dict[str, Any], engine_class=SWRLInferenceEngine,
+                 quiet: bool = True, **chain_options) -> Dict[str, Any]:
+    """单个隧道的推理（一条记录的批量接口），返回 {属性: 值}"""
+    columns = infer_batch(rules, [params], engine_class, quiet, **chain_options)
+    return {key: values[0] for key, values in columns.items()}
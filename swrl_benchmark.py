@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SWRL推理引擎基准测试
+生成合成隧道知识库，比较朴素引擎与Rete网络引擎的推理耗时，并校验两者结果一致。
+各项基准可以用 --bench 单独选择，它们共用的引擎推理结果只在第一次需要时运行一次。
+用法:
+    python swrl_benchmark.py --tunnels 2000
+    python swrl_benchmark.py --bench engines incremental --tunnels 500
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import tempfile
+import time
+from functools import partial
+from typing import Dict, List, Any, Callable
+
+from swrl_reasoner import StreamingSWRLParser, SWRLInferenceEngine, KnowledgeBase, RuleDependencyGraph
+from swrl_rete import ReteInferenceEngine
+from swrl_interned import InternedInferenceEngine
+from swrl_batch import infer_batch, inferred_properties, collect_columns
+from swrl_parallel import parallel_forward_chain
+from swrl_provenance import TRACE_OFF, TRACE_RECORD, TRACE_PRINT
+from swrl_analyzer import RuleAnalyzer
+from swrl_snapshot import save_snapshot, load_snapshot, restore_engine, incremental_forward_chain
+from tunnel_dispatch import TunnelRuleDispatcher
+from tunnel_vocabulary import TUNNEL_TYPES, ROCK_GRADES, HYDRO_CONDITIONS, SOIL_TYPES  # 规则中使用的分类取值域
+
+
+def generate_synthetic_tunnels(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """按规则的分类取值域随机生成隧道参数"""
+    rng = random.Random(seed)
+    tunnels = []
+    for i in range(count):
+        tunnels.append({
+            "tunnel_id": f"Tunnel_{i:06d}",
+            "tunnel_type": rng.choice(TUNNEL_TYPES),
+            "rock_grade": rng.choice(ROCK_GRADES),
+            "hydro_condition": rng.choice(HYDRO_CONDITIONS),
+            "soil_type": rng.choice(SOIL_TYPES),
+            "tunnel_length": rng.randint(500, 8000),
+            "tunnel_diameter": round(rng.uniform(6.0, 15.0), 2),
+        })
+    return tunnels
+
+
+def load_tunnels(kb: KnowledgeBase, tunnels: List[Dict[str, Any]]):
+    """把合成隧道写入知识库"""
+    for tunnel in tunnels:
+        kb.add_tunnel_individual(**tunnel)
+
+
+def to_parameter_record(tunnel: Dict[str, Any]) -> Dict[str, Any]:
+    """转换为 Web 端 / next_program 使用的参数字典格式"""
+    return {
+        "tunnel_id": tunnel["tunnel_id"],
+        "tunnelType": tunnel["tunnel_type"],
+        "hasGeologicalCondition": tunnel["rock_grade"],
+        "hasHydroCondition": tunnel["hydro_condition"],
+        "hasSoilType": tunnel["soil_type"],
+        "hasTunnelLength": tunnel["tunnel_length"],
+        "hasTunnelDiameter": tunnel["tunnel_diameter"],
+    }
+
+
+def benchmark_batch(rules, tunnels) -> bool:
+    """
+    比较批量接口与逐条推理（每个隧道新建一个 SWRLInferenceEngine、加载后单独运行前向链，
+    与 swrl_reasoner 命令行处理单个隧道的方式相同）的耗时，并校验结果一致
+    """
+    records = [to_parameter_record(tunnel) for tunnel in tunnels]
+    properties = inferred_properties(rules)
+
+    rows = []
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for tunnel in tunnels:
+            engine = SWRLInferenceEngine(rules)
+            engine.kb.add_tunnel_individual(**tunnel)
+            engine.forward_chain()
+            rows.append(collect_columns(engine, [tunnel["tunnel_id"]], properties))
+        loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = infer_batch(rules, records)
+    batch_seconds = time.perf_counter() - start
+
+    print(f"逐条推理: {loop_seconds:.3f} s，批量推理: {batch_seconds:.3f} s "
+          f"(加速 {loop_seconds / batch_seconds:.1f}x)")
+    return all(row[key][0] == columns[key][i] for i, row in enumerate(rows) for key in columns)
+
+
+def snapshot(kb: KnowledgeBase) -> Dict[str, Any]:
+    """把知识库转换为便于比较的普通字典"""
+    return {
+        "class": {k: set(v) for k, v in kb.class_facts.items() if v},
+        "object": {k: set(v) for k, v in kb.object_property_facts.items() if v},
+        "data": {k: dict(v) for k, v in kb.data_property_facts.items() if v},
+    }
+
+
+def run_engine(engine_class: Callable, rules, tunnels, **chain_options) -> Dict[str, Any]:
+    """加载数据并运行一次推理，屏蔽逐条事实的控制台输出"""
+    engine = engine_class(rules)
+    load_tunnels(engine.kb, tunnels)
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        engine.forward_chain(**chain_options)
+        elapsed = time.perf_counter() - start
+    return {"engine": engine, "seconds": elapsed}
+
+
+def benchmark_incremental(rules, tunnels, rete_result: Dict[str, Any], updates: int = 20, seed: int = 7) -> bool:
+    """在已物化的Rete知识库上逐个修改隧道参数，比较增量更新与全量重新推理的耗时并校验结果一致"""
+    rng = random.Random(seed)
+    domains = {"tunnel_type": TUNNEL_TYPES, "rock_grade": ROCK_GRADES,
+               "hydro_condition": HYDRO_CONDITIONS, "soil_type": SOIL_TYPES}
+    engine = rete_result["engine"]
+    tunnels = [dict(tunnel) for tunnel in tunnels]
+    elapsed = 0.0
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(updates):
+            tunnel = rng.choice(tunnels)
+            field = rng.choice(list(domains))
+            tunnel[field] = rng.choice(domains[field])
+            start = time.perf_counter()
+            engine.update_tunnel(tunnel["tunnel_id"], **{field: tunnel[field]})
+            elapsed += time.perf_counter() - start
+    fresh = run_engine(ReteInferenceEngine, rules, tunnels)
+    print(f"增量更新: 平均 {elapsed / updates * 1e3:.2f} ms/次，全量重新推理: {fresh['seconds']:.3f} s")
+    return snapshot(engine.kb) == snapshot(fresh["engine"].kb)
+
+
+def benchmark_tracing(rules, tunnels, repeat: int = 3) -> bool:
+    """
+    比较各溯源级别下分层引擎的推理耗时（各取 repeat 次中最快的一次）
+    TRACE_PRINT 对应改造前逐条输出的行为，这里输出到空设备，输出到终端时还要慢得多
+    """
+    results = {}
+    for name, level in (("关闭", TRACE_OFF), ("记录", TRACE_RECORD), ("记录并输出", TRACE_PRINT)):
+        runs = [run_engine(partial(SWRLInferenceEngine, verbosity=level), rules, tunnels, stratified=True)
+                for _ in range(repeat)]
+        results[name] = min(runs, key=lambda result: result["seconds"])
+    baseline = results["关闭"]["seconds"]
+    for name, result in results.items():
+        print(f"溯源{name}: {result['seconds']:.3f} s  ({result['seconds'] / baseline:.2f}x)")
+    print(f"溯源日志规模: {results['记录']['engine'].provenance.statistics()}")
+    expected = snapshot(results["关闭"]["engine"].kb)
+    return all(snapshot(result["engine"].kb) == expected for result in results.values())
+
+
+def benchmark_parallel(rules, tunnels, workers: int, expected: Dict[str, Any]) -> bool:
+    """
+    比较单进程与多进程推理：按连通分量切分已加载的知识库（parallel_forward_chain），
+    以及直接切分输入记录的批量接口（infer_batch(workers=...)），并校验结果一致
+    """
+    serial = run_engine(InternedInferenceEngine, rules, tunnels)
+    engine = InternedInferenceEngine(rules)
+    load_tunnels(engine.kb, tunnels)
+    start = time.perf_counter()
+    stats = parallel_forward_chain(engine, workers)
+    elapsed = time.perf_counter() - start
+    print(f"按连通分量并行 ({stats['workers']} 进程，{stats['components']} 个分量，{stats['partitions']} 个批次): "
+          f"{elapsed:.3f} s，单进程: {serial['seconds']:.3f} s (加速 {serial['seconds'] / elapsed:.1f}x)")
+
+    records = [to_parameter_record(tunnel) for tunnel in tunnels]
+    start = time.perf_counter()
+    columns = infer_batch(rules, records, InternedInferenceEngine)
+    batch_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    parallel_columns = infer_batch(rules, records, InternedInferenceEngine, workers=workers)
+    parallel_seconds = time.perf_counter() - start
+    print(f"批量接口并行 ({workers} 进程): {parallel_seconds:.3f} s，单进程: {batch_seconds:.3f} s "
+          f"(加速 {batch_seconds / parallel_seconds:.1f}x)")
+    return snapshot(engine.kb) == expected and parallel_columns == columns
+
+
+def benchmark_dispatch(rules, tunnels, stratified: Dict[str, Any]) -> bool:
+    """校验 RuleAnalyzer 的结论：去掉永远被覆盖的规则头后推理，结果与完整规则集一致（不是加速手段）"""
+    start = time.perf_counter()
+    analyzer = RuleAnalyzer(rules)
+    dispatched = analyzer.dispatch_rules()
+    analyze_seconds = time.perf_counter() - start
+    result = run_engine(SWRLInferenceEngine, dispatched, tunnels, stratified=True)
+    print(f"规则分析: {analyze_seconds:.3f} s，{analyzer.summary()}；去重后 {len(dispatched)}/{len(rules)} 条规则，"
+          f"分层引擎推理 {result['seconds']:.3f} s（仅用于一致性校验；完整规则集 {stratified['seconds']:.3f} s）")
+    return snapshot(result["engine"].kb) == snapshot(stratified["engine"].kb)
+
+
+def benchmark_tunnel_dispatch(tunnels, stratified: Dict[str, Any]) -> bool:
+    """next_program 使用的预编译调度（由 TUNNEL_RULES 编译）逐条求值，校验与分层引擎的推理结果一致"""
+    start = time.perf_counter()
+    dispatcher = TunnelRuleDispatcher()
+    compile_seconds = time.perf_counter() - start
+    records = [to_parameter_record(tunnel) for tunnel in tunnels]
+    start = time.perf_counter()
+    results = [dispatcher.infer_params(record) for record in records]
+    seconds = time.perf_counter() - start
+    print(f"预编译调度: 编译 {compile_seconds:.3f} s，{len(dispatcher.plans)} 个分类键，"
+          f"逐条求值 {seconds:.3f} s（分层引擎 {stratified['seconds']:.3f} s）")
+
+    columns = collect_columns(stratified["engine"], [tunnel["tunnel_id"] for tunnel in tunnels],
+                              dispatcher.head_properties)
+    return all(result.get(prop) == columns[prop][i]
+               for i, result in enumerate(results) for prop in dispatcher.head_properties)
+
+
+def benchmark_snapshot(rules, tunnels, stratified: Dict[str, Any], appended: int = 50) -> bool:
+    """
+    把物化后的知识库写为快照，比较打开快照与重新建库推理的耗时；
+    再在恢复的知识库上追加隧道并增量推理，与在全部隧道上全量推理的结果比较
+    """
+    extra = [dict(tunnel, tunnel_id=f"Appended_{i:06d}")
+             for i, tunnel in enumerate(generate_synthetic_tunnels(appended, seed=99))]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "kb.snapshot")
+        start = time.perf_counter()
+        stats = save_snapshot(stratified["engine"].kb, path)
+        save_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        kb = load_snapshot(path, journal=False)
+        open_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        kb.count_individuals_of_class("TunnelProject")
+        first_query = time.perf_counter() - start
+        print(f"快照: {stats['bytes'] / 1e6:.1f} MB，写入 {save_seconds:.3f} s，打开 {open_seconds * 1e3:.2f} ms，"
+              f"首次查询 {first_query * 1e3:.2f} ms，建库并推理 {stratified['seconds']:.3f} s")
+        same = snapshot(kb) == snapshot(stratified["engine"].kb)
+        kb.close()
+
+        engine = restore_engine(rules, path)
+        load_tunnels(engine.kb, extra)
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            incremental_forward_chain(engine, stratified=True)
+            append_seconds = time.perf_counter() - start
+        engine.kb.close()
+        # 重新打开：快照 + 追加日志的重放结果应与内存中的结果一致
+        reopened = load_snapshot(path, journal=False)
+        fresh = run_engine(SWRLInferenceEngine, rules, tunnels + extra, stratified=True)
+        print(f"追加 {appended} 个隧道后增量推理: {append_seconds:.3f} s，全量重新推理: {fresh['seconds']:.3f} s")
+        same &= snapshot(reopened) == snapshot(fresh["engine"].kb)
+        reopened.close()
+    return same
+
+
+# 各基准共用的引擎推理：名称 → (引擎类, forward_chain 参数)
+ENGINE_RUNS = {
+    "naive": (SWRLInferenceEngine, {"semi_naive": False, "stratified": False}),
+    "semi_naive": (SWRLInferenceEngine, {"semi_naive": True, "stratified": False}),
+    "unplanned": (partial(SWRLInferenceEngine, optimize_joins=False), {"stratified": True}),
+    "stratified": (SWRLInferenceEngine, {"stratified": True}),
+    "interned": (InternedInferenceEngine, {}),
+    "rete": (ReteInferenceEngine, {}),
+}
+
+
+class EngineRuns:
+    """规则、合成隧道与按需运行的引擎推理结果（每种推理只运行一次，供多个基准共用）"""
+
+    def __init__(self, rules, tunnels, workers: int):
+        self.rules = rules
+        self.tunnels = tunnels
+        self.workers = workers
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        if name not in self.results:
+            engine_class, chain_options = ENGINE_RUNS[name]
+            self.results[name] = run_engine(engine_class, self.rules, self.tunnels, **chain_options)
+        return self.results[name]
+
+
+def benchmark_engines(runs: EngineRuns) -> bool:
+    """比较各推理引擎的耗时，并校验推理结果与朴素引擎一致"""
+    naive = runs["naive"]
+    print(f"规则依赖图: {RuleDependencyGraph(runs.rules).summary()}")
+    print(f"朴素引擎: {naive['seconds']:.3f} s")
+    for name, key in (("半朴素引擎", "semi_naive"), ("分层引擎（规则体原顺序）", "unplanned"),
+                      ("分层引擎", "stratified"), ("整数ID引擎", "interned"), ("Rete引擎", "rete")):
+        result = runs[key]
+        print(f"{name}: {result['seconds']:.3f} s  (加速 {naive['seconds'] / result['seconds']:.1f}x)")
+    print(f"Rete网络规模: {runs['rete']['engine'].network.statistics()}")
+
+    for name, key in (("朴素", "naive"), ("半朴素", "semi_naive"), ("分层", "stratified")):
+        stats = runs[key]["engine"].round_stats
+        fired = sum(s["rules_fired"] for s in stats)
+        deltas = [s["delta_size"] for s in stats]
+        shown = deltas if len(deltas) <= 5 else deltas[:3] + ["..."] + deltas[-1:]
+        print(f"{name}: {len(stats)} 轮，规则触发 {fired} 次，每轮新增事实 {shown}")
+
+    expected = snapshot(naive["engine"].kb)
+    return all(snapshot(runs[key]["engine"].kb) == expected for key in ENGINE_RUNS)
+
+
+# 可单独选择的基准，按此顺序运行（incremental 会修改共用的 Rete 知识库，排在 engines 之后）
+BENCHMARKS: Dict[str, Callable[[EngineRuns], bool]] = {
+    "engines": benchmark_engines,
+    "batch": lambda runs: benchmark_batch(runs.rules, runs.tunnels),
+    "tracing": lambda runs: benchmark_tracing(runs.rules, runs.tunnels),
+    "incremental": lambda runs: benchmark_incremental(runs.rules, runs.tunnels, runs["rete"]),
+    "parallel": lambda runs: benchmark_parallel(runs.rules, runs.tunnels, runs.workers,
+                                                snapshot(runs["stratified"]["engine"].kb)),
+    "dispatch": lambda runs: benchmark_dispatch(runs.rules, runs.tunnels, runs["stratified"]),
+    "tunnel_dispatch": lambda runs: benchmark_tunnel_dispatch(runs.tunnels, runs["stratified"]),
+    "snapshot": lambda runs: benchmark_snapshot(runs.rules, runs.tunnels, runs["stratified"]),
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="SWRL推理引擎基准测试")
+    arg_parser.add_argument("--rules", default="pure_swrl_rules.txt", help="SWRL规则文件（规则片段、OWL/XML 或 RDF/XML）")
+    arg_parser.add_argument("--tunnels", type=int, default=2000, help="合成隧道数量")
+    arg_parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="并行推理的进程数")
+    arg_parser.add_argument("--bench", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS),
+                            help="运行的基准（默认全部）")
+    args = arg_parser.parse_args()
+
+    rules = StreamingSWRLParser(args.rules).parse_file()
+    tunnels = generate_synthetic_tunnels(args.tunnels, args.seed)
+    print(f"规则数: {len(rules)}，合成隧道数: {len(tunnels)}")
+
+    runs = EngineRuns(rules, tunnels, args.workers)
+    same = True
+    for name in BENCHMARKS:
+        if name in args.bench:
+            same &= BENCHMARKS[name](runs)
+    print(f"推理结果一致: {'是' if same else '否'}")
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SWRL内置函数注册表
+每个内置函数同时提供标量实现（逐条绑定求值）和 NumPy 列实现（对一整列绑定一次求值）。
+赋值型内置函数（如 multiply(?r, ?a, ?b)）的第一个参数为输出，其余为输入；
+比较型内置函数（如 greaterThan(?a, ?b)）只做过滤。
+新增内置函数只需调用 register_builtin，不需要修改推理引擎。
+"""
+
+import importlib.util
+import math
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, Optional
+
+
+class _LazyNumPy:
+    """首次访问属性时才导入 NumPy，只做标量推理（如命令行单条推理）时不承担 NumPy 的导入耗时"""
+
+    def __getattr__(self, name: str) -> Any:
+        global np
+        import numpy
+        np = numpy
+        return getattr(numpy, name)
+
+
+# 列实现需要 NumPy，标量推理不依赖它
+np = _LazyNumPy() if importlib.util.find_spec("numpy") is not None else None
+
+
+@dataclass(frozen=True)
+class Builtin:
+    """
+    内置函数定义
+
+    scalar: 标量实现，参数为输入值；赋值型返回结果（None 表示无结果），比较型返回布尔值
+    vector: 列实现，参数为浮点数组（或标量）；赋值型以 NaN 表示无结果，比较型返回布尔数组
+    arity: 输入参数个数（不含赋值型的输出参数）
+    assigns: 是否为赋值型
+    """
+    name: str
+    scalar: Callable[..., Any]
+    vector: Optional[Callable[..., Any]]
+    arity: int
+    assigns: bool
+
+    @property
+    def min_arguments(self) -> int:
+        """规则中内置原子至少需要的参数个数"""
+        return self.arity + 1 if self.assigns else self.arity
+
+
+BUILTINS: Dict[str, Builtin] = {}
+
+
+def register_builtin(name: str, scalar: Callable[..., Any], vector: Optional[Callable[..., Any]] = None,
+                     arity: int = 2, assigns: bool = True) -> Builtin:
+    """注册（或覆盖）一个内置函数"""
+    builtin = BUILTINS[name] = Builtin(name, scalar, vector, arity, assigns)
+    return builtin
+
+
+def parse_literal(value: str) -> Any:
+    """规则中的字面量：含小数点解析为 float，否则尝试 int，都失败时保留原字符串"""
+    try:
+        return float(value) if '.' in value else int(value)
+    except ValueError:
+        return value
+
+
+def _safe_divide(a, b):
+    return a / b if b != 0 else None
+
+
+def _vector_divide(a, b):
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    out = np.full(np.broadcast(a, b).shape, np.nan)
+    return np.divide(a, b, out=out, where=(b != 0))
+
+
+# 列实现中 round 与 Python 内置 round 一样采用银行家舍入
+register_builtin("add", lambda a, b: a + b, lambda a, b: np.add(a, b))
+register_builtin("subtract", lambda a, b: a - b, lambda a, b: np.subtract(a, b))
+register_builtin("multiply", lambda a, b: a * b, lambda a, b: np.multiply(a, b))
+register_builtin("divide", _safe_divide, _vector_divide)
+register_builtin("pow", lambda a, b: a ** b, lambda a, b: np.power(np.asarray(a, dtype=float), b))
+register_builtin("min", min, lambda a, b: np.minimum(a, b))
+register_builtin("max", max, lambda a, b: np.maximum(a, b))
+register_builtin("floor", math.floor, lambda a: np.floor(a), arity=1)
+register_builtin("round", round, lambda a: np.round(a), arity=1)
+
+register_builtin("greaterThan", lambda a, b: a > b, lambda a, b: np.greater(a, b), assigns=False)
+register_builtin("greaterThanOrEqual", lambda a, b: a >= b, lambda a, b: np.greater_equal(a, b), assigns=False)
+register_builtin("lessThan", lambda a, b: a < b, lambda a, b: np.less(a, b), assigns=False)
+register_builtin("lessThanOrEqual", lambda a, b: a <= b, lambda a, b: np.less_equal(a, b), assigns=False)
+register_builtin("equal", lambda a, b: a == b, lambda a, b: np.equal(a, b), assigns=False)
+register_builtin("notEqual", lambda a, b: a != b, lambda a, b: np.not_equal(a, b), assigns=False)
+
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+驻留（interned）整数ID表示的SWRL推理
+个体、类名和属性名统一映射为小整数；规则编译为元组形式的操作序列，
+变量编译为槽位下标，连接时在每条规则固定长度的绑定数组上原地赋值/回溯，
+内层循环不再为每一步匹配复制绑定字典。
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Set, Any, Optional, Tuple
+
+from swrl_reasoner import (
+    Atom, ClassAtom, ObjectPropertyAtom, DataPropertyAtom, BuiltInAtom,
+    SWRLRule, KnowledgeBase, SWRLInferenceEngine,
+)
+from swrl_provenance import TRACE_OFF
+
+
+# 编译后操作的类型
+CLASS, OBJECT, DATA, BUILTIN = range(4)
+
+
+def is_variable(term: Any) -> bool:
+    """判断项是否为SWRL变量（以 ':' 开头）"""
+    return isinstance(term, str) and term.startswith(':')
+
+
+class SymbolTable:
+    """字符串 ↔ 小整数的双向映射"""
+
+    __slots__ = ("ids", "names")
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def intern(self, name: str) -> int:
+        """返回名称的ID，首次出现时分配新ID"""
+        symbol = self.ids.get(name)
+        if symbol is None:
+            symbol = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return symbol
+
+    def lookup(self, name: str) -> Optional[int]:
+        """返回已有名称的ID，不分配新ID"""
+        return self.ids.get(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class InternedKnowledgeBase(KnowledgeBase):
+    """
+    以整数ID存储事实的知识库，字符串接口与 KnowledgeBase 一致
+
+    对象属性不再单独保存 (主语, 宾语) 对索引，按属性遍历时由 主语索引 + (主语, 属性) 宾语集合 组合得到。
+    class_facts / object_property_facts / data_property_facts 等属性为按需解码的只读副本，
+    仅用于打印和比较，推理时使用 *_id 方法。
+    """
+
+    def __init__(self):
+        self.symbols = SymbolTable()
+        self._individual_classes: Dict[int, Set[int]] = defaultdict(set)  # 个体 → 类
+        self._class_members: Dict[int, Set[int]] = defaultdict(set)  # 类 → 个体
+        self._objects: Dict[Tuple[int, int], Set[int]] = defaultdict(set)  # (主语, 属性) → 宾语
+        self._object_subjects: Dict[Tuple[int, int], Set[int]] = defaultdict(set)  # (属性, 宾语) → 主语
+        self._property_subjects: Dict[int, Set[int]] = defaultdict(set)  # 属性 → 主语
+        self._pair_counts: Dict[int, int] = defaultdict(int)  # 属性 → 事实数
+        self._data: Dict[int, Dict[int, Any]] = defaultdict(dict)  # 主语 → {数据属性: 值}
+        self._data_subjects: Dict[int, Set[int]] = defaultdict(set)  # 数据属性 → 主语
+
+    # ---- 整数ID接口（推理引擎使用） ----
+    def add_class_fact_id(self, individual: int, class_id: int):
+        self._individual_classes[individual].add(class_id)
+        self._class_members[class_id].add(individual)
+
+    def add_object_property_fact_id(self, subject: int, property_id: int, object_id: int) -> bool:
+        """添加对象属性事实，返回是否为新事实"""
+        objects = self._objects[(subject, property_id)]
+        if object_id in objects:
+            return False
+        objects.add(object_id)
+        self._object_subjects[(property_id, object_id)].add(subject)
+        self._property_subjects[property_id].add(subject)
+        self._pair_counts[property_id] += 1
+        return True
+
+    def add_data_property_fact_id(self, subject: int, property_id: int, value: Any):
+        self._data[subject][property_id] = value
+        self._data_subjects[property_id].add(subject)
+
+    def remove_class_fact_id(self, individual: int, class_id: int):
+        self._individual_classes.get(individual, set()).discard(class_id)
+        self._class_members.get(class_id, set()).discard(individual)
+
+    def remove_object_property_fact_id(self, subject: int, property_id: int, object_id: int):
+        objects = self._objects.get((subject, property_id))
+        if not objects or object_id not in objects:
+            return
+        objects.discard(object_id)
+        self._object_subjects[(property_id, object_id)].discard(subject)
+        self._pair_counts[property_id] -= 1
+        if not objects:
+            self._property_subjects[property_id].discard(subject)
+
+    def remove_data_property_fact_id(self, subject: int, property_id: int):
+        values = self._data.get(subject)
+        if values and property_id in values:
+            del values[property_id]
+            self._data_subjects[property_id].discard(subject)
+
+    def class_members(self, class_id: int) -> Set[int]:
+        return self._class_members.get(class_id, ())
+
+    def objects_of(self, subject: int, property_id: int) -> Set[int]:
+        return self._objects.get((subject, property_id), ())
+
+    def subjects_of(self, property_id: int, object_id: Optional[int] = None) -> Set[int]:
+        if object_id is None:
+            return self._property_subjects.get(property_id, ())
+        return self._object_subjects.get((property_id, object_id), ())
+
+    def data_of(self, subject: int) -> Dict[int, Any]:
+        return self._data.get(subject, {})
+
+    def data_subjects(self, property_id: int) -> Set[int]:
+        return self._data_subjects.get(property_id, ())
+
+    # ---- 字符串接口（与 KnowledgeBase 一致） ----
+    def _id(self, name: str) -> Optional[int]:
+        return self.symbols.lookup(name)
+
+    def _names(self, ids) -> Set[str]:
+        names = self.symbols.names
+        return {names[i] for i in ids}
+
+    def add_class_fact(self, individual: str, class_name: str):
+        """添加类事实"""
+        intern = self.symbols.intern
+        self.add_class_fact_id(intern(individual), intern(class_name))
+
+    def add_object_property_fact(self, subject: str, property_name: str, object_val: str):
+        """添加对象属性事实"""
+        intern = self.symbols.intern
+        self.add_object_property_fact_id(intern(subject), intern(property_name), intern(object_val))
+
+    def add_data_property_fact(self, subject: str, property_name: str, value: Any):
+        """添加数据属性事实"""
+        intern = self.symbols.intern
+        self.add_data_property_fact_id(intern(subject), intern(property_name), value)
+
+    def remove_class_fact(self, individual: str, class_name: str):
+        individual, class_id = self._id(individual), self._id(class_name)
+        if individual is not None and class_id is not None:
+            self.remove_class_fact_id(individual, class_id)
+
+    def remove_object_property_fact(self, subject: str, property_name: str, object_val: str):
+        ids = (self._id(subject), self._id(property_name), self._id(object_val))
+        if None not in ids:
+            self.remove_object_property_fact_id(*ids)
+
+    def remove_data_property_fact(self, subject: str, property_name: str):
+        subject, property_id = self._id(subject), self._id(property_name)
+        if subject is not None and property_id is not None:
+            self.remove_data_property_fact_id(subject, property_id)
+
+    def has_class_fact(self, individual: str, class_name: str) -> bool:
+        individual, class_id = self._id(individual), self._id(class_name)
+        return individual is not None and class_id in self._individual_classes.get(individual, ())
+
+    def has_object_property_fact(self, subject: str, property_name: str, object_val: str) -> bool:
+        subject, property_id, object_id = self._id(subject), self._id(property_name), self._id(object_val)
+        return object_id is not None and object_id in self.objects_of(subject, property_id)
+
+    def get_data_property_value(self, subject: str, property_name: str) -> Any:
+        subject, property_id = self._id(subject), self._id(property_name)
+        return self.data_of(subject).get(property_id) if subject is not None else None
+
+    def get_individuals_of_class(self, class_name: str) -> Set[str]:
+        return self._names(self.class_members(self._id(class_name)))
+
+    def get_objects(self, subject: str, property_name: str) -> Set[str]:
+        return self._names(self.objects_of(self._id(subject), self._id(property_name)))
+
+    def get_subjects(self, property_name: str, object_val: Optional[str] = None) -> Set[str]:
+        if object_val is None:
+            return self._names(self.subjects_of(self._id(property_name)))
+        object_id = self._id(object_val)
+        return self._names(self.subjects_of(self._id(property_name), object_id)) if object_id is not None else set()
+
+    def get_property_pairs(self, property_name: str) -> Set[Tuple[str, str]]:
+        names = self.symbols.names
+        property_id = self._id(property_name)
+        return {(names[s], names[o]) for s in self.subjects_of(property_id) for o in self.objects_of(s, property_id)}
+
+    def get_data_property_subjects(self, property_name: str) -> Set[str]:
+        return self._names(self.data_subjects(self._id(property_name)))
+
+    def count_individuals_of_class(self, class_name: str) -> int:
+        return len(self.class_members(self._id(class_name)))
+
+    def count_subjects(self, property_name: str, object_val: Optional[str] = None) -> int:
+        if object_val is None:
+            return len(self.subjects_of(self._id(property_name)))
+        object_id = self._id(object_val)
+        return len(self.subjects_of(self._id(property_name), object_id)) if object_id is not None else 0
+
+    def count_property_pairs(self, property_name: str) -> int:
+        return self._pair_counts.get(self._id(property_name), 0)
+
+    def count_data_property_subjects(self, property_name: str) -> int:
+        return len(self.data_subjects(self._id(property_name)))
+
+    def key_count(self) -> int:
+        return len(self._individual_classes) + len(self._objects)
+
+    # ---- 解码视图（只读副本） ----
+    @property
+    def class_facts(self) -> Dict[str, Set[str]]:
+        names = self.symbols.names
+        return {names[i]: self._names(classes) for i, classes in self._individual_classes.items() if classes}
+
+    @property
+    def object_property_facts(self) -> Dict[Tuple[str, str], Set[str]]:
+        names = self.symbols.names
+        return {(names[s], names[p]): self._names(objects) for (s, p), objects in self._objects.items() if objects}
+
+    @property
+    def data_property_facts(self) -> Dict[str, Dict[str, Any]]:
+        names = self.symbols.names
+        return {names[s]: {names[p]: value for p, value in values.items()}
+                for s, values in self._data.items() if values}
+
+
+class CompiledRule:
+    """
+    编译后的规则
+    项编码：常量为符号ID（>= 0），变量为 ~槽位（< 0）；数据属性取值为字面量或槽位
+    """
+
+    __slots__ = ("rule", "body", "ops", "heads", "slots", "_entity_slots")
+
+    def __init__(self, rule: SWRLRule, body: List[Atom], symbols: SymbolTable):
+        self.rule = rule
+        self.body = body  # 编译所依据的原子顺序（JoinPlanner 的计划），计划变化时重新编译
+        self.slots: Dict[str, int] = {}
+        self.ops = tuple(self._compile_atom(atom, symbols) for atom in body)
+        self.heads = tuple(op for op in (self._compile_atom(atom, symbols) for atom in rule.head)
+                           if op[0] in (OBJECT, DATA))
+        self._entity_slots: Optional[frozenset] = None
+
+    def decode_binding(self, binding: tuple, names: List[str]) -> Tuple[Tuple[str, Any], ...]:
+        """把绑定数组解码为 ((变量, 值), ...)：个体槽位还原为名称，字面量槽位原样保留"""
+        if self._entity_slots is None:
+            # 出现在类原子、对象属性原子或数据属性主语位置的变量绑定的是符号ID
+            entity = set()
+            for op in self.ops + self.heads:
+                if op[0] == CLASS or op[0] == DATA:
+                    entity.add(op[2])
+                elif op[0] == OBJECT:
+                    entity.update(op[2:4])
+            self._entity_slots = frozenset(~term for term in entity if term < 0)
+        return tuple((var, names[binding[slot]] if slot in self._entity_slots else binding[slot])
+                     for var, slot in self.slots.items() if binding[slot] is not None)
+
+    def _term(self, term: str, symbols: SymbolTable) -> int:
+        if is_variable(term):
+            return ~self.slots.setdefault(term, len(self.slots))
+        return symbols.intern(term)
+
+    def _compile_atom(self, atom: Atom, symbols: SymbolTable) -> tuple:
+        if isinstance(atom, ClassAtom):
+            return (CLASS, symbols.intern(atom.class_name), self._term(atom.individual, symbols))
+        if isinstance(atom, ObjectPropertyAtom):
+            return (OBJECT, symbols.intern(atom.property_name), self._term(atom.subject, symbols),
+                    self._term(atom.object, symbols))
+        if isinstance(atom, DataPropertyAtom):
+            value_is_slot = is_variable(atom.value)
+            value = ~self._term(atom.value, symbols) if value_is_slot else atom.value
+            return (DATA, symbols.intern(atom.property_name), self._term(atom.subject, symbols), value, value_is_slot)
+        # 内置原子：(变量名, 槽位) 用于构造 execute_builtin 所需的局部绑定
+        arguments = tuple((var, ~self._term(var, symbols)) for var in atom.variables if is_variable(var))
+        return (BUILTIN, atom, arguments, dict(arguments))
+
+
+class InternedInferenceEngine(SWRLInferenceEngine):
+    """
+    基于整数ID与绑定数组的推理引擎，接口与 SWRLInferenceEngine 一致（分层、半朴素、连接顺序规划均沿用）
+    """
+
+    def __init__(self, rules: List[SWRLRule], optimize_joins: bool = True, verbosity: int = TRACE_OFF):
+        super().__init__(rules, optimize_joins, verbosity)
+        self.kb = InternedKnowledgeBase()
+        self.planner.kb = self.kb
+        self._compiled: Dict[int, CompiledRule] = {}
+
+    def compile_rule(self, rule: SWRLRule) -> CompiledRule:
+        """按当前连接计划编译规则（计划不变时复用）"""
+        body = self.planner.plan(rule) if self.optimize_joins else rule.body
+        compiled = self._compiled.get(id(rule))
+        if compiled is None or compiled.body is not body:
+            compiled = self._compiled[id(rule)] = CompiledRule(rule, body, self.kb.symbols)
+        return compiled
+
+    def _join(self, ops: tuple, index: int, binding: list, results: list):
+        """在绑定数组上深度优先匹配第 index 个及之后的操作"""
+        if index == len(ops):
+            results.append(tuple(binding))
+            return
+        op = ops[index]
+        kind = op[0]
+        kb = self.kb
+        following = index + 1
+
+        if kind == CLASS:
+            members = kb.class_members(op[1])
+            term = op[2]
+            value = term if term >= 0 else binding[~term]
+            if value is not None:
+                if value in members:
+                    self._join(ops, following, binding, results)
+                return
+            slot = ~term
+            for individual in members:
+                binding[slot] = individual
+                self._join(ops, following, binding, results)
+            binding[slot] = None
+
+        elif kind == OBJECT:
+            _, prop, s_term, o_term = op
+            subject = s_term if s_term >= 0 else binding[~s_term]
+            obj = o_term if o_term >= 0 else binding[~o_term]
+            if subject is not None and obj is not None:
+                if obj in kb.objects_of(subject, prop):
+                    self._join(ops, following, binding, results)
+            elif subject is not None:
+                slot = ~o_term
+                for obj in kb.objects_of(subject, prop):
+                    binding[slot] = obj
+                    self._join(ops, following, binding, results)
+                binding[slot] = None
+            elif obj is not None:
+                slot = ~s_term
+                for subject in kb.subjects_of(prop, obj):
+                    binding[slot] = subject
+                    self._join(ops, following, binding, results)
+                binding[slot] = None
+            elif s_term == o_term:
+                slot = ~s_term
+                for subject in kb.subjects_of(prop):
+                    if subject in kb.objects_of(subject, prop):
+                        binding[slot] = subject
+                        self._join(ops, following, binding, results)
+                binding[slot] = None
+            else:
+                s_slot, o_slot = ~s_term, ~o_term
+                for subject in kb.subjects_of(prop):
+                    binding[s_slot] = subject
+                    for obj in kb.objects_of(subject, prop):
+                        binding[o_slot] = obj
+                        self._join(ops, following, binding, results)
+                binding[s_slot] = binding[o_slot] = None
+
+        elif kind == DATA:
+            _, prop, s_term, value, value_is_slot = op
+            subject = s_term if s_term >= 0 else binding[~s_term]
+            subjects = (subject,) if subject is not None else kb.data_subjects(prop)
+            s_slot = None if subject is not None else ~s_term
+            for subj in subjects:
+                stored = kb.data_of(subj).get(prop)
+                if stored is None:
+                    continue
+                if s_slot is not None:
+                    binding[s_slot] = subj
+                if not value_is_slot:
+                    if stored == value:
+                        self._join(ops, following, binding, results)
+                elif binding[value] is None:
+                    # 取值变量未绑定：绑定为存储的属性值
+                    binding[value] = stored
+                    self._join(ops, following, binding, results)
+                    binding[value] = None
+                elif binding[value] == stored:
+                    self._join(ops, following, binding, results)
+            if s_slot is not None:
+                binding[s_slot] = None
+
+        else:
+            _, atom, arguments, slot_of = op
+            local = {var: binding[slot] for var, slot in arguments if binding[slot] is not None}
+            result = self.execute_builtin(atom, local)
+            if result is None:
+                return
+            # 与 SWRLInferenceEngine 一致：内置函数的结果覆盖已有绑定
+            saved = [(slot_of[var], binding[slot_of[var]]) for var in result]
+            for var, value in result.items():
+                binding[slot_of[var]] = value
+            self._join(ops, following, binding, results)
+            for slot, value in saved:
+                binding[slot] = value
+
+    def apply_rule(self, rule: SWRLRule) -> bool:
+        """应用单个规则"""
+        compiled = self.compile_rule(rule)
+        matches: List[tuple] = []
+        self._join(compiled.ops, 0, [None] * len(compiled.slots), matches)
+
+        kb = self.kb
+        names = kb.symbols.names
+        applied = False
+        trace = self._trace
+        for binding in matches:
+            for head in compiled.heads:
+                s_term = head[2]
+                subject = s_term if s_term >= 0 else binding[~s_term]
+                if subject is None:
+                    continue
+                if head[0] == DATA:
+                    _, prop, _, value, value_is_slot = head
+                    if value_is_slot:
+                        value = binding[value]
+                    if value is None:
+                        continue
+                    if kb.data_of(subject).get(prop) != value:
+                        kb.add_data_property_fact_id(subject, prop, value)
+                        self.delta.append((names[subject], names[prop], value))
+                        applied = True
+                        if trace is not None:
+                            trace.record(("data", names[prop], (names[subject], value)), rule,
+                                         compiled.decode_binding(binding, names))
+                else:
+                    _, prop, _, o_term = head
+                    obj = o_term if o_term >= 0 else binding[~o_term]
+                    if obj is not None and kb.add_object_property_fact_id(subject, prop, obj):
+                        self.delta.append((names[subject], names[prop], names[obj]))
+                        applied = True
+                        if trace is not None:
+                            trace.record(("object", names[prop], (names[subject], names[obj])), rule,
+                                         compiled.decode_binding(binding, names))
+        return applied
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SWRL并行推理
+知识库中的隧道个体互不共享事实（每个隧道有自己的 :t / :gc），
+因此可以按个体的连通分量切分知识库，把紧凑的事实批次交给 ProcessPoolExecutor，
+每个工作进程用自己的推理引擎（规则网络）推理，最后把推出的事实合并回主知识库。
+批量接口的输入记录天然互相独立，parallel_infer_batch 直接切分记录，省去主进程建库和合并。
+"""
+
+import contextlib
+import gc
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+from swrl_reasoner import (
+    ClassAtom, ObjectPropertyAtom, DataPropertyAtom, SWRLRule, KnowledgeBase, SWRLInferenceEngine,
+)
+from swrl_batch import iter_records, inferred_properties, infer_batch, record_tunnel_ids
+
+
+# 紧凑事实批次：(类事实 [(个体, 类)], 对象属性事实 [(主语, 属性, 宾语)], 数据属性事实 [(主语, 属性, 值)])
+FactBatch = Tuple[List[Tuple[str, str]], List[Tuple[str, str, str]], List[Tuple[str, str, Any]]]
+
+
+def heads_stay_on_subjects(rules: List[SWRLRule]) -> bool:
+    """
+    规则头的主语是否总出现在规则体的主语位置（类原子个体、属性原子主语）
+
+    成立时，只以宾语身份出现、自身没有任何事实的个体（如 RockGrade_I、WaterRich）
+    永远不会成为推理结果的主语，可以视为词汇常量，不参与连通分量的合并。
+    """
+    for rule in rules:
+        subjects = set()
+        for atom in rule.body:
+            if isinstance(atom, ClassAtom):
+                subjects.add(atom.individual)
+            elif isinstance(atom, (ObjectPropertyAtom, DataPropertyAtom)):
+                subjects.add(atom.subject)
+        for atom in rule.head:
+            if isinstance(atom, ClassAtom):
+                term = atom.individual
+            elif isinstance(atom, (ObjectPropertyAtom, DataPropertyAtom)):
+                term = atom.subject
+            else:
+                continue
+            if term.startswith(':') and term not in subjects:
+                return False
+    return True
+
+
+def _fact_views(kb: KnowledgeBase) -> Tuple[Dict, Dict, Dict]:
+    """一次性取出知识库的三类事实视图（InternedKnowledgeBase 每次访问都会解码出新的副本）"""
+    return kb.class_facts, kb.object_property_facts, kb.data_property_facts
+
+
+def connected_components(kb: KnowledgeBase, link_constants: bool = False,
+                         views: Optional[Tuple[Dict, Dict, Dict]] = None) -> List[List[str]]:
+    """
+    按对象属性事实把个体划分为连通分量（并查集）
+
+    Args:
+        kb: 知识库
+        link_constants: 为 False 时，自身没有任何事实的宾语视为词汇常量，不连接分量
+        views: 已取出的事实视图，省略时从 kb 读取
+
+    Returns:
+        分量列表，每个分量是拥有事实的个体名列表
+    """
+    class_facts, object_facts, data_facts = views or _fact_views(kb)
+
+    parent: Dict[str, str] = {}
+    for individual in class_facts:
+        parent[individual] = individual
+    for subject, _ in object_facts:
+        parent[subject] = subject
+    for subject in data_facts:
+        parent[subject] = subject
+
+    def find(node: str) -> str:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for (subject, _), objects in object_facts.items():
+        for obj in objects:
+            if obj not in parent:
+                if not link_constants:
+                    continue
+                parent[obj] = obj
+            root_s, root_o = find(subject), find(obj)
+            if root_s != root_o:
+                parent[root_o] = root_s
+
+    components: Dict[str, List[str]] = {}
+    for node in parent:
+        components.setdefault(find(node), []).append(node)
+    return list(components.values())
+
+
+def partition_facts(kb: KnowledgeBase, components: List[List[str]], partitions: int,
+                    views: Optional[Tuple[Dict, Dict, Dict]] = None) -> List[FactBatch]:
+    """把连通分量按事实数均衡地装入 partitions 个事实批次（最大分量优先装入当前最小的批次）"""
+    class_facts, object_facts, data_facts = views or _fact_views(kb)
+
+    objects_by_subject: Dict[str, List[Tuple[str, str, str]]] = {}
+    for (subject, prop), objects in object_facts.items():
+        objects_by_subject.setdefault(subject, []).extend((subject, prop, obj) for obj in objects)
+
+    batches: List[FactBatch] = [([], [], []) for _ in range(max(1, partitions))]
+    sizes = [0] * len(batches)
+    for component in sorted(components, key=len, reverse=True):
+        target = sizes.index(min(sizes))
+        classes, objects, data = batches[target]
+        for individual in component:
+            classes.extend((individual, class_name) for class_name in class_facts.get(individual, ()))
+            objects.extend(objects_by_subject.get(individual, ()))
+            data.extend((individual, prop, value) for prop, value in data_facts.get(individual, {}).items())
+        sizes[target] = len(classes) + len(objects) + len(data)
+    return [batch for batch, size in zip(batches, sizes) if size]
+
+
+# 工作进程状态：规则与引擎类只在进程初始化时传输一次
+_worker_rules: Optional[List[SWRLRule]] = None
+_worker_engine_class: Any = None
+
+
+def _init_worker(rules: List[SWRLRule], engine_class: Any):
+    global _worker_rules, _worker_engine_class
+    # fork 启动时子进程继承父进程的全部对象；冻结它们，避免垃圾回收反复遍历并触发写时复制
+    gc.freeze()
+    _worker_rules = rules
+    _worker_engine_class = engine_class
+
+
+def _infer_partition(batch: FactBatch, chain_options: Dict[str, Any]) -> FactBatch:
+    """在工作进程中推理一个事实批次，只返回新推出（或改变）的事实"""
+    return infer_facts(_worker_rules, batch, _worker_engine_class, **chain_options)
+
+
+def _infer_records(records: List[Dict[str, Any]], chain_options: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """在工作进程中对一段参数记录运行批量推理，返回按列的结果"""
+    return infer_batch(_worker_rules, records, _worker_engine_class, **chain_options)
+
+
+def infer_facts(rules: List[SWRLRule], batch: FactBatch, engine_class: Any = SWRLInferenceEngine,
+                **chain_options) -> FactBatch:
+    """用新的推理引擎推理一个事实批次，返回输入中没有的事实"""
+    classes, objects, data = batch
+    engine = engine_class(rules)
+    kb = engine.kb
+    for individual, class_name in classes:
+        kb.add_class_fact(individual, class_name)
+    for subject, prop, obj in objects:
+        kb.add_object_property_fact(subject, prop, obj)
+    for subject, prop, value in data:
+        kb.add_data_property_fact(subject, prop, value)
+
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        engine.forward_chain(**chain_options)
+
+    known_classes, known_objects, known_data = set(classes), set(objects), set(data)
+    derived_classes = [(individual, class_name) for individual, names in kb.class_facts.items()
+                       for class_name in names if (individual, class_name) not in known_classes]
+    derived_objects = [(subject, prop, obj) for (subject, prop), values in kb.object_property_facts.items()
+                       for obj in values if (subject, prop, obj) not in known_objects]
+    derived_data = [(subject, prop, value) for subject, values in kb.data_property_facts.items()
+                    for prop, value in values.items() if (subject, prop, value) not in known_data]
+    return derived_classes, derived_objects, derived_data
+
+
+def parallel_forward_chain(engine: SWRLInferenceEngine, workers: Optional[int] = None,
+                           partitions_per_worker: int = 4, engine_class: Any = None,
+                           **chain_options) -> Dict[str, int]:
+    """
+    并行前向链推理：按连通分量切分 engine.kb，分批交给进程池推理，再合并回 engine.kb
+
+    各分量之间不共享事实，因此结果与在整个知识库上运行 engine.forward_chain 一致
+    （数据属性冲突仍按“规则列表中靠后的规则生效”在分量内决定）。
+    溯源日志与 Rete 真值维护状态只存在于工作进程中，不会合并回主引擎。
+
+    Args:
+        engine: 已加载事实的推理引擎
+        workers: 进程数，默认 os.cpu_count()
+        partitions_per_worker: 每个进程分到的批次数，用于平衡负载
+        engine_class: 工作进程使用的引擎类（可为 functools.partial），默认与 engine 相同
+        chain_options: 透传给 forward_chain 的参数
+
+    Returns:
+        统计信息：分量数、批次数、进程数、合并的事实数
+    """
+    workers = workers or os.cpu_count() or 1
+    kb = engine.kb
+    views = _fact_views(kb)
+    components = connected_components(kb, not heads_stay_on_subjects(engine.rules), views)
+    batches = partition_facts(kb, components, workers * partitions_per_worker, views)
+    del views
+
+    merged = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(engine.rules, engine_class or type(engine))) as pool:
+        futures = [pool.submit(_infer_partition, batch, chain_options) for batch in batches]
+        for future in futures:
+            classes, objects, data = future.result()
+            for individual, class_name in classes:
+                kb.add_class_fact(individual, class_name)
+            for subject, prop, obj in objects:
+                kb.add_object_property_fact(subject, prop, obj)
+            for subject, prop, value in data:
+                kb.add_data_property_fact(subject, prop, value)
+            merged += len(classes) + len(objects) + len(data)
+
+    return {"components": len(components), "partitions": len(batches), "workers": workers, "merged_facts": merged}
+
+
+def parallel_infer_batch(rules: List[SWRLRule], table: Any, workers: Optional[int] = None,
+                         engine_class: Any = SWRLInferenceEngine, partitions_per_worker: int = 4,
+                         **chain_options) -> Dict[str, List[Any]]:
+    """
+    多进程批量推理：按 add_tunnel_individual 的建模方式，每条参数记录本身就是一个连通分量，
+    因此直接切分输入记录，由工作进程各自建库、推理并按列返回，主进程只拼接结果列
+
+    参数与返回值同 swrl_batch.infer_batch（不含 quiet / as_dataframe）
+    """
+    workers = workers or os.cpu_count() or 1
+    records = list(iter_records(table))
+    # 在切分前按全局序号命名（与 load_records 一致），默认名不会与其它分块中记录自带的名字重复
+    records = [record if record.get("tunnel_id") else {**record, "tunnel_id": tunnel_id}
+               for record, tunnel_id in zip(records, record_tunnel_ids(records))]
+
+    columns: Dict[str, List[Any]] = {"tunnel_id": []}
+    for prop in inferred_properties(rules):
+        columns[prop] = []
+    if not records:
+        return columns  # 与串行路径一致：没有记录时返回空列，不启动进程池
+
+    partitions = max(1, min(len(records), workers * partitions_per_worker))
+    size = -(-len(records) // partitions)
+    chunks = [records[start:start + size] for start in range(0, len(records), size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(rules, engine_class)) as pool:
+        for part in pool.map(_infer_records, chunks, [chain_options] * len(chunks)):
+            for key, values in part.items():
+                columns[key].extend(values)
+    return columns
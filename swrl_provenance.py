@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SWRL推理溯源日志
+推理引擎每推出一个事实，记录一条紧凑的 (事实ID, 规则ID, 绑定ID) 记录；
+事实和绑定各自去重存放，记录本身保存在三个整数数组中。
+关闭溯源时引擎不创建任何记录，推理路径上只剩一次 None 判断。
+"""
+
+from array import array
+from typing import Dict, List, Any, Optional, Tuple
+
+# 溯源级别
+TRACE_OFF = 0     # 不记录
+TRACE_RECORD = 1  # 记录溯源，不输出
+TRACE_PRINT = 2   # 记录溯源，并逐条输出推出的事实
+
+RETRACTED = -1  # 规则ID为 -1 的记录表示事实被撤销
+
+# 事实统一表示为 (类型, 谓词, 项元组)，类型为 "class" / "object" / "data"
+Fact = Tuple[str, str, tuple]
+Binding = Tuple[Tuple[str, Any], ...]
+
+
+def describe_fact(fact: Fact) -> str:
+    """把事实格式化为与原控制台输出一致的文本"""
+    kind, predicate, terms = fact
+    if kind == "data":
+        return f"{terms[0]} {predicate} = {terms[1]}"
+    if kind == "object":
+        return f"{terms[0]} {predicate} {terms[1]}"
+    return f"{terms[0]} 属于 {predicate}"
+
+
+class ProvenanceLog:
+    """推理溯源日志"""
+
+    def __init__(self, rules: List[Any], verbosity: int = TRACE_RECORD):
+        self.rules = rules
+        self.verbosity = verbosity
+        self._rule_ids: Dict[int, int] = {id(rule): index for index, rule in enumerate(rules)}
+        self.facts: List[Fact] = []  # 事实ID → 事实
+        self._fact_ids: Dict[Fact, int] = {}
+        self._positions: List[array] = []  # 事实ID → 最近一次撤销之后推出该事实的记录位置
+        self.bindings: List[Binding] = []  # 绑定ID → ((变量, 值), ...)
+        self._binding_ids: Dict[Binding, int] = {}
+        self.fact_column = array("l")
+        self.rule_column = array("l")
+        self.binding_column = array("l")
+
+    def __len__(self) -> int:
+        return len(self.fact_column)
+
+    def _intern_fact(self, fact: Fact) -> int:
+        fact_id = self._fact_ids.get(fact)
+        if fact_id is None:
+            fact_id = self._fact_ids[fact] = len(self.facts)
+            self.facts.append(fact)
+            self._positions.append(array("l"))
+        return fact_id
+
+    def _intern_binding(self, binding: Binding) -> int:
+        binding_id = self._binding_ids.get(binding)
+        if binding_id is None:
+            binding_id = self._binding_ids[binding] = len(self.bindings)
+            self.bindings.append(binding)
+        return binding_id
+
+    def record(self, fact: Fact, rule: Any, binding: Binding, rule_index: Optional[int] = None):
+        """记录规则 rule 在绑定 binding 下推出了 fact"""
+        if rule_index is None:
+            rule_index = self._rule_ids[id(rule)]
+        fact_id = self._intern_fact(fact)
+        self._positions[fact_id].append(len(self.fact_column))
+        self.fact_column.append(fact_id)
+        self.rule_column.append(rule_index)
+        self.binding_column.append(self._intern_binding(binding))
+        if self.verbosity >= TRACE_PRINT:
+            print(f"应用规则 {self.rules[rule_index].label}: {describe_fact(fact)}")
+
+    def record_retraction(self, fact: Fact):
+        """记录推理结果被撤销（真值维护）"""
+        fact_id = self._intern_fact(fact)
+        self._positions[fact_id] = array("l")
+        self.fact_column.append(fact_id)
+        self.rule_column.append(RETRACTED)
+        self.binding_column.append(RETRACTED)
+        if self.verbosity >= TRACE_PRINT:
+            print(f"撤销推理结果: {describe_fact(fact)}")
+
+    def derivations(self, fact: Fact) -> List[Tuple[int, Binding]]:
+        """fact 最近一次撤销之后的全部推导：[(规则序号, 绑定), ...]（按事实索引查找，不扫描日志）"""
+        fact_id = self._fact_ids.get(fact)
+        if fact_id is None:
+            return []
+        return [(self.rule_column[index], self.bindings[self.binding_column[index]])
+                for index in self._positions[fact_id]]
+
+    def premises(self, rule_index: int, binding: Binding) -> List[Any]:
+        """用绑定实例化规则体：事实原子返回 Fact，内置原子返回说明文本"""
+        # swrl_reasoner 在模块加载时导入本模块，这里延迟导入原子类型以避免循环导入
+        from swrl_reasoner import ClassAtom, ObjectPropertyAtom, DataPropertyAtom
+
+        values = dict(binding)
+        resolve = lambda term: values.get(term, term)
+        premises: List[Any] = []
+        for atom in self.rules[rule_index].body:
+            if isinstance(atom, ClassAtom):
+                premises.append(("class", atom.class_name, (resolve(atom.individual),)))
+            elif isinstance(atom, ObjectPropertyAtom):
+                premises.append(("object", atom.property_name, (resolve(atom.subject), resolve(atom.object))))
+            elif isinstance(atom, DataPropertyAtom):
+                premises.append(("data", atom.property_name, (resolve(atom.subject), resolve(atom.value))))
+            else:
+                arguments = ", ".join(str(resolve(var)) for var in atom.variables)
+                premises.append(f"{atom.function_name}({arguments})")
+        return premises
+
+    def explain(self, fact: Fact, max_depth: int = 8) -> Dict[str, Any]:
+        """
+        解释事实的来源
+
+        Returns:
+            {"fact", "derived", "derivations": [{"rule", "bindings", "premises": [子解释或内置检查]}]}；
+            没有推导记录的事实视为输入事实（derived 为 False）
+        """
+        return self._explain(fact, max_depth, set())
+
+    def _explain(self, fact: Fact, depth: int, visiting: set) -> Dict[str, Any]:
+        derivations = self.derivations(fact) if depth > 0 and fact not in visiting else []
+        node: Dict[str, Any] = {"fact": fact, "derived": bool(derivations), "derivations": []}
+        visiting.add(fact)
+        for rule_index, binding in derivations:
+            premises = [self._explain(p, depth - 1, visiting) if isinstance(p, tuple) else p
+                        for p in self.premises(rule_index, binding)]
+            node["derivations"].append({
+                "rule": self.rules[rule_index].label,
+                "bindings": dict(binding),
+                "premises": premises,
+            })
+        visiting.discard(fact)
+        return node
+
+    @staticmethod
+    def format_explanation(node: Dict[str, Any], indent: int = 0) -> str:
+        """把 explain 的结果格式化为缩进文本"""
+        pad = "  " * indent
+        if not node["derived"]:
+            return f"{pad}{describe_fact(node['fact'])}  [输入事实]"
+        lines = [f"{pad}{describe_fact(node['fact'])}"]
+        for derivation in node["derivations"]:
+            lines.append(f"{pad}  ← {derivation['rule']}")
+            for premise in derivation["premises"]:
+                if isinstance(premise, dict):
+                    lines.append(ProvenanceLog.format_explanation(premise, indent + 2))
+                else:
+                    lines.append(f"{pad}    {premise}  [内置检查]")
+        return "\n".join(lines)
+
+    def statistics(self) -> Dict[str, int]:
+        """日志规模：记录数、去重后的事实数与绑定数"""
+        return {"records": len(self), "facts": len(self.facts), "bindings": len(self.bindings)}
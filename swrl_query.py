@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推理结果的合取查询
+查询是一组原子的合取（类似 SPARQL 的基本图模式），外加数值过滤，写法与 SWRL 规则体一致：
+
+    TunnelProject(?t) ^ hasHydroCondition(?t, WaterRich) ^ hasLiningThickness(?t, ?x) ^ ?x >= 35
+
+过滤既可以写成比较运算（?x >= 35），也可以写成内置函数（swrlb:greaterThanOrEqual(?x, 35)），
+赋值型内置函数（swrlb:multiply(?y, ?x, 2)）可用来计算派生列。
+查询原子由 JoinPlanner 按知识库索引规模排序，再用推理引擎的 match_atom（从索引惰性产出候选）深度优先匹配，
+结果以生成器逐条产出。
+"""
+
+import re
+from typing import Dict, List, Any, Iterator, Optional, Union
+
+from swrl_reasoner import (
+    Atom, ClassAtom, ObjectPropertyAtom, DataPropertyAtom, BuiltInAtom, KnowledgeBase, SWRLInferenceEngine,
+)
+from swrl_builtins import BUILTINS, parse_literal
+
+
+# 比较运算 → 内置函数
+COMPARISON_OPERATORS = {
+    ">=": "greaterThanOrEqual",
+    ">": "greaterThan",
+    "<=": "lessThanOrEqual",
+    "<": "lessThan",
+    "==": "equal",
+    "=": "equal",
+    "!=": "notEqual",
+}
+
+ATOM_PATTERN = re.compile(r'^([\w:.-]+)\s*\((.*)\)$')
+FILTER_PATTERN = re.compile(r'^([^\s<>=!]+)\s*(>=|<=|!=|==|=|>|<)\s*(\S+)$')
+
+
+class QuerySyntaxError(ValueError):
+    """查询文本无法解析"""
+
+
+def _term(text: str) -> str:
+    """'?t' → ':t'（引擎内部的变量写法），其余项原样保留"""
+    text = text.strip()
+    return ':' + text[1:] if text.startswith('?') else text
+
+
+def _literal(text: str) -> Any:
+    """数据属性取值：变量、带引号的字符串或数值"""
+    text = text.strip()
+    if text.startswith('?'):
+        return _term(text)
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    return parse_literal(text)
+
+
+def _is_literal(text: str) -> bool:
+    text = text.strip()
+    return text[:1] in "\"'" or not isinstance(parse_literal(text), str)
+
+
+def parse_query(text: str, kb: Optional[KnowledgeBase] = None) -> List[Atom]:
+    """
+    把查询文本解析为原子列表
+
+    原子之间用 '^' 连接。二元谓词在第二个参数为字面量、或知识库中该属性是数据属性时解析为数据属性原子，
+    否则解析为对象属性原子；名称（可带 swrlb: 前缀）已在内置函数注册表中时解析为内置原子。
+    """
+    atoms: List[Atom] = []
+    for part in filter(None, (piece.strip() for piece in text.split('^'))):
+        comparison = FILTER_PATTERN.match(part)
+        if comparison and '(' not in part:
+            left, operator, right = comparison.groups()
+            atoms.append(BuiltInAtom(COMPARISON_OPERATORS[operator], [_term(left), _term(right)]))
+            continue
+
+        match = ATOM_PATTERN.match(part)
+        if not match:
+            raise QuerySyntaxError(f"无法解析查询原子: {part}")
+        name, arguments = match.group(1), [arg.strip() for arg in match.group(2).split(',')]
+        local_name = name.split(':', 1)[-1]
+        if local_name in BUILTINS:
+            atoms.append(BuiltInAtom(local_name, [_term(arg) for arg in arguments]))
+        elif len(arguments) == 1:
+            atoms.append(ClassAtom(name, _term(arguments[0])))
+        elif len(arguments) == 2:
+            subject, value = arguments
+            is_data = _is_literal(value) or (kb is not None and kb.count_data_property_subjects(name) > 0)
+            if is_data:
+                atoms.append(DataPropertyAtom(name, _term(subject), _literal(value)))
+            else:
+                atoms.append(ObjectPropertyAtom(name, _term(subject), _term(value)))
+        else:
+            raise QuerySyntaxError(f"谓词 {name} 的参数个数不正确: {part}")
+    return atoms
+
+
+def run_query(engine: SWRLInferenceEngine, pattern: Union[str, List[Atom]], select: Optional[List[str]] = None,
+              distinct: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    执行合取查询，逐条产出结果
+
+    Args:
+        engine: 已完成推理的引擎（使用其知识库索引与原子匹配）
+        pattern: 查询文本或原子列表
+        select: 输出的变量名（不带 '?'），默认输出全部变量
+        distinct: 为 True 时去掉重复结果（需要记住已产出的结果）
+
+    Yields:
+        {变量名: 值}，变量名不带 '?' 前缀
+    """
+    atoms = parse_query(pattern, engine.kb) if isinstance(pattern, str) else list(pattern)
+    plan = engine.planner.order(atoms)
+    keys = [':' + name.lstrip('?:') for name in select] if select else None
+    seen = set() if distinct else None
+
+    for bindings in engine.iter_matches(plan):
+        if keys is None:
+            row = {var[1:]: value for var, value in bindings.items()}
+        else:
+            row = {key[1:]: bindings.get(key) for key in keys}
+        if seen is not None:
+            signature = tuple(row.items())
+            if signature in seen:
+                continue
+            seen.add(signature)
+        yield row
@@ -7,10 +7,20 @@ SWRL规则推理引擎
 
 import re
 import math
-from typing import Dict, List, Set, Any, Optional, Tuple
-from dataclasses import dataclass
+import os
+import pickle
+import hashlib
+import contextlib
+import itertools
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Set, Any, Optional, Tuple, Iterable, Iterator
+from urllib.parse import urljoin
+from dataclasses import dataclass, field, fields
 from collections import defaultdict
 
+from swrl_provenance import ProvenanceLog, TRACE_OFF, TRACE_PRINT
+from swrl_builtins import BUILTINS, parse_literal
+
 
 @dataclass
 class Atom:
@@ -46,6 +56,12 @@ class BuiltInAtom(Atom):
     """内置原子：数学运算等"""
     function_name: str
     variables: List[str]
+    # 预解析的参数：((变量名, None) 或 (None, 字面量值), ...)，加载规则时计算一次
+    arguments: tuple = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.arguments = tuple((var, None) if var.startswith(':') else (None, parse_literal(var))
+                               for var in self.variables)
 
 
 @dataclass
@@ -58,18 +74,81 @@ class SWRLRule:
     head: List[Atom]
 
 
+# 原子类型名 → 类；规则缓存按类型名保存原子，加载时用当前模块的类重建
+ATOM_TYPES = {cls.__name__: cls for cls in (ClassAtom, ObjectPropertyAtom, DataPropertyAtom, BuiltInAtom)}
+
+
+def rule_to_record(rule: SWRLRule) -> tuple:
+    """
+    把规则转换为只含内置类型的元组：(规则ID, 标签, 注释, 规则体, 规则头)，原子为 (类型名, 字段...)
+
+    缓存不直接 pickle 原子对象：以脚本运行（__main__）与被导入（swrl_reasoner）时原子类的模块路径不同，
+    pickle 中的类在另一种运行方式下会是另一份类，isinstance 判断全部失败
+    """
+    def to_record(atom: Atom) -> tuple:
+        values = tuple(getattr(atom, f.name) for f in fields(atom) if f.init)
+        return (type(atom).__name__,) + tuple(tuple(v) if isinstance(v, list) else v for v in values)
+
+    return (rule.rule_id, rule.label, rule.comment,
+            tuple(to_record(atom) for atom in rule.body), tuple(to_record(atom) for atom in rule.head))
+
+
+def rule_from_record(record: tuple) -> SWRLRule:
+    """由 rule_to_record 的结果用本模块的原子类重建规则"""
+    def from_record(atom: tuple) -> Atom:
+        kind, *values = atom
+        if kind == "BuiltInAtom":
+            return BuiltInAtom(values[0], list(values[1]))
+        return ATOM_TYPES[kind](*values)
+
+    rule_id, label, comment, body, head = record
+    return SWRLRule(rule_id, label, comment, [from_record(atom) for atom in body], [from_record(atom) for atom in head])
+
+
+def atom_predicates(atoms: List[Atom]) -> Set[str]:
+    """原子列表中引用的谓词（类名和属性名），内置原子不计入"""
+    predicates = set()
+    for atom in atoms:
+        if isinstance(atom, ClassAtom):
+            predicates.add(atom.class_name)
+        elif isinstance(atom, (ObjectPropertyAtom, DataPropertyAtom)):
+            predicates.add(atom.property_name)
+    return predicates
+
+
 class SWRLParser:
     """SWRL规则解析器"""
-    
-    def __init__(self, file_path: str):
+
+    # 解析逻辑或规则数据结构变化时递增，使旧的缓存文件失效
+    CACHE_VERSION = 3
+    CACHE_TAG = "swrl"
+
+    def __init__(self, file_path: str, use_cache: bool = True, cache_path: Optional[str] = None):
         self.file_path = file_path
         self.rules = []
-        
+        self.use_cache = use_cache
+        self.cache_path = cache_path or self.default_cache_path(file_path)
+        self.cache_hit = False
+
+    @classmethod
+    def default_cache_path(cls, file_path: str) -> str:
+        """缓存文件放在规则文件同目录的 __pycache__ 下，与字节码缓存一样不纳入版本控制"""
+        directory, name = os.path.split(os.path.abspath(file_path))
+        return os.path.join(directory, "__pycache__", f"{name}.{cls.CACHE_TAG}-{cls.CACHE_VERSION}.pickle")
+
     def parse_file(self) -> List[SWRLRule]:
-        """解析SWRL规则文件"""
+        """解析SWRL规则文件；缓存有效时直接加载已解析的规则"""
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            stat = os.stat(self.file_path)
+            if self.use_cache:
+                cached = self._load_cache(stat)
+                if cached is not None:
+                    self.rules = cached
+                    self.cache_hit = True
+                    return self.rules
+            with open(self.file_path, 'rb') as f:
+                raw = f.read()
+            content = raw.decode('utf-8')
         except FileNotFoundError:
             print(f"错误：找不到文件 {self.file_path}")
             print("请确保 pure_swrl_rules.txt 文件在正确的路径下")
@@ -77,16 +156,77 @@ class SWRLParser:
         except Exception as e:
             print(f"读取文件时出错: {e}")
             return []
-            
+
+        digest = hashlib.sha256(raw).hexdigest()
+        if self.use_cache:
+            # mtime 变化但内容未变（如重新检出）时仍可复用缓存
+            cached = self._load_cache(stat, digest)
+            if cached is not None:
+                self.rules = cached
+                self.cache_hit = True
+                self._save_cache(stat, digest)
+                return self.rules
+
+        self.rules = self._parse_content(content)
+
+        if self.use_cache:
+            self._save_cache(stat, digest)
+
+        return self.rules
+
+    def _parse_content(self, content: str) -> List[SWRLRule]:
+        """解析规则文件的全部文本"""
+        rules = []
         # 分割规则
         rule_sections = content.split('规则 ')[1:]  # 跳过开头部分
         
         for section in rule_sections:
             rule = self._parse_rule_section(section)
             if rule:
-                self.rules.append(rule)
-                
-        return self.rules
+                rules.append(rule)
+        return rules
+
+    def _load_cache(self, stat: os.stat_result, digest: Optional[str] = None) -> Optional[List[SWRLRule]]:
+        """
+        读取缓存；未给出 digest 时按 (mtime, 大小) 快速判断，否则按内容哈希判断
+        缓存缺失、损坏或过期时返回 None
+        """
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cache = pickle.load(f)
+        except Exception:
+            return None
+        if not isinstance(cache, dict) or cache.get("version") != self.CACHE_VERSION:
+            return None
+        if digest is None:
+            fresh = cache.get("mtime_ns") == stat.st_mtime_ns and cache.get("size") == stat.st_size
+        else:
+            fresh = cache.get("sha256") == digest
+        if not fresh:
+            return None
+        try:
+            return [rule_from_record(record) for record in cache.get("rules", ())]
+        except Exception:
+            return None
+
+    def _save_cache(self, stat: os.stat_result, digest: str):
+        """写入缓存；先写临时文件再替换，目录不可写时静默跳过"""
+        cache = {
+            "version": self.CACHE_VERSION,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "rules": [rule_to_record(rule) for rule in self.rules],
+        }
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
     
     def _parse_rule_section(self, section: str) -> Optional[SWRLRule]:
         """解析单个规则段落"""
@@ -119,6 +259,8 @@ class SWRLParser:
             print(f"解析规则时出错: {e}")
             return None
     
+    _literal_value = staticmethod(parse_literal)  # 字面量文本 → 数值；无法转换时保持字符串
+
     def _parse_atoms(self, atoms_text: str) -> List[Atom]:
         """解析原子列表"""
         atoms = []
@@ -134,19 +276,14 @@ class SWRLParser:
             obj = var_obj if var_obj else named_obj
             atoms.append(ObjectPropertyAtom(prop, subj, obj))
         
-        # 解析DataPropertyAtom
-        data_prop_pattern = r'<DataPropertyAtom>\s*<DataProperty IRI="([^"]+)"/>\s*<Variable abbreviatedIRI="([^"]+)"/>\s*<Literal[^>]*>([^<]+)</Literal>\s*</DataPropertyAtom>'
+        # 解析DataPropertyAtom（取值可以是字面量，也可以是变量）
+        data_prop_pattern = r'<DataPropertyAtom>\s*<DataProperty IRI="([^"]+)"/>\s*<Variable abbreviatedIRI="([^"]+)"/>\s*(?:<Literal[^>]*>([^<]+)</Literal>|<Variable abbreviatedIRI="([^"]+)"/>)\s*</DataPropertyAtom>'
         data_prop_atoms = re.findall(data_prop_pattern, atoms_text)
-        for prop, subj, value in data_prop_atoms:
-            # 尝试转换数值
-            try:
-                if '.' in value:
-                    value = float(value)
-                else:
-                    value = int(value)
-            except ValueError:
-                pass  # 保持字符串
-            atoms.append(DataPropertyAtom(prop, subj, value))
+        for prop, subj, value, var_value in data_prop_atoms:
+            if var_value:
+                atoms.append(DataPropertyAtom(prop, subj, var_value))
+                continue
+            atoms.append(DataPropertyAtom(prop, subj, self._literal_value(value)))
         
         # 解析BuiltInAtom
         builtin_pattern = r'<BuiltInAtom IRI="[^"]*#([^"]+)">\s*((?:<Variable abbreviatedIRI="[^"]+"/>\s*|<Literal[^>]*>[^<]+</Literal>\s*)+)\s*</BuiltInAtom>'
@@ -160,6 +297,247 @@ class SWRLParser:
         return atoms
 
 
+# OWL/XML 与 RDF/XML 中SWRL规则使用的命名空间
+RDF_NS = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDFS_NS = "http://www.w3.org/2000/01/rdf-schema#"
+SWRL_NS = "http://www.w3.org/2003/11/swrl#"
+XML_BASE = "{http://www.w3.org/XML/1998/namespace}base"
+
+
+def _tag_name(tag: str) -> str:
+    """去掉 ElementTree 标签中的 {命名空间} 前缀"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _iri_name(iri: str) -> str:
+    """IRI 的局部名：'http://x/onto#RockGrade_I' → 'RockGrade_I'，':t' → 't'"""
+    return re.split(r'[#/:]', iri)[-1]
+
+
+class StreamingSWRLParser(SWRLParser):
+    """
+    流式SWRL规则解析器
+    基于 XMLPullParser 单遍读取 OWL/XML（DLSafeRule）、RDF/XML（swrl:Imp）以及
+    pure_swrl_rules.txt 形式的规则片段；每条规则产出后即释放其元素，内存占用与单条规则相当。
+    规则体/规则头中的原子、内置函数的参数均保持书写顺序。
+    """
+
+    CACHE_TAG = "swrl-stream"
+    CHUNK_SIZE = 64 * 1024
+    FRAGMENT_ROOT = "swrl-fragments"
+
+    def iter_rules(self) -> Iterator[SWRLRule]:
+        """逐条产出规则，不构建完整的规则列表"""
+        with open(self.file_path, 'rb') as f:
+            yield from self._iter_stream(iter(lambda: f.read(self.CHUNK_SIZE), b''))
+
+    def _parse_content(self, content: str) -> List[SWRLRule]:
+        """供 parse_file 使用（含磁盘缓存）"""
+        return list(self._iter_stream([content]))
+
+    def _iter_stream(self, chunks: Iterable[Any]) -> Iterator[SWRLRule]:
+        """从文本块或字节块序列中逐条解析规则"""
+        chunks = iter(chunks)
+        first = next(chunks, b'')
+        head = first.lstrip(b'\xef\xbb\xbf \t\r\n') if isinstance(first, bytes) else first.lstrip('\ufeff \t\r\n')
+        fragments = head[:1] not in ('<', b'<')
+        opening, closing = f"<{self.FRAGMENT_ROOT}>", f"</{self.FRAGMENT_ROOT}>"
+        if isinstance(first, bytes):
+            opening, closing = opening.encode(), closing.encode()
+
+        parser = ET.XMLPullParser(events=("start", "end"))
+        if fragments:
+            # 规则片段文件没有根元素，补一个合成根元素；"规则 N:" 标题成为根元素下的文本
+            parser.feed(opening)
+
+        stack: List[ET.Element] = []
+        mode = "fragments"
+        base = ""
+        variables: Set[str] = set()  # RDF/XML 中声明为 swrl:Variable 的 IRI
+        pending: Optional[Dict[str, Any]] = None  # 正在组装的规则
+        previous: Optional[ET.Element] = None  # 片段模式下根元素的上一个子元素（其 tail 含下一条规则的标题）
+        count = 0
+
+        for chunk in itertools.chain([first], chunks, [closing] if fragments else []):
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "start":
+                    if not stack:
+                        base = elem.get(XML_BASE, "")
+                        if not fragments:
+                            mode = "rdf" if elem.tag == f"{{{RDF_NS}}}RDF" else "owlxml"
+                    elif len(stack) == 1 and mode == "fragments":
+                        text = stack[0].text if previous is None else previous.tail
+                        headers = re.findall(r'规则\s+(\d+):', text or "")
+                        if headers:
+                            if pending is not None:
+                                yield self._build_rule(pending)
+                            pending = self._new_rule(headers[-1])
+                    stack.append(elem)
+                    continue
+
+                stack.pop()
+                if not stack:
+                    continue
+                parent = stack[-1]
+                top_level = len(stack) == 1
+
+                if mode == "rdf":
+                    if top_level:
+                        kind = self._rdf_kind(elem)
+                        if kind == "Variable":
+                            variables.add(urljoin(base, elem.get(f"{{{RDF_NS}}}about", "")))
+                        elif kind == "Imp":
+                            count += 1
+                            yield self._rdf_rule(elem, str(count), base, variables)
+                        parent.remove(elem)
+                elif _tag_name(elem.tag) == "DLSafeRule":
+                    count += 1
+                    rule = pending if pending is not None else self._new_rule(str(count))
+                    for part in elem:
+                        self._add_rule_part(rule, part)
+                    pending = None
+                    yield self._build_rule(rule)
+                    parent.remove(elem)
+                    if top_level:
+                        previous = elem
+                elif top_level:
+                    if mode == "fragments":
+                        if pending is not None:
+                            self._add_rule_part(pending, elem)
+                        previous = elem
+                    parent.remove(elem)
+
+        parser.close()
+        if pending is not None:
+            yield self._build_rule(pending)
+
+    @staticmethod
+    def _new_rule(rule_id: str) -> Dict[str, Any]:
+        return {"rule_id": rule_id, "label": None, "comment": "", "body": [], "head": []}
+
+    @staticmethod
+    def _build_rule(rule: Dict[str, Any]) -> SWRLRule:
+        label = rule["label"] if rule["label"] is not None else f"Rule_{rule['rule_id']}"
+        return SWRLRule(rule["rule_id"], label, rule["comment"], rule["body"], rule["head"])
+
+    def _add_rule_part(self, rule: Dict[str, Any], part: ET.Element):
+        """把 OWL/XML 的 Annotation / Body / Head 元素合并进正在组装的规则"""
+        kind = _tag_name(part.tag)
+        if kind == "Annotation":
+            prop, literal = None, ""
+            for child in part:
+                if _tag_name(child.tag) == "AnnotationProperty":
+                    prop = _iri_name(child.get("abbreviatedIRI") or child.get("IRI") or "")
+                elif _tag_name(child.tag) == "Literal":
+                    literal = child.text or ""
+            if prop in ("label", "comment"):
+                rule[prop] = literal
+        elif kind in ("Body", "Head"):
+            atoms = [self._owlxml_atom(child) for child in part]
+            rule[kind.lower()] = [atom for atom in atoms if atom is not None]
+
+    def _owlxml_atom(self, elem: ET.Element) -> Optional[Atom]:
+        """OWL/XML 原子元素 → Atom；不支持的原子返回 None"""
+        kind = _tag_name(elem.tag)
+        children = list(elem)
+        if kind == "BuiltInAtom":
+            return BuiltInAtom(elem.get("IRI", "").rsplit('#', 1)[-1],
+                               [self._owlxml_term(child) for child in children])
+        if not children:
+            return None
+        predicate = _iri_name(children[0].get("IRI") or children[0].get("abbreviatedIRI") or "")
+        terms = children[1:]
+        if kind == "ClassAtom" and len(terms) == 1:
+            return ClassAtom(predicate, self._owlxml_term(terms[0]))
+        if kind == "ObjectPropertyAtom" and len(terms) == 2:
+            return ObjectPropertyAtom(predicate, self._owlxml_term(terms[0]), self._owlxml_term(terms[1]))
+        if kind == "DataPropertyAtom" and len(terms) == 2:
+            value = terms[1]
+            if _tag_name(value.tag) == "Literal":
+                return DataPropertyAtom(predicate, self._owlxml_term(terms[0]), self._literal_value(value.text or ""))
+            return DataPropertyAtom(predicate, self._owlxml_term(terms[0]), self._owlxml_term(value))
+        return None
+
+    @staticmethod
+    def _owlxml_term(elem: ET.Element) -> str:
+        """变量 → ':名称'，命名个体 → 局部名，字面量 → 原始文本（与正则解析器的内置函数参数一致）"""
+        kind = _tag_name(elem.tag)
+        if kind == "Literal":
+            return elem.text or ""
+        iri = elem.get("abbreviatedIRI") or elem.get("IRI") or ""
+        if kind == "Variable":
+            return iri if iri.startswith(':') else f":{_iri_name(iri)}"
+        return _iri_name(iri)
+
+    @staticmethod
+    def _rdf_kind(node: ET.Element) -> str:
+        """RDF 节点的 SWRL 类型局部名（Imp、Variable、ClassAtom 等）"""
+        if node.tag != f"{{{RDF_NS}}}Description":
+            return _tag_name(node.tag)
+        for child in node:
+            resource = child.get(f"{{{RDF_NS}}}resource", "")
+            if child.tag == f"{{{RDF_NS}}}type" and resource.startswith(SWRL_NS):
+                return resource[len(SWRL_NS):]
+        return "Description"
+
+    def _rdf_rule(self, node: ET.Element, rule_id: str, base: str, variables: Set[str]) -> SWRLRule:
+        """swrl:Imp 节点 → SWRLRule"""
+        rule = self._new_rule(rule_id)
+        for child in node:
+            if child.tag == f"{{{RDFS_NS}}}label":
+                rule["label"] = child.text or ""
+            elif child.tag == f"{{{RDFS_NS}}}comment":
+                rule["comment"] = child.text or ""
+            elif child.tag in (f"{{{SWRL_NS}}}body", f"{{{SWRL_NS}}}head"):
+                atoms = [self._rdf_atom(item, base, variables) for item in self._rdf_list(child)]
+                rule[_tag_name(child.tag)] = [atom for atom in atoms if atom is not None]
+        return self._build_rule(rule)
+
+    @staticmethod
+    def _rdf_list(container: ET.Element) -> List[ET.Element]:
+        """展开 rdf:first / rdf:rest 链表（或 parseType="Collection"）为元素列表"""
+        if container.get(f"{{{RDF_NS}}}parseType") == "Collection":
+            return list(container)
+        items = []
+        node = container[0] if len(container) else None
+        while node is not None:
+            first = node.find(f"{{{RDF_NS}}}first")
+            if first is not None:
+                items.append(first[0] if len(first) else first)
+            rest = node.find(f"{{{RDF_NS}}}rest")
+            node = rest[0] if rest is not None and len(rest) else None
+        return items
+
+    @staticmethod
+    def _rdf_term(holder: ET.Element, base: str, variables: Set[str]) -> str:
+        """rdf:resource / rdf:about 引用 → 变量或个体名；无引用时返回字面量原始文本"""
+        resource = holder.get(f"{{{RDF_NS}}}resource") or holder.get(f"{{{RDF_NS}}}about")
+        if resource is None:
+            return holder.text or ""
+        iri = urljoin(base, resource)
+        return f":{_iri_name(iri)}" if iri in variables else _iri_name(iri)
+
+    def _rdf_atom(self, node: ET.Element, base: str, variables: Set[str]) -> Optional[Atom]:
+        """RDF/XML 原子节点 → Atom；不支持的原子返回 None"""
+        kind = self._rdf_kind(node)
+        props = {_tag_name(child.tag): child for child in node}
+        resource = lambda name: props[name].get(f"{{{RDF_NS}}}resource", "") if name in props else ""
+        term = lambda name: self._rdf_term(props[name], base, variables)
+
+        if kind == "ClassAtom" and "argument1" in props:
+            return ClassAtom(_iri_name(resource("classPredicate")), term("argument1"))
+        if kind == "IndividualPropertyAtom" and {"argument1", "argument2"} <= props.keys():
+            return ObjectPropertyAtom(_iri_name(resource("propertyPredicate")), term("argument1"), term("argument2"))
+        if kind == "DatavaluedPropertyAtom" and {"argument1", "argument2"} <= props.keys():
+            value = term("argument2") if resource("argument2") else self._literal_value(props["argument2"].text or "")
+            return DataPropertyAtom(_iri_name(resource("propertyPredicate")), term("argument1"), value)
+        if kind == "BuiltinAtom" and "arguments" in props:
+            arguments = [self._rdf_term(item, base, variables) for item in self._rdf_list(props["arguments"])]
+            return BuiltInAtom(resource("builtin").rsplit('#', 1)[-1], arguments)
+        return None
+
+
 class KnowledgeBase:
     """知识库"""
     
@@ -168,19 +546,54 @@ class KnowledgeBase:
         self.object_property_facts = defaultdict(set)  # 对象属性事实
         self.data_property_facts = defaultdict(dict)  # 数据属性事实
         
+        # 二级索引：使未绑定变量的查找代价与结果规模相当，而不是与事实总量相当
+        self.class_index = defaultdict(set)  # 类 → 个体
+        self.property_subject_index = defaultdict(set)  # 属性 → 主语
+        self.property_object_index = defaultdict(set)  # (属性, 宾语) → 主语
+        self.property_pair_index = defaultdict(set)  # 属性 → (主语, 宾语)
+        self.data_property_index = defaultdict(set)  # 数据属性 → 主语
+        
     def add_class_fact(self, individual: str, class_name: str):
         """添加类事实"""
         self.class_facts[individual].add(class_name)
+        self.class_index[class_name].add(individual)
         
     def add_object_property_fact(self, subject: str, property_name: str, object_val: str):
         """添加对象属性事实"""
         self.object_property_facts[(subject, property_name)].add(object_val)
+        self.property_subject_index[property_name].add(subject)
+        self.property_object_index[(property_name, object_val)].add(subject)
+        self.property_pair_index[property_name].add((subject, object_val))
         
     def add_data_property_fact(self, subject: str, property_name: str, value: Any):
         """添加数据属性事实"""
         if subject not in self.data_property_facts:
             self.data_property_facts[subject] = {}
         self.data_property_facts[subject][property_name] = value
+        self.data_property_index[property_name].add(subject)
+        
+    def remove_class_fact(self, individual: str, class_name: str):
+        """删除类事实（不存在时忽略）"""
+        self.class_facts.get(individual, set()).discard(class_name)
+        self.class_index.get(class_name, set()).discard(individual)
+        
+    def remove_object_property_fact(self, subject: str, property_name: str, object_val: str):
+        """删除对象属性事实（不存在时忽略）"""
+        objects = self.object_property_facts.get((subject, property_name))
+        if not objects or object_val not in objects:
+            return
+        objects.discard(object_val)
+        self.property_object_index[(property_name, object_val)].discard(subject)
+        self.property_pair_index[property_name].discard((subject, object_val))
+        if not objects:
+            self.property_subject_index[property_name].discard(subject)
+        
+    def remove_data_property_fact(self, subject: str, property_name: str):
+        """删除数据属性事实（不存在时忽略）"""
+        values = self.data_property_facts.get(subject)
+        if values and property_name in values:
+            del values[property_name]
+            self.data_property_index[property_name].discard(subject)
         
     def has_class_fact(self, individual: str, class_name: str) -> bool:
         """检查类事实是否存在"""
@@ -193,131 +606,494 @@ class KnowledgeBase:
     def get_data_property_value(self, subject: str, property_name: str) -> Any:
         """获取数据属性值"""
         return self.data_property_facts.get(subject, {}).get(property_name)
+    
+    def get_individuals_of_class(self, class_name: str) -> Set[str]:
+        """获取属于某个类的全部个体"""
+        return self.class_index.get(class_name, set())
+    
+    def get_objects(self, subject: str, property_name: str) -> Set[str]:
+        """获取主语在某个对象属性上的全部宾语"""
+        return self.object_property_facts.get((subject, property_name), set())
+    
+    def get_subjects(self, property_name: str, object_val: Optional[str] = None) -> Set[str]:
+        """获取某个对象属性的主语；给定宾语时只返回指向该宾语的主语"""
+        if object_val is None:
+            return self.property_subject_index.get(property_name, set())
+        return self.property_object_index.get((property_name, object_val), set())
+    
+    def get_property_pairs(self, property_name: str) -> Set[Tuple[str, str]]:
+        """获取某个对象属性的全部 (主语, 宾语) 对"""
+        return self.property_pair_index.get(property_name, set())
+    
+    def get_data_property_subjects(self, property_name: str) -> Set[str]:
+        """获取具有某个数据属性的全部主语"""
+        return self.data_property_index.get(property_name, set())
+    
+    # 规模统计：供 JoinPlanner 估计代价，不构造结果集合
+    def count_individuals_of_class(self, class_name: str) -> int:
+        return len(self.class_index.get(class_name, ()))
+    
+    def count_subjects(self, property_name: str, object_val: Optional[str] = None) -> int:
+        if object_val is None:
+            return len(self.property_subject_index.get(property_name, ()))
+        return len(self.property_object_index.get((property_name, object_val), ()))
+    
+    def count_property_pairs(self, property_name: str) -> int:
+        return len(self.property_pair_index.get(property_name, ()))
+    
+    def count_data_property_subjects(self, property_name: str) -> int:
+        return len(self.data_property_index.get(property_name, ()))
+    
+    def key_count(self) -> int:
+        """带类事实的个体数与 (主语, 对象属性) 键数之和，用于粗略判断知识库规模"""
+        return len(self.class_facts) + len(self.object_property_facts)
+
+    def add_tunnel_individual(self, tunnel_id: str, tunnel_type: str, rock_grade: str,
+                              hydro_condition: str, soil_type: str = "MediumSoil",
+                              tunnel_length: float = 0, tunnel_diameter: float = 0) -> str:
+        """
+        按规则库使用的建模方式添加一个隧道个体
+
+        隧道 :t 通过 hasGeologicalCondition 关联地质条件个体 :gc，
+        围岩等级、水文条件和土壤类型同时挂在 :t 与 :gc 上，以覆盖不同规则的写法。
+
+        Returns:
+            地质条件个体的名称
+        """
+        gc_id = f"{tunnel_id}_gc"
+        self.add_class_fact(tunnel_id, tunnel_type)
+        self.add_class_fact(tunnel_id, "TunnelProject")
+        self.add_object_property_fact(tunnel_id, "hasGeologicalCondition", gc_id)
+        self.add_object_property_fact(tunnel_id, "hasGeologicalCondition", rock_grade)
+        self.add_object_property_fact(tunnel_id, "hasHydroCondition", hydro_condition)
+        self.add_object_property_fact(tunnel_id, "hasSoilType", soil_type)
+        self.add_object_property_fact(gc_id, "hasRockGrade", rock_grade)
+        self.add_object_property_fact(gc_id, "hasHydroCondition", hydro_condition)
+        self.add_object_property_fact(gc_id, "hasSoilType", soil_type)
+        self.add_data_property_fact(tunnel_id, "hasTunnelLength", tunnel_length)
+        self.add_data_property_fact(tunnel_id, "hasTunnelDiameter", tunnel_diameter)
+        return gc_id
+
+
+class RuleDependencyGraph:
+    """
+    规则依赖图
+    
+    规则A的规则头产生的谓词出现在规则B的规则体中时，连一条 A → B 的边。
+    强连通分量按最长路径分层：同一层内的分量互不依赖，每一层只依赖更低的层。
+    """
+    
+    def __init__(self, rules: List[SWRLRule]):
+        self.rules = rules
+        producers = defaultdict(list)
+        for i, rule in enumerate(rules):
+            for predicate in atom_predicates(rule.head):
+                producers[predicate].append(i)
+        
+        self.successors: List[Set[int]] = [set() for _ in rules]
+        for j, rule in enumerate(rules):
+            for predicate in atom_predicates(rule.body):
+                for i in producers.get(predicate, ()):
+                    self.successors[i].add(j)
+                    
+        self.components = self._strongly_connected_components()
+        self.component_of = {}
+        for ci, component in enumerate(self.components):
+            for i in component:
+                self.component_of[i] = ci
+                
+    def _strongly_connected_components(self) -> List[List[int]]:
+        """Tarjan算法（非递归），按逆拓扑序返回强连通分量"""
+        index_of: Dict[int, int] = {}
+        low: Dict[int, int] = {}
+        stack: List[int] = []
+        on_stack: Set[int] = set()
+        components = []
+        counter = 0
+        
+        for root in range(len(self.rules)):
+            if root in index_of:
+                continue
+            index_of[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(sorted(self.successors[root])))]
+            
+            while work:
+                node, successors = work[-1]
+                descended = False
+                for succ in successors:
+                    if succ not in index_of:
+                        index_of[succ] = low[succ] = counter
+                        counter += 1
+                        stack.append(succ)
+                        on_stack.add(succ)
+                        work.append((succ, iter(sorted(self.successors[succ]))))
+                        descended = True
+                        break
+                    if succ in on_stack:
+                        low[node] = min(low[node], index_of[succ])
+                if descended:
+                    continue
+                    
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component))
+                    
+        return components
+    
+    def is_cyclic(self, component: List[int]) -> bool:
+        """分量是否包含循环依赖（多条规则互相依赖，或单条规则依赖自身）"""
+        return len(component) > 1 or component[0] in self.successors[component[0]]
+    
+    @property
+    def is_acyclic(self) -> bool:
+        """整个依赖图是否无环"""
+        return not any(self.is_cyclic(component) for component in self.components)
+    
+    def strata(self) -> List[List[List[int]]]:
+        """
+        计算分层
+        
+        Returns:
+            按层排列的分量列表，每个分量是规则下标列表；层内分量按最小规则下标排序
+        """
+        levels = [0] * len(self.components)
+        for ci in reversed(range(len(self.components))):  # 拓扑序
+            for i in self.components[ci]:
+                for succ in self.successors[i]:
+                    cs = self.component_of[succ]
+                    if cs != ci:
+                        levels[cs] = max(levels[cs], levels[ci] + 1)
+        
+        strata = defaultdict(list)
+        for ci, component in enumerate(self.components):
+            strata[levels[ci]].append(component)
+        return [sorted(strata[level]) for level in sorted(strata)]
+    
+    def summary(self) -> Dict[str, int]:
+        """依赖图概要"""
+        return {
+            "rules": len(self.rules),
+            "edges": sum(len(succ) for succ in self.successors),
+            "strata": len(self.strata()) if self.rules else 0,
+            "cyclic_components": sum(1 for component in self.components if self.is_cyclic(component)),
+        }
+
+
+class JoinPlanner:
+    """
+    基于代价的规则体连接顺序规划器
+    
+    用知识库索引的规模估计每个原子在当前已绑定变量下的结果数，贪心地先执行结果最少的原子；
+    变量全部已绑定的原子（测试）和输入已绑定的内置原子尽早执行，作为过滤条件。
+    规划结果按规则缓存，规则体谓词的事实数跨越 2 的幂次时才重新规划；
+    谓词规模都很小时连接顺序无关紧要，直接沿用解析顺序，省去规划开销。
+    """
+    
+    # 所有项都已绑定的原子只做存在性测试，估计结果数小于 1
+    TEST_COST = 0.5
+    # 规则体谓词的事实数都不超过该值时不重排
+    SMALL_RELATION = 64
+    
+    def __init__(self, kb: KnowledgeBase):
+        self.kb = kb
+        self.plans: Dict[int, Tuple[tuple, List[Atom]]] = {}
+        self._predicates: Dict[int, List[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        
+    @staticmethod
+    def is_variable(term: Any) -> bool:
+        return isinstance(term, str) and term.startswith(':')
+    
+    def builtin_io(self, atom: BuiltInAtom) -> Tuple[Set[str], Set[str]]:
+        """内置原子的 (输入变量, 输出变量)"""
+        variables = [var for var in atom.variables if self.is_variable(var)]
+        builtin = BUILTINS.get(atom.function_name)
+        if builtin is not None and builtin.assigns and atom.variables and self.is_variable(atom.variables[0]):
+            return set(atom.variables[1:]) & set(variables), {atom.variables[0]}
+        return set(variables), set()
+    
+    def atom_variables(self, atom: Atom) -> Set[str]:
+        """原子中出现的变量"""
+        if isinstance(atom, ClassAtom):
+            terms = [atom.individual]
+        elif isinstance(atom, ObjectPropertyAtom):
+            terms = [atom.subject, atom.object]
+        elif isinstance(atom, DataPropertyAtom):
+            terms = [atom.subject, atom.value]
+        else:
+            terms = atom.variables
+        return {term for term in terms if self.is_variable(term)}
+    
+    def predicate_size(self, predicate: str) -> int:
+        """谓词的事实数（类的个体数或属性的事实数）"""
+        kb = self.kb
+        return (kb.count_individuals_of_class(predicate) + kb.count_property_pairs(predicate)
+                + kb.count_data_property_subjects(predicate))
+    
+    def estimate(self, atom: Atom, bound: Set[str]) -> float:
+        """在已绑定变量 bound 下，原子对每个输入绑定产生的结果数估计"""
+        kb = self.kb
+        is_bound = lambda term: not self.is_variable(term) or term in bound
+        
+        if isinstance(atom, ClassAtom):
+            if is_bound(atom.individual):
+                return self.TEST_COST
+            return kb.count_individuals_of_class(atom.class_name)
+        
+        if isinstance(atom, ObjectPropertyAtom):
+            subject_bound, object_bound = is_bound(atom.subject), is_bound(atom.object)
+            if subject_bound and object_bound:
+                return self.TEST_COST
+            pairs = kb.count_property_pairs(atom.property_name)
+            if not self.is_variable(atom.object):
+                return kb.count_subjects(atom.property_name, atom.object)
+            if subject_bound or object_bound:
+                # 平均每个主语的宾语数，宾语已绑定时也用它近似平均扇入
+                return pairs / max(1, kb.count_subjects(atom.property_name))
+            return pairs
+        
+        if isinstance(atom, DataPropertyAtom):
+            if is_bound(atom.subject):
+                # 数据属性按函数式处理，每个主语至多一个值
+                return self.TEST_COST if is_bound(atom.value) else 1
+            return kb.count_data_property_subjects(atom.property_name)
+        
+        return self.TEST_COST
+    
+    def order(self, body: List[Atom]) -> List[Atom]:
+        """按代价重排规则体原子"""
+        remaining = list(enumerate(body))
+        bound: Set[str] = set()
+        plan = []
+        while remaining:
+            # 输入已绑定的内置原子按原顺序立即执行
+            ready = [(i, atom) for i, atom in remaining
+                     if isinstance(atom, BuiltInAtom) and self.builtin_io(atom)[0] <= bound]
+            if ready:
+                chosen = ready[0]
+            else:
+                candidates = [(self.estimate(atom, bound), i, atom) for i, atom in remaining
+                              if not isinstance(atom, BuiltInAtom)]
+                if not candidates:
+                    # 剩余内置原子的输入永远无法绑定，保持原顺序（匹配时会失败）
+                    plan.extend(atom for _, atom in remaining)
+                    break
+                _, i, atom = min(candidates, key=lambda c: (c[0], c[1]))
+                chosen = (i, atom)
+            remaining.remove(chosen)
+            atom = chosen[1]
+            plan.append(atom)
+            bound |= self.builtin_io(atom)[1] if isinstance(atom, BuiltInAtom) else self.atom_variables(atom)
+        return plan
+    
+    def signature(self, rule: SWRLRule) -> tuple:
+        """规则体各谓词事实数的数量级，变化时计划失效"""
+        predicates = self._predicates.get(id(rule))
+        if predicates is None:
+            predicates = self._predicates[id(rule)] = sorted(atom_predicates(rule.body))
+        return tuple(self.predicate_size(predicate).bit_length() for predicate in predicates)
+    
+    def plan(self, rule: SWRLRule) -> List[Atom]:
+        """返回规则体的执行顺序（带缓存）"""
+        if self.kb.key_count() <= self.SMALL_RELATION:
+            # 知识库很小（如单个隧道的推理），连签名都不必计算
+            return rule.body
+        signature = self.signature(rule)
+        cached = self.plans.get(id(rule))
+        if cached is not None and cached[0] == signature:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        if max(signature, default=0) <= self.SMALL_RELATION.bit_length():
+            plan = rule.body
+        else:
+            plan = self.order(rule.body)
+        self.plans[id(rule)] = (signature, plan)
+        return plan
 
 
 class SWRLInferenceEngine:
     """SWRL推理引擎"""
     
-    def __init__(self, rules: List[SWRLRule]):
+    def __init__(self, rules: List[SWRLRule], optimize_joins: bool = True, verbosity: int = TRACE_OFF):
         self.rules = rules
         self.kb = KnowledgeBase()
+        self.planner = JoinPlanner(self.kb)
+        self.optimize_joins = optimize_joins  # 是否用 JoinPlanner 重排规则体原子
+        self.delta = []  # 当前轮新增的事实 (主语, 谓词, 值)
+        self.round_stats = []  # 每轮推理统计
+        self.provenance: Optional[ProvenanceLog] = None  # 溯源日志，首次开启溯源时创建
+        self._trace: Optional[ProvenanceLog] = None  # 溯源开启时等于 provenance，关闭时为 None
+        self.set_verbosity(verbosity)
+
+    def set_verbosity(self, verbosity: int):
+        """
+        切换溯源级别：TRACE_OFF 不记录，TRACE_RECORD 只记录，TRACE_PRINT 记录并逐条输出
+        （每轮统计与推理完成的汇总也只在 TRACE_PRINT 时输出，其它级别推理过程没有控制台输出）
+        关闭后已有的溯源记录保留，仍可通过 explain 查询
+        """
+        self.verbosity = verbosity
+        if verbosity > TRACE_OFF and self.provenance is None:
+            self.provenance = ProvenanceLog(self.rules, verbosity)
+        if self.provenance is not None:
+            self.provenance.verbosity = verbosity
+        self._trace = self.provenance if verbosity > TRACE_OFF else None
+
+    def _log(self, message: str):
+        """推理过程的汇总输出，只在 TRACE_PRINT 级别输出"""
+        if self.verbosity >= TRACE_PRINT:
+            print(message)
+
+    def explain(self, subject: str, property_name: str, value: Any = None) -> Dict[str, Any]:
+        """
+        解释推理结果的来源（需在推理前开启溯源）
+
+        Args:
+            subject: 主语个体
+            property_name: 对象属性或数据属性
+            value: 对象属性的宾语；数据属性可省略，默认取知识库中的当前值
+        """
+        if self.provenance is None:
+            raise RuntimeError("未开启溯源，请先调用 set_verbosity(TRACE_RECORD)")
+        data_value = self.kb.get_data_property_value(subject, property_name)
+        if data_value is not None and (value is None or value == data_value):
+            fact = ("data", property_name, (subject, data_value))
+        else:
+            fact = ("object", property_name, (subject, value))
+        return self.provenance.explain(fact)
+        
+    @staticmethod
+    def body_predicates(rule: SWRLRule) -> Set[str]:
+        """规则体中引用的谓词（类名和属性名）"""
+        return atom_predicates(rule.body)
         
     def execute_builtin(self, builtin: BuiltInAtom, variable_bindings: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """执行内置函数"""
+        """执行内置函数（实现见 swrl_builtins 注册表；字面量参数已在加载规则时解析）"""
         func_name = builtin.function_name
-        vars_and_literals = builtin.variables
-        
-        # 解析参数，区分变量和字面量
-        args = []
-        for var in vars_and_literals:
-            if var.startswith(':'):
-                # 变量
-                var_name = var
-                if var_name in variable_bindings:
-                    args.append(variable_bindings[var_name])
-                else:
-                    args.append(None)
-            else:
-                # 字面量
-                try:
-                    if '.' in var:
-                        args.append(float(var))
-                    else:
-                        args.append(int(var))
-                except ValueError:
-                    args.append(var)
-        
-        # 执行数学运算
+        spec = BUILTINS.get(func_name)
+        if spec is None or len(builtin.arguments) < spec.arity + spec.assigns:
+            return None
+
+        inputs = []
+        for var, literal in (builtin.arguments[1:spec.arity + 1] if spec.assigns else builtin.arguments[:spec.arity]):
+            if var is None:
+                inputs.append(literal)
+                continue
+            value = variable_bindings.get(var)
+            if value is None:
+                return None
+            inputs.append(value)
+
         try:
-            if func_name == "multiply" and len(args) >= 3:
-                if args[1] is not None and args[2] is not None:
-                    result = args[1] * args[2]
-                    return {vars_and_literals[0]: result}
-                    
-            elif func_name == "divide" and len(args) >= 3:
-                if args[1] is not None and args[2] is not None and args[2] != 0:
-                    result = args[1] / args[2]
-                    return {vars_and_literals[0]: result}
-                    
-            elif func_name == "greaterThan" and len(args) >= 2:
-                if args[0] is not None and args[1] is not None:
-                    return {} if args[0] > args[1] else None
-                    
-            elif func_name == "lessThanOrEqual" and len(args) >= 2:
-                if args[0] is not None and args[1] is not None:
-                    return {} if args[0] <= args[1] else None
-                    
-            elif func_name == "floor" and len(args) >= 2:
-                if args[1] is not None:
-                    result = math.floor(args[1])
-                    return {vars_and_literals[0]: result}
-                    
-            elif func_name == "round" and len(args) >= 2:
-                if args[1] is not None:
-                    result = round(args[1])
-                    return {vars_and_literals[0]: result}
-                    
+            result = spec.scalar(*inputs)
         except Exception as e:
             print(f"执行内置函数 {func_name} 时出错: {e}")
-            
-        return None
+            return None
+
+        if not spec.assigns:
+            return {} if result else None
+        if result is None:
+            return None
+        return {builtin.variables[0]: result}
         
-    def match_atom(self, atom: Atom, variable_bindings: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """匹配原子"""
+    def match_atom(self, atom: Atom, variable_bindings: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        匹配原子，逐个产出新增的变量绑定
+
+        候选直接从知识库索引惰性产出，提前结束的查询不必遍历全部候选；
+        迭代期间不要修改知识库（apply_rule 在写入规则头之前已取完全部匹配）
+        """
         if isinstance(atom, ClassAtom):
             # 如果个体是变量
             if atom.individual.startswith(':'):
                 if atom.individual in variable_bindings:
                     individual = variable_bindings[atom.individual]
                     if self.kb.has_class_fact(individual, atom.class_name):
-                        return [{}]
+                        yield {}
                 else:
-                    # 查找所有属于该类的个体
-                    results = []
-                    for individual, classes in self.kb.class_facts.items():
-                        if atom.class_name in classes:
-                            results.append({atom.individual: individual})
-                    return results
-            else:
-                if self.kb.has_class_fact(atom.individual, atom.class_name):
-                    return [{}]
+                    # 通过类索引查找所有属于该类的个体
+                    for individual in self.kb.get_individuals_of_class(atom.class_name):
+                        yield {atom.individual: individual}
+            elif self.kb.has_class_fact(atom.individual, atom.class_name):
+                yield {}
                     
         elif isinstance(atom, ObjectPropertyAtom):
-            subject = variable_bindings.get(atom.subject, atom.subject) if atom.subject.startswith(':') else atom.subject
-            object_val = variable_bindings.get(atom.object, atom.object) if atom.object.startswith(':') else atom.object
+            subject = variable_bindings.get(atom.subject) if atom.subject.startswith(':') else atom.subject
+            object_val = variable_bindings.get(atom.object) if atom.object.startswith(':') else atom.object
             
-            if subject and object_val:
+            if subject is not None and object_val is not None:
                 if self.kb.has_object_property_fact(subject, atom.property_name, object_val):
-                    return [{}]
+                    yield {}
+            elif subject is not None:
+                # 主语已绑定：直接取该主语的宾语集合
+                for obj in self.kb.get_objects(subject, atom.property_name):
+                    yield {atom.object: obj}
+            elif object_val is not None:
+                # 宾语已绑定：通过 (属性, 宾语) 索引反查主语
+                for subj in self.kb.get_subjects(atom.property_name, object_val):
+                    yield {atom.subject: subj}
+            elif atom.subject == atom.object:
+                for subj, obj in self.kb.get_property_pairs(atom.property_name):
+                    if subj == obj:
+                        yield {atom.subject: subj}
             else:
-                # 处理变量绑定
-                results = []
-                for (subj, prop), objects in self.kb.object_property_facts.items():
-                    if prop == atom.property_name:
-                        for obj in objects:
-                            binding = {}
-                            if atom.subject.startswith(':') and subject is None:
-                                binding[atom.subject] = subj
-                            if atom.object.startswith(':') and object_val is None:
-                                binding[atom.object] = obj
-                            if binding:
-                                results.append(binding)
-                return results
+                # 主语和宾语均未绑定：遍历该属性的全部事实对
+                for subj, obj in self.kb.get_property_pairs(atom.property_name):
+                    yield {atom.subject: subj, atom.object: obj}
                 
         elif isinstance(atom, DataPropertyAtom):
-            subject = variable_bindings.get(atom.subject, atom.subject) if atom.subject.startswith(':') else atom.subject
-            if subject:
-                stored_value = self.kb.get_data_property_value(subject, atom.property_name)
-                if stored_value == atom.value:
-                    return [{}]
+            subject = variable_bindings.get(atom.subject) if atom.subject.startswith(':') else atom.subject
+            value_is_var = isinstance(atom.value, str) and atom.value.startswith(':')
+            expected = variable_bindings.get(atom.value) if value_is_var else atom.value
+            subjects = [subject] if subject is not None else self.kb.get_data_property_subjects(atom.property_name)
+            
+            for subj in subjects:
+                stored_value = self.kb.get_data_property_value(subj, atom.property_name)
+                if stored_value is None:
+                    continue
+                binding = {} if subject is not None else {atom.subject: subj}
+                if expected is None:
+                    # 取值变量未绑定：绑定为存储的属性值
+                    binding[atom.value] = stored_value
+                elif stored_value != expected:
+                    continue
+                yield binding
                     
         elif isinstance(atom, BuiltInAtom):
             result = self.execute_builtin(atom, variable_bindings)
             if result is not None:
-                return [result]
-                
-        return []
+                yield result
         
+    def iter_matches(self, atoms: List[Atom], bindings: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """深度优先逐个产出原子序列的匹配绑定，不物化完整的结果集"""
+        if bindings is None:
+            bindings = {}
+        if not atoms:
+            yield bindings
+            return
+        remaining = atoms[1:]
+        for match in self.match_atom(atoms[0], bindings):
+            yield from self.iter_matches(remaining, {**bindings, **match})
+
+    def query(self, pattern: Any, select: Optional[List[str]] = None, distinct: bool = False) -> Iterator[Dict[str, Any]]:
+        """在推理后的知识库上执行合取查询，逐条产出结果（见 swrl_query.run_query）"""
+        from swrl_query import run_query  # swrl_query 依赖本模块，延迟导入
+        return run_query(self, pattern, select, distinct)
+
     def apply_rule(self, rule: SWRLRule) -> bool:
         """应用单个规则"""
         applied = False
@@ -340,19 +1116,27 @@ class SWRLInferenceEngine:
             return results
             
         # 匹配规则体
-        body_matches = match_body(rule.body)
+        body = self.planner.plan(rule) if self.optimize_joins else rule.body
+        body_matches = match_body(body)
         
         # 对每个匹配应用规则头
+        trace = self._trace
         for bindings in body_matches:
             for head_atom in rule.head:
                 if isinstance(head_atom, DataPropertyAtom):
                     subject = bindings.get(head_atom.subject, head_atom.subject)
-                    if subject and not subject.startswith(':'):
+                    value = head_atom.value
+                    if isinstance(value, str) and value.startswith(':'):
+                        value = bindings.get(value)
+                    if subject and not subject.startswith(':') and value is not None:
                         current_value = self.kb.get_data_property_value(subject, head_atom.property_name)
-                        if current_value != head_atom.value:
-                            self.kb.add_data_property_fact(subject, head_atom.property_name, head_atom.value)
+                        if current_value != value:
+                            self.kb.add_data_property_fact(subject, head_atom.property_name, value)
+                            self.delta.append((subject, head_atom.property_name, value))
                             applied = True
-                            print(f"应用规则 {rule.label}: {subject} {head_atom.property_name} = {head_atom.value}")
+                            if trace is not None:
+                                trace.record(("data", head_atom.property_name, (subject, value)), rule,
+                                             tuple(bindings.items()))
                             
                 elif isinstance(head_atom, ObjectPropertyAtom):
                     subject = bindings.get(head_atom.subject, head_atom.subject)
@@ -360,23 +1144,92 @@ class SWRLInferenceEngine:
                     if subject and object_val and not subject.startswith(':') and not object_val.startswith(':'):
                         if not self.kb.has_object_property_fact(subject, head_atom.property_name, object_val):
                             self.kb.add_object_property_fact(subject, head_atom.property_name, object_val)
+                            self.delta.append((subject, head_atom.property_name, object_val))
                             applied = True
-                            print(f"应用规则 {rule.label}: {subject} {head_atom.property_name} {object_val}")
+                            if trace is not None:
+                                trace.record(("object", head_atom.property_name, (subject, object_val)), rule,
+                                             tuple(bindings.items()))
                             
         return applied
         
-    def forward_chain(self, max_iterations: int = 100) -> None:
-        """前向链推理"""
-        for i in range(max_iterations):
-            applied_any = False
-            for rule in self.rules:
-                if self.apply_rule(rule):
-                    applied_any = True
-            if not applied_any:
-                print(f"推理完成，共进行了 {i+1} 轮")
-                break
-        else:
-            print(f"达到最大迭代次数 {max_iterations}")
+    def _run_round(self, rules: List[SWRLRule], stratum: Optional[int] = None) -> int:
+        """对给定规则评估一轮，记录统计信息并返回新增事实数"""
+        self.delta = []
+        applied_rules = 0
+        for rule in rules:
+            if self.apply_rule(rule):
+                applied_rules += 1
+        self.round_stats.append({
+            "round": len(self.round_stats) + 1,
+            "stratum": stratum,
+            "rules_fired": len(rules),
+            "rules_applied": applied_rules,
+            "delta_size": len(self.delta),
+        })
+        prefix = f"第 {len(self.round_stats)} 轮" if stratum is None else f"第 {stratum} 层"
+        self._log(f"{prefix}: 评估 {len(rules)} 条规则，{applied_rules} 条产生新事实，新增事实 {len(self.delta)} 条")
+        return len(self.delta)
+    
+    def _iterate(self, rules: List[SWRLRule], max_iterations: int, semi_naive: bool,
+                 stratum: Optional[int] = None) -> bool:
+        """对一组规则迭代到不动点；返回是否在 max_iterations 内收敛"""
+        body_predicates = {id(rule): self.body_predicates(rule) for rule in rules}
+        agenda = list(rules)
+        for _ in range(max_iterations):
+            self._run_round(agenda, stratum)
+            if semi_naive:
+                changed = {predicate for _, predicate, _ in self.delta}
+                agenda = [rule for rule in rules if body_predicates[id(rule)] & changed]
+            elif not self.delta:
+                agenda = []
+            if not agenda:
+                return True
+        return False
+        
+    def forward_chain(self, max_iterations: int = 100, semi_naive: bool = True,
+                      stratified: bool = True) -> List[Dict[str, int]]:
+        """
+        前向链推理
+        
+        stratified=True 时先按 RuleDependencyGraph 分层，逐层评估：无环的规则在所在层只评估一次，
+        只有存在循环依赖的分量才迭代到不动点。依赖图无环时整个推理一遍完成。
+        
+        semi_naive=True 时迭代采用半朴素（增量）求值：第一轮评估全部规则，之后每轮只重新触发
+        规则体中引用了上一轮新增事实谓词的规则；没有新增事实时即到达不动点，
+        无需再用一整轮全量推理来确认。
+        
+        注意：分层时数据属性的覆盖顺序为“层优先、同层按规则顺序”。
+        
+        Returns:
+            每轮的统计信息：所在层、评估的规则数、产生新事实的规则数和新增事实数
+        """
+        self.round_stats = []
+        
+        if not stratified:
+            if self._iterate(self.rules, max_iterations, semi_naive):
+                self._log(f"推理完成，共进行了 {len(self.round_stats)} 轮")
+            else:
+                self._log(f"达到最大迭代次数 {max_iterations}")
+            return self.round_stats
+        
+        graph = RuleDependencyGraph(self.rules)
+        strata = graph.strata()
+        converged = True
+        for level, components in enumerate(strata):
+            acyclic = sorted(i for component in components if not graph.is_cyclic(component)
+                             for i in component)
+            if acyclic:
+                self._run_round([self.rules[i] for i in acyclic], level)
+            for component in components:
+                if graph.is_cyclic(component):
+                    converged &= self._iterate([self.rules[i] for i in component],
+                                               max_iterations, semi_naive, level)
+                    
+        cyclic = sum(1 for component in graph.components if graph.is_cyclic(component))
+        self._log(f"分层推理完成：{len(strata)} 层，{cyclic} 个循环分量，共 {len(self.round_stats)} 轮评估")
+        if not converged:
+            self._log(f"存在循环分量达到最大迭代次数 {max_iterations}")
+        return self.round_stats
             
     def query_data_property(self, subject: str, property_name: str) -> Any:
         """查询数据属性值"""
@@ -416,7 +1269,9 @@ class RuleExporter:
             f.write('自动生成的隧道工程SWRL规则模块\n')
             f.write('包含149个推理规则的Python实现\n')
             f.write('"""\n\n')
-            f.write('from typing import Dict, Any, Optional\n')
+            f.write('from typing import Dict, Any, Optional, Tuple\n')
+            f.write('from functools import lru_cache\n')
+            f.write('from types import MappingProxyType\n')
             f.write('import math\n\n')
             
             # 导出规则数据结构
@@ -456,61 +1311,51 @@ class RuleExporter:
         result += "        ]"
         return result
     
+    def _write_lookup_table(self, f, table_name: str, comment: str, entries: List[Tuple[Tuple[str, ...], Any]]):
+        """写入模块级只读查找表，避免生成的函数在每次调用时重建字典"""
+        f.write(f'# {comment}\n')
+        f.write(f'{table_name} = MappingProxyType({{\n')
+        for key, value in entries:
+            key_text = ", ".join(f'"{part}"' for part in key)
+            f.write(f'    ({key_text}): {value},\n')
+        f.write('})\n\n')
+    
+    def _write_qualified_lookup(self, f, function_name: str, table_name: str, label: str):
+        """写入按 (隧道类型, 围岩等级, 水文条件) 查表、给出土壤类型时先查加长键的快速推理函数"""
+        f.write(f'def {function_name}(tunnel_type: str, rock_grade: str, hydro_condition: str,\n')
+        f.write(f'{" " * (len(function_name) + 5)}soil_type: Optional[str] = None) -> Optional[float]:\n')
+        f.write(f'    """快速推断{label}（给出土壤类型时先查带土壤条件的键）"""\n')
+        f.write('    if soil_type is not None:\n')
+        f.write(f'        value = {table_name}.get((tunnel_type, rock_grade, hydro_condition, soil_type))\n')
+        f.write('        if value is not None:\n')
+        f.write('            return value\n')
+        f.write(f'    return {table_name}.get((tunnel_type, rock_grade, hydro_condition))\n\n')
+
     def _write_quick_inference_functions(self, f):
-        """写入快速推理函数"""
-        f.write('def infer_lining_thickness(tunnel_type: str, rock_grade: str, hydro_condition: str) -> Optional[float]:\n')
-        f.write('    """快速推断衬砌厚度"""\n')
-        f.write('    rules_map = {\n')
-        
+        """
+        写入快速推理函数（查找表由 RuleAnalyzer 生成：键唯一，含键以外条件的规则不入表；
+        衬砌厚度与钢拱架间距的查找表可以含有带土壤类型的加长键，给出土壤类型时先查加长键）
+        """
+        from swrl_analyzer import RuleAnalyzer, TUNNEL_TABLES  # swrl_analyzer 依赖本模块，延迟导入
+        analyzer = RuleAnalyzer(self.rules)
+
         # 生成衬砌厚度的快速查找表
-        for rule in self.rules:
-            if any(atom.property_name == "hasLiningThickness" for atom in rule.head if hasattr(atom, 'property_name')):
-                tunnel_type_val = self._extract_tunnel_type(rule)
-                rock_grade_val = self._extract_rock_grade(rule)
-                hydro_condition_val = self._extract_hydro_condition(rule)
-                thickness_val = self._extract_thickness_value(rule)
-                
-                if all([tunnel_type_val, rock_grade_val, hydro_condition_val, thickness_val]):
-                    f.write(f'        ("{tunnel_type_val}", "{rock_grade_val}", "{hydro_condition_val}"): {thickness_val},\n')
-        
-        f.write('    }\n')
-        f.write('    return rules_map.get((tunnel_type, rock_grade, hydro_condition))\n\n')
-        
-        f.write('def infer_steel_arch_spacing(tunnel_type: str, rock_grade: str, hydro_condition: str) -> Optional[float]:\n')
-        f.write('    """快速推断钢拱架间距"""\n')
-        f.write('    rules_map = {\n')
+        entries = list(analyzer.decision_table(TUNNEL_TABLES['LINING_THICKNESS_TABLE']).items())
+        self._write_lookup_table(f, 'LINING_THICKNESS_TABLE', '衬砌厚度：(隧道类型, 围岩等级, 水文条件[, 土壤类型]) → 厚度', entries)
+        self._write_qualified_lookup(f, 'infer_lining_thickness', 'LINING_THICKNESS_TABLE', '衬砌厚度')
         
         # 生成钢拱架间距的快速查找表
-        for rule in self.rules:
-            if any(atom.property_name == "hasSteelArchSpacing" for atom in rule.head if hasattr(atom, 'property_name')):
-                tunnel_type_val = self._extract_tunnel_type(rule)
-                rock_grade_val = self._extract_rock_grade(rule)
-                hydro_condition_val = self._extract_hydro_condition(rule)
-                spacing_val = self._extract_spacing_value(rule)
-                
-                if all([tunnel_type_val, rock_grade_val, hydro_condition_val, spacing_val]):
-                    f.write(f'        ("{tunnel_type_val}", "{rock_grade_val}", "{hydro_condition_val}"): {spacing_val},\n')
+        entries = list(analyzer.decision_table(TUNNEL_TABLES['STEEL_ARCH_SPACING_TABLE']).items())
+        self._write_lookup_table(f, 'STEEL_ARCH_SPACING_TABLE', '钢拱架间距：(隧道类型, 围岩等级, 水文条件[, 土壤类型]) → 间距', entries)
+        self._write_qualified_lookup(f, 'infer_steel_arch_spacing', 'STEEL_ARCH_SPACING_TABLE', '钢拱架间距')
         
-        f.write('    }\n')
-        f.write('    return rules_map.get((tunnel_type, rock_grade, hydro_condition))\n\n')
+        # 生成防水层厚度的快速查找表
+        entries = list(analyzer.decision_table(TUNNEL_TABLES['WATERPROOF_THICKNESS_TABLE']).items())
+        self._write_lookup_table(f, 'WATERPROOF_THICKNESS_TABLE', '防水层厚度：(隧道类型, 土壤类型, 水文条件) → 厚度', entries)
         
         f.write('def infer_waterproof_thickness(tunnel_type: str, soil_type: str, hydro_condition: str) -> Optional[float]:\n')
         f.write('    """快速推断防水层厚度"""\n')
-        f.write('    rules_map = {\n')
-        
-        # 生成防水层厚度的快速查找表
-        for rule in self.rules:
-            if any(atom.property_name == "hasWaterproofLayerThickness" for atom in rule.head if hasattr(atom, 'property_name')):
-                tunnel_type_val = self._extract_tunnel_type(rule)
-                soil_type_val = self._extract_soil_type(rule)
-                hydro_condition_val = self._extract_hydro_condition(rule)
-                thickness_val = self._extract_waterproof_value(rule)
-                
-                if all([tunnel_type_val, soil_type_val, hydro_condition_val, thickness_val]):
-                    f.write(f'        ("{tunnel_type_val}", "{soil_type_val}", "{hydro_condition_val}"): {thickness_val},\n')
-        
-        f.write('    }\n')
-        f.write('    return rules_map.get((tunnel_type, soil_type, hydro_condition))\n\n')
+        f.write('    return WATERPROOF_THICKNESS_TABLE.get((tunnel_type, soil_type, hydro_condition))\n\n')
     
     def _write_rule_application_functions(self, f):
         """写入规则应用函数"""
@@ -521,16 +1366,19 @@ class RuleExporter:
         f.write('    else:\n')
         f.write('        return "TBM_001"\n\n')
         
+        f.write('# 锚杆长度系数：围岩等级 → 锚杆长度 / 隧道直径\n')
+        f.write('BOLT_LENGTH_MULTIPLIERS = MappingProxyType({\n')
+        f.write('    "RockGrade_I": 0.25,\n')
+        f.write('    "RockGrade_II": 0.3,\n')
+        f.write('    "RockGrade_III": 0.33,\n')
+        f.write('    "RockGrade_IV": 0.45,\n')
+        f.write('    "RockGrade_V": 0.5,\n')
+        f.write('})\n')
+        f.write('DEFAULT_BOLT_LENGTH_MULTIPLIER = 0.3\n\n')
+
         f.write('def calculate_bolt_length(tunnel_diameter: float, rock_grade: str) -> float:\n')
         f.write('    """计算锚杆长度"""\n')
-        f.write('    multipliers = {\n')
-        f.write('        "RockGrade_I": 0.25,\n')
-        f.write('        "RockGrade_II": 0.3,\n')
-        f.write('        "RockGrade_III": 0.33,\n')
-        f.write('        "RockGrade_IV": 0.45,\n')
-        f.write('        "RockGrade_V": 0.5\n')
-        f.write('    }\n')
-        f.write('    return tunnel_diameter * multipliers.get(rock_grade, 0.3)\n\n')
+        f.write('    return tunnel_diameter * BOLT_LENGTH_MULTIPLIERS.get(rock_grade, DEFAULT_BOLT_LENGTH_MULTIPLIER)\n\n')
         
         f.write('def calculate_steel_arch_count(tunnel_length: float, spacing: float) -> int:\n')
         f.write('    """计算钢拱架数量"""\n')
@@ -541,7 +1389,15 @@ class RuleExporter:
         f.write('def comprehensive_tunnel_design(tunnel_type: str, tunnel_length: float, tunnel_diameter: float,\n')
         f.write('                                rock_grade: str, hydro_condition: str, \n')
         f.write('                                soil_type: str = "MediumSoil") -> Dict[str, Any]:\n')
-        f.write('    """综合隧道设计计算"""\n')
+        f.write('    """综合隧道设计计算（相同参数的结果由 lru_cache 缓存，每次调用返回新的字典）"""\n')
+        f.write('    return dict(_comprehensive_tunnel_design(tunnel_type, tunnel_length, tunnel_diameter,\n')
+        f.write('                                             rock_grade, hydro_condition, soil_type))\n\n')
+
+        f.write('@lru_cache(maxsize=4096)\n')
+        f.write('def _comprehensive_tunnel_design(tunnel_type: str, tunnel_length: float, tunnel_diameter: float,\n')
+        f.write('                                 rock_grade: str, hydro_condition: str,\n')
+        f.write('                                 soil_type: str) -> Tuple[Tuple[str, Any], ...]:\n')
+        f.write('    """综合隧道设计计算的缓存实现，返回不可变的 (键, 值) 元组，避免调用方修改缓存结果"""\n')
         f.write('    result = {}\n')
         f.write('    \n')
         f.write('    # 基本参数\n')
@@ -550,10 +1406,11 @@ class RuleExporter:
         f.write('    result["tunnel_diameter"] = tunnel_diameter\n')
         f.write('    \n')
         f.write('    # 衬砌厚度\n')
-        f.write('    result["lining_thickness"] = infer_lining_thickness(tunnel_type, rock_grade, hydro_condition)\n')
+        f.write('    result["lining_thickness"] = infer_lining_thickness(tunnel_type, rock_grade, hydro_condition, soil_type)\n')
         f.write('    \n')
         f.write('    # 钢拱架间距\n')
-        f.write('    result["steel_arch_spacing"] = infer_steel_arch_spacing(tunnel_type, rock_grade, hydro_condition)\n')
+        f.write('    result["steel_arch_spacing"] = infer_steel_arch_spacing(tunnel_type, rock_grade, hydro_condition,\n')
+        f.write('                                                            soil_type)\n')
         f.write('    \n')
         f.write('    # 防水层厚度\n')
         f.write('    result["waterproof_thickness"] = infer_waterproof_thickness(tunnel_type, soil_type, hydro_condition)\n')
@@ -568,56 +1425,7 @@ class RuleExporter:
         f.write('    if result["steel_arch_spacing"]:\n')
         f.write('        result["steel_arch_count"] = calculate_steel_arch_count(tunnel_length, result["steel_arch_spacing"])\n')
         f.write('    \n')
-        f.write('    return result\n\n')
-    
-    def _extract_tunnel_type(self, rule: SWRLRule) -> Optional[str]:
-        """从规则中提取隧道类型"""
-        for atom in rule.body:
-            if isinstance(atom, ClassAtom) and "Tunnel" in atom.class_name:
-                return atom.class_name
-        return None
-    
-    def _extract_rock_grade(self, rule: SWRLRule) -> Optional[str]:
-        """从规则中提取岩石等级"""
-        for atom in rule.body:
-            if isinstance(atom, ObjectPropertyAtom) and atom.property_name == "hasRockGrade":
-                return atom.object
-        return None
-    
-    def _extract_hydro_condition(self, rule: SWRLRule) -> Optional[str]:
-        """从规则中提取水文条件"""
-        for atom in rule.body:
-            if isinstance(atom, ObjectPropertyAtom) and atom.property_name == "hasHydroCondition":
-                return atom.object
-        return None
-    
-    def _extract_soil_type(self, rule: SWRLRule) -> Optional[str]:
-        """从规则中提取土壤类型"""
-        for atom in rule.body:
-            if isinstance(atom, ObjectPropertyAtom) and atom.property_name == "hasSoilType":
-                return atom.object
-        return None
-    
-    def _extract_thickness_value(self, rule: SWRLRule) -> Optional[float]:
-        """从规则中提取衬砌厚度值"""
-        for atom in rule.head:
-            if isinstance(atom, DataPropertyAtom) and atom.property_name == "hasLiningThickness":
-                return atom.value
-        return None
-    
-    def _extract_spacing_value(self, rule: SWRLRule) -> Optional[float]:
-        """从规则中提取钢拱架间距值"""
-        for atom in rule.head:
-            if isinstance(atom, DataPropertyAtom) and atom.property_name == "hasSteelArchSpacing":
-                return atom.value
-        return None
-    
-    def _extract_waterproof_value(self, rule: SWRLRule) -> Optional[float]:
-        """从规则中提取防水层厚度值"""
-        for atom in rule.head:
-            if isinstance(atom, DataPropertyAtom) and atom.property_name == "hasWaterproofLayerThickness":
-                return atom.value
-        return None
+        f.write('    return tuple(result.items())\n\n')
     
     def export_to_json(self, output_file: str = "tunnel_rules.json"):
         """导出规则为JSON格式"""
@@ -708,4 +1516,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # 以脚本运行时改用导入的 swrl_reasoner 模块：swrl_analyzer 等模块导入的是 swrl_reasoner，
+    # 原子类必须是同一份，否则导出快速查找表时 isinstance 判断全部失败
+    import swrl_reasoner
+    swrl_reasoner.main()
@@ -0,0 +1,620 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rete风格的SWRL规则网络
+将解析得到的SWRLRule规则体编译为共享的判别/连接网络：
+相同的原子测试（如 DeepTunnelProject + hasRockGrade RockGrade_I）只在网络中出现一次，
+每个事实只在新增（或撤销）时传播一次，不再在每轮迭代中为每条规则重新连接。
+"""
+
+from collections import defaultdict, deque
+from typing import Dict, List, Set, Any, Optional, Tuple
+
+from swrl_reasoner import (
+    Atom, ClassAtom, ObjectPropertyAtom, DataPropertyAtom, BuiltInAtom,
+    SWRLRule, SWRLInferenceEngine,
+)
+from swrl_provenance import TRACE_OFF
+
+
+# 事实统一表示为 (类型, 谓词, 项元组)，类型为 "class" / "object" / "data"
+Fact = Tuple[str, str, tuple]
+
+
+def is_variable(term: Any) -> bool:
+    """判断项是否为SWRL变量（以 ':' 开头）"""
+    return isinstance(term, str) and term.startswith(':')
+
+
+def atom_signature(atom: Atom) -> Optional[Tuple[str, str, tuple]]:
+    """返回原子对应的 (事实类型, 谓词, 项列表)，内置原子返回 None"""
+    if isinstance(atom, ClassAtom):
+        return "class", atom.class_name, (atom.individual,)
+    if isinstance(atom, ObjectPropertyAtom):
+        return "object", atom.property_name, (atom.subject, atom.object)
+    if isinstance(atom, DataPropertyAtom):
+        return "data", atom.property_name, (atom.subject, atom.value)
+    return None
+
+
+class AlphaNode:
+    """
+    Alpha节点：对单个事实做常量与重复变量测试，输出原子内变量取值组成的元组
+
+    右侧记忆由 Alpha 节点保存：按后继连接节点的连接变量建哈希索引，连接变量相同的后继共享同一份索引，
+    每个匹配只计算一次连接键、只存一份，连接节点右激活时只查左侧记忆。
+    """
+
+    def __init__(self, key: tuple, pattern: tuple, arity: int):
+        self.key = key
+        self.pattern = pattern  # 每个位置为 ("c", 常量) 或 ("v", 原子内变量序号)
+        self.arity = arity
+        self.memory: Set[tuple] = set()
+        self.indexes: Dict[Tuple[int, ...], Dict[tuple, Set[tuple]]] = {}  # 连接变量序号 → 连接键 → 匹配
+        self.successors: List[Tuple["JoinNode", Tuple[int, ...]]] = []
+
+    def index(self, right_locals: Tuple[int, ...]) -> Dict[tuple, Set[tuple]]:
+        """按连接变量序号取（或建立）右侧记忆的哈希索引"""
+        index = self.indexes.get(right_locals)
+        if index is None:
+            index = self.indexes[right_locals] = defaultdict(set)
+            for item in self.memory:
+                index[tuple(item[local] for local in right_locals)].add(item)
+        return index
+
+    def add_successor(self, join: "JoinNode"):
+        if all(successor is not join for successor, _ in self.successors):
+            self.index(join.right_locals)
+            self.successors.append((join, join.right_locals))
+
+    def match(self, terms: tuple) -> Optional[tuple]:
+        values = [None] * self.arity
+        bound = [False] * self.arity
+        for (kind, ref), term in zip(self.pattern, terms):
+            if kind == "c":
+                if term != ref:
+                    return None
+            elif not bound[ref]:
+                values[ref] = term
+                bound[ref] = True
+            elif values[ref] != term:
+                return None
+        return tuple(values)
+
+    def activate(self, terms: tuple, positive: bool):
+        item = self.match(terms)
+        if item is None:
+            return
+        if positive:
+            if item in self.memory:
+                return
+            self.memory.add(item)
+        else:
+            if item not in self.memory:
+                return
+            self.memory.discard(item)
+        keys = {}
+        for right_locals, index in self.indexes.items():
+            key = keys[right_locals] = tuple(item[local] for local in right_locals)
+            if positive:
+                index[key].add(item)
+            else:
+                bucket = index[key]
+                bucket.discard(item)
+                if not bucket:
+                    del index[key]
+        # 后继按创建顺序排列，子孙连接节点在祖先之后；倒序右激活保证规则体中同一 Alpha 节点出现多次时，
+        # 子孙节点先右激活（此时祖先尚未传下含该匹配的令牌），每个组合只产生一次。
+        # 左侧记忆中没有该连接键的后继（大多数）直接跳过，不进入 right_activate
+        for join, right_locals in reversed(self.successors):
+            key = keys[right_locals]
+            if key in join.left_memory:
+                join.right_activate(item, key, positive)
+
+
+class BetaNode:
+    """Beta节点基类：保存子节点并向下传递令牌"""
+
+    def __init__(self):
+        self.children: List[Any] = []
+
+    def emit(self, token: tuple, positive: bool):
+        for child in self.children:
+            child.activate(token, positive)
+
+
+class RootNode(BetaNode):
+    """根节点：只包含一个空令牌"""
+
+
+class JoinNode(BetaNode):
+    """
+    连接节点：按共享变量对左侧令牌与右侧Alpha输出做哈希连接
+
+    传播期间推出的事实只进入待传播队列，不会重入网络，所以遍历记忆时不需要复制
+    """
+
+    def __init__(self, parent: BetaNode, alpha: AlphaNode,
+                 join_pairs: Tuple[Tuple[int, int], ...], new_locals: Tuple[int, ...]):
+        super().__init__()
+        self.parent = parent
+        self.alpha = alpha
+        self.left_slots = tuple(slot for slot, _ in join_pairs)
+        self.right_locals = tuple(local for _, local in join_pairs)
+        self.new_locals = new_locals
+        self.left_memory: Dict[tuple, Set[tuple]] = defaultdict(set)
+        self.right_memory = alpha.index(self.right_locals)
+        if isinstance(parent, RootNode):
+            self.left_memory[()].add(())
+
+    def activate(self, token: tuple, positive: bool):
+        """左激活：父节点产生（或撤销）了一个令牌"""
+        key = tuple(token[slot] for slot in self.left_slots)
+        if positive:
+            bucket = self.left_memory[key]
+            if token in bucket:
+                return
+            bucket.add(token)
+        else:
+            bucket = self.left_memory.get(key)
+            if not bucket or token not in bucket:
+                return
+            bucket.discard(token)
+            if not bucket:
+                del self.left_memory[key]
+        items = self.right_memory.get(key)
+        if items:
+            for item in items:
+                self.emit(token + tuple(item[local] for local in self.new_locals), positive)
+
+    def right_activate(self, item: tuple, key: tuple, positive: bool):
+        """右激活：Alpha节点新增（或撤销）了一个匹配，key 为该匹配的连接键"""
+        tokens = self.left_memory.get(key)
+        if not tokens:
+            return
+        extension = tuple(item[local] for local in self.new_locals)
+        for token in tokens:
+            self.emit(token + extension, positive)
+
+
+class BuiltInNode(BetaNode):
+    """内置函数节点：对令牌求值，作为过滤器或追加计算结果"""
+
+    def __init__(self, parent: BetaNode, atom: BuiltInAtom, arg_slots: Tuple[Tuple[str, int], ...],
+                 out_var: Optional[str], out_slot: Optional[int], appends: bool, evaluate):
+        super().__init__()
+        self.parent = parent
+        self.atom = atom
+        self.arg_slots = arg_slots
+        self.out_var = out_var
+        self.out_slot = out_slot
+        self.appends = appends
+        self.evaluate = evaluate
+
+    def activate(self, token: tuple, positive: bool):
+        bindings = {var: token[slot] for var, slot in self.arg_slots}
+        result = self.evaluate(self.atom, bindings)
+        if result is None:
+            return
+        if self.out_var is not None and self.out_var in result:
+            value = result[self.out_var]
+            if self.appends:
+                token = token + (value,)
+            else:
+                token = token[:self.out_slot] + (value,) + token[self.out_slot + 1:]
+        elif self.appends:
+            return
+        self.emit(token, positive)
+
+
+class TerminalNode:
+    """终端节点：每条规则一个，把完整匹配的令牌交给推理引擎"""
+
+    def __init__(self, rule: SWRLRule, rule_index: int, slots: Dict[str, int], callback):
+        self.rule = rule
+        self.rule_index = rule_index
+        self.slots = slots
+        self.callback = callback
+
+    def resolve(self, term: Any, token: tuple) -> Any:
+        """把规则头中的项解析为具体值，未绑定的变量返回 None"""
+        if is_variable(term):
+            slot = self.slots.get(term)
+            return token[slot] if slot is not None else None
+        return term
+
+    def binding(self, token: tuple) -> Tuple[Tuple[str, Any], ...]:
+        """令牌对应的变量绑定 ((变量, 值), ...)，供溯源日志记录"""
+        return tuple((var, token[slot]) for var, slot in self.slots.items())
+
+    def activate(self, token: tuple, positive: bool):
+        self.callback(self, token, positive)
+
+
+class ReteNetwork:
+    """把规则体编译为共享的Alpha/Beta网络"""
+
+    def __init__(self, rules: List[SWRLRule], evaluate_builtin, on_activation):
+        self.root = RootNode()
+        self.alpha_nodes: Dict[tuple, AlphaNode] = {}
+        self.alpha_index: Dict[Tuple[str, str], List[AlphaNode]] = defaultdict(list)
+        self.beta_nodes: Dict[tuple, BetaNode] = {}
+        self.terminals: List[TerminalNode] = []
+        self.evaluate_builtin = evaluate_builtin
+        self.on_activation = on_activation
+        self.atom_count = 0
+
+        for index, rule in enumerate(rules):
+            self.add_rule(rule, index)
+
+    def _get_alpha(self, kind: str, predicate: str, terms: tuple) -> Tuple[AlphaNode, List[str]]:
+        """获取（或创建）原子对应的Alpha节点，同时返回原子内变量的出现顺序"""
+        local_vars: List[str] = []
+        pattern = []
+        for term in terms:
+            if is_variable(term):
+                if term not in local_vars:
+                    local_vars.append(term)
+                pattern.append(("v", local_vars.index(term)))
+            else:
+                pattern.append(("c", term))
+        key = (kind, predicate, tuple(pattern))
+        alpha = self.alpha_nodes.get(key)
+        if alpha is None:
+            alpha = AlphaNode(key, tuple(pattern), len(local_vars))
+            self.alpha_nodes[key] = alpha
+            self.alpha_index[(kind, predicate)].append(alpha)
+        return alpha, local_vars
+
+    def _share(self, key: tuple, factory) -> BetaNode:
+        node = self.beta_nodes.get(key)
+        if node is None:
+            node = factory()
+            node.parent.children.append(node)
+            self.beta_nodes[key] = node
+        return node
+
+    def add_rule(self, rule: SWRLRule, rule_index: int):
+        """编译单条规则；前缀结构相同的规则共享同一条连接链"""
+        slots: Dict[str, int] = {}
+        node: BetaNode = self.root
+
+        for atom in rule.body:
+            self.atom_count += 1
+            signature = atom_signature(atom)
+            if signature is not None:
+                kind, predicate, terms = signature
+                alpha, local_vars = self._get_alpha(kind, predicate, terms)
+                join_pairs = []
+                new_locals = []
+                for local, var in enumerate(local_vars):
+                    if var in slots:
+                        join_pairs.append((slots[var], local))
+                    else:
+                        new_locals.append(local)
+                for local in new_locals:
+                    slots[local_vars[local]] = len(slots)
+                key = ("join", id(node), alpha.key, tuple(join_pairs), tuple(new_locals))
+                parent = node
+                node = self._share(key, lambda: JoinNode(parent, alpha, tuple(join_pairs), tuple(new_locals)))
+                alpha.add_successor(node)
+
+            elif isinstance(atom, BuiltInAtom):
+                arg_slots = tuple((var, slots[var]) for var in atom.variables if var in slots)
+                spec = tuple(("s", slots[var]) if var in slots else ("u",) if is_variable(var) else ("c", var)
+                             for var in atom.variables)
+                out_var = atom.variables[0] if atom.variables and is_variable(atom.variables[0]) else None
+                appends = out_var is not None and out_var not in slots
+                out_slot = len(slots) if appends else slots.get(out_var)
+                if appends:
+                    slots[out_var] = out_slot
+                key = ("builtin", id(node), atom.function_name, spec)
+                parent = node
+                node = self._share(key, lambda: BuiltInNode(parent, atom, arg_slots, out_var, out_slot,
+                                                           appends, self.evaluate_builtin))
+
+        terminal = TerminalNode(rule, rule_index, dict(slots), self.on_activation)
+        node.children.append(terminal)
+        self.terminals.append(terminal)
+
+    def propagate(self, fact: Fact, positive: bool = True):
+        """把一个新增（positive=True）或撤销的事实送入网络"""
+        kind, predicate, terms = fact
+        for alpha in self.alpha_index.get((kind, predicate), ()):
+            alpha.activate(terms, positive)
+
+    def statistics(self) -> Dict[str, int]:
+        """网络规模统计，用于观察规则间的节点共享程度"""
+        joins = sum(1 for node in self.beta_nodes.values() if isinstance(node, JoinNode))
+        return {
+            "rules": len(self.terminals),
+            "body_atoms": self.atom_count,
+            "alpha_nodes": len(self.alpha_nodes),
+            "join_nodes": joins,
+            "builtin_nodes": len(self.beta_nodes) - joins,
+        }
+
+
+class ReteInferenceEngine(SWRLInferenceEngine):
+    """
+    基于Rete网络的推理引擎，接口与 SWRLInferenceEngine 一致
+
+    数据属性按函数式处理（每个主语每个属性一个值）：多条规则对同一 (主语, 属性) 给出不同取值时，
+    规则列表中靠后的规则生效，这与朴素引擎逐轮按顺序覆盖后的最终结果一致。
+
+    真值维护：推理得到的事实记录其支持（规则序号, 令牌）。通过 assert_* / retract_* / update_tunnel
+    修改输入事实后，只有依赖这些事实的网络路径被重新激活，失去全部支持的推理结果被撤销，
+    更新耗时与受影响的规则和事实数成正比，而不是重新推理整个知识库。
+    """
+
+    def __init__(self, rules: List[SWRLRule], verbosity: int = TRACE_OFF):
+        super().__init__(rules, verbosity=verbosity)
+        self.network = ReteNetwork(rules, self.execute_builtin, self._on_activation)
+        self._known_facts: Set[Fact] = set()
+        self._known_data: Dict[Tuple[str, str], Any] = {}
+        self._pending: deque = deque()
+        self._candidates: Dict[Tuple[str, str], Dict[Tuple[int, tuple], Any]] = defaultdict(dict)
+        self._dirty: Dict[Tuple[str, str], None] = {}
+        self._asserted_facts: Set[Fact] = set()  # 输入的类 / 对象属性事实
+        self._asserted_data: Dict[Tuple[str, str], Any] = {}  # 输入的数据属性值
+        self._support: Dict[Fact, Set[Tuple[int, tuple]]] = defaultdict(set)  # 推理得到的对象属性事实 → 支持
+        self.propagated_facts = 0
+        self._activated_rules: Set[int] = set()  # 本次 forward_chain 中有新增激活的规则序号
+
+    def _sync_knowledge_base(self):
+        """把知识库中尚未进入网络的事实排入待传播队列，并记为输入事实"""
+        for individual, classes in self.kb.class_facts.items():
+            for class_name in classes:
+                self._queue_asserted_fact(("class", class_name, (individual,)))
+        for (subject, prop), objects in self.kb.object_property_facts.items():
+            for obj in objects:
+                self._queue_asserted_fact(("object", prop, (subject, obj)))
+        for subject, properties in self.kb.data_property_facts.items():
+            for prop, value in properties.items():
+                if (subject, prop) not in self._known_data or self._known_data[(subject, prop)] != value:
+                    self._asserted_data[(subject, prop)] = value
+                self._queue_data_fact(subject, prop, value)
+
+    def _queue_asserted_fact(self, fact: Fact):
+        if fact not in self._known_facts:
+            self._asserted_facts.add(fact)
+            self._queue_fact(fact)
+
+    def _queue_fact(self, fact: Fact):
+        if fact not in self._known_facts:
+            self._known_facts.add(fact)
+            self._pending.append((fact, True))
+
+    def _queue_retraction(self, fact: Fact):
+        if fact in self._known_facts:
+            self._known_facts.discard(fact)
+            self._pending.append((fact, False))
+
+    def _queue_data_retraction(self, subject: str, prop: str):
+        if (subject, prop) in self._known_data:
+            old_value = self._known_data.pop((subject, prop))
+            self._pending.append((("data", prop, (subject, old_value)), False))
+
+    def _queue_data_fact(self, subject: str, prop: str, value: Any):
+        key = (subject, prop)
+        if key in self._known_data:
+            old_value = self._known_data[key]
+            if old_value == value:
+                return
+            self._pending.append((("data", prop, (subject, old_value)), False))
+        self._known_data[key] = value
+        self._pending.append((("data", prop, (subject, value)), True))
+
+    def _on_activation(self, terminal: TerminalNode, token: tuple, positive: bool):
+        """终端节点回调：记录数据属性候选值，或直接断言对象属性事实"""
+        rule = terminal.rule
+        if positive:
+            self._activated_rules.add(terminal.rule_index)
+        for head_atom in rule.head:
+            if isinstance(head_atom, DataPropertyAtom):
+                subject = terminal.resolve(head_atom.subject, token)
+                value = terminal.resolve(head_atom.value, token)
+                if subject is None or is_variable(subject) or value is None:
+                    continue
+                key = (subject, head_atom.property_name)
+                if positive:
+                    self._candidates[key][(terminal.rule_index, token)] = value
+                else:
+                    self._candidates[key].pop((terminal.rule_index, token), None)
+                self._dirty[key] = None
+
+            elif isinstance(head_atom, ObjectPropertyAtom):
+                subject = terminal.resolve(head_atom.subject, token)
+                object_val = terminal.resolve(head_atom.object, token)
+                if not subject or not object_val or is_variable(subject) or is_variable(object_val):
+                    continue
+                fact = ("object", head_atom.property_name, (subject, object_val))
+                if positive:
+                    self._support[fact].add((terminal.rule_index, token))
+                    if not self.kb.has_object_property_fact(subject, head_atom.property_name, object_val):
+                        self.kb.add_object_property_fact(subject, head_atom.property_name, object_val)
+                        self._queue_fact(fact)
+                        if self._trace is not None:
+                            self._trace.record(fact, rule, terminal.binding(token), terminal.rule_index)
+                elif fact in self._support:
+                    support = self._support[fact]
+                    support.discard((terminal.rule_index, token))
+                    if not support:
+                        del self._support[fact]
+                        if fact not in self._asserted_facts:
+                            self.kb.remove_object_property_fact(subject, head_atom.property_name, object_val)
+                            self._queue_retraction(fact)
+                            if self._trace is not None:
+                                self._trace.record_retraction(fact)
+
+    def _resolve_conflicts(self):
+        """为受影响的 (主语, 属性) 选出生效的候选值并写回知识库"""
+        while self._dirty:
+            key = next(iter(self._dirty))
+            del self._dirty[key]
+            candidates = self._candidates.get(key)
+            subject, prop = key
+            current = self.kb.get_data_property_value(subject, prop)
+            winner = None
+            if candidates:
+                winner, value = max(candidates.items(), key=lambda item: item[0][0])
+            elif key in self._asserted_data:
+                # 推理结果全部失去支持，恢复输入值
+                value = self._asserted_data[key]
+            else:
+                self._candidates.pop(key, None)
+                if current is not None:
+                    self.kb.remove_data_property_fact(subject, prop)
+                    self._queue_data_retraction(subject, prop)
+                    if self._trace is not None:
+                        self._trace.record_retraction(("data", prop, (subject, current)))
+                continue
+            if current != value:
+                self.kb.add_data_property_fact(subject, prop, value)
+                self._queue_data_fact(subject, prop, value)
+                if self._trace is not None:
+                    if current is not None:
+                        self._trace.record_retraction(("data", prop, (subject, current)))
+                    if winner is not None:
+                        rule_index, token = winner
+                        self._trace.record(("data", prop, (subject, value)), self.rules[rule_index],
+                                           self.network.terminals[rule_index].binding(token), rule_index)
+
+    def _propagate(self) -> int:
+        """传播待处理的事实变化直到网络静止，返回传播的事实数"""
+        propagated = 0
+        while self._pending or self._dirty:
+            while self._pending:
+                fact, positive = self._pending.popleft()
+                self.network.propagate(fact, positive)
+                propagated += 1
+            self._resolve_conflicts()
+        self.propagated_facts += propagated
+        return propagated
+
+    def forward_chain(self, max_iterations: int = 100, semi_naive: bool = True,
+                      stratified: bool = False) -> List[Dict[str, int]]:
+        """
+        前向链推理：只传播尚未进入网络的事实，直到网络静止
+
+        参数与 SWRLInferenceEngine.forward_chain 相同，便于替换引擎。Rete网络本身就是增量的（相当于半朴素求值），
+        数据属性按规则列表顺序覆盖（相当于不分层求值），所以只支持 semi_naive=True、stratified=False，
+        其它取值抛出 ValueError；网络总是传播到静止，max_iterations 不起作用。
+
+        Returns:
+            与基类相同格式的统计信息（网络一次传播到静止记为一轮）：
+            rules_applied 为有新增激活的规则数，delta_size 为本次传播的事实数（含输入事实）
+        """
+        if not semi_naive:
+            raise ValueError("Rete引擎总是增量传播，不支持 semi_naive=False")
+        if stratified:
+            raise ValueError("Rete引擎按规则列表顺序覆盖数据属性，不支持 stratified=True")
+        self._activated_rules = set()
+        self._sync_knowledge_base()
+        propagated = self._propagate()
+        self.round_stats = [{
+            "round": 1,
+            "stratum": None,
+            "rules_fired": len(self.rules),
+            "rules_applied": len(self._activated_rules),
+            "delta_size": propagated,
+        }]
+        self._log(f"Rete推理完成，本次传播了 {propagated} 个事实")
+        return self.round_stats
+
+    # ---- 增量更新（真值维护） ----
+    def assert_class_fact(self, individual: str, class_name: str) -> int:
+        """断言类事实并增量推理，返回传播的事实数"""
+        self.kb.add_class_fact(individual, class_name)
+        fact = ("class", class_name, (individual,))
+        self._asserted_facts.add(fact)
+        self._queue_fact(fact)
+        return self._propagate()
+
+    def retract_class_fact(self, individual: str, class_name: str) -> int:
+        """撤销类事实及只依赖它的推理结果"""
+        fact = ("class", class_name, (individual,))
+        self._asserted_facts.discard(fact)
+        self.kb.remove_class_fact(individual, class_name)
+        self._queue_retraction(fact)
+        return self._propagate()
+
+    def assert_object_property_fact(self, subject: str, property_name: str, object_val: str) -> int:
+        """断言对象属性事实并增量推理"""
+        self.kb.add_object_property_fact(subject, property_name, object_val)
+        fact = ("object", property_name, (subject, object_val))
+        self._asserted_facts.add(fact)
+        self._queue_fact(fact)
+        return self._propagate()
+
+    def retract_object_property_fact(self, subject: str, property_name: str, object_val: str) -> int:
+        """撤销对象属性事实；若该事实同时由规则推出则保留"""
+        fact = ("object", property_name, (subject, object_val))
+        self._asserted_facts.discard(fact)
+        if fact not in self._support:
+            self.kb.remove_object_property_fact(subject, property_name, object_val)
+            self._queue_retraction(fact)
+        return self._propagate()
+
+    def assert_data_property_fact(self, subject: str, property_name: str, value: Any) -> int:
+        """断言（或修改）数据属性值并增量推理"""
+        key = (subject, property_name)
+        self._asserted_data[key] = value
+        if self._candidates.get(key):
+            # 该属性由规则推出，规则结果优先；输入值在推理结果失去支持时生效
+            return self._propagate()
+        self.kb.add_data_property_fact(subject, property_name, value)
+        self._queue_data_fact(subject, property_name, value)
+        return self._propagate()
+
+    def retract_data_property_fact(self, subject: str, property_name: str) -> int:
+        """撤销数据属性的输入值"""
+        key = (subject, property_name)
+        self._asserted_data.pop(key, None)
+        if not self._candidates.get(key):
+            self.kb.remove_data_property_fact(subject, property_name)
+            self._queue_data_retraction(subject, property_name)
+        return self._propagate()
+
+    def replace_object_property(self, subject: str, property_name: str, object_val: str,
+                                keep: Optional[Set[str]] = None) -> int:
+        """把主语在某属性上的输入宾语替换为 object_val（keep 中的宾语保留），返回传播的事实数"""
+        propagated = 0
+        for old in list(self.kb.get_objects(subject, property_name)):
+            if old != object_val and not (keep and old in keep):
+                propagated += self.retract_object_property_fact(subject, property_name, old)
+        return propagated + self.assert_object_property_fact(subject, property_name, object_val)
+
+    def update_tunnel(self, tunnel_id: str, tunnel_type: Optional[str] = None, rock_grade: Optional[str] = None,
+                      hydro_condition: Optional[str] = None, soil_type: Optional[str] = None,
+                      tunnel_length: Optional[float] = None, tunnel_diameter: Optional[float] = None) -> int:
+        """
+        修改 KnowledgeBase.add_tunnel_individual 建模的隧道参数，只重新推理受影响的结论
+
+        例如只修改水文条件时，衬砌厚度、钢拱架间距等依赖水文条件的结论被撤销并重新推出，
+        施工方法（只依赖隧道长度）不会被重新计算。
+
+        Returns:
+            本次更新传播的事实数
+        """
+        gc_id = f"{tunnel_id}_gc"
+        propagated = 0
+        if tunnel_type is not None:
+            for old in list(self.kb.class_facts.get(tunnel_id, ())):
+                if old not in (tunnel_type, "TunnelProject"):
+                    propagated += self.retract_class_fact(tunnel_id, old)
+            propagated += self.assert_class_fact(tunnel_id, tunnel_type)
+        if rock_grade is not None:
+            propagated += self.replace_object_property(tunnel_id, "hasGeologicalCondition", rock_grade, keep={gc_id})
+            propagated += self.replace_object_property(gc_id, "hasRockGrade", rock_grade)
+        if hydro_condition is not None:
+            propagated += self.replace_object_property(tunnel_id, "hasHydroCondition", hydro_condition)
+            propagated += self.replace_object_property(gc_id, "hasHydroCondition", hydro_condition)
+        if soil_type is not None:
+            propagated += self.replace_object_property(tunnel_id, "hasSoilType", soil_type)
+            propagated += self.replace_object_property(gc_id, "hasSoilType", soil_type)
+        if tunnel_length is not None:
+            propagated += self.assert_data_property_fact(tunnel_id, "hasTunnelLength", tunnel_length)
+        if tunnel_diameter is not None:
+            propagated += self.assert_data_property_fact(tunnel_id, "hasTunnelDiameter", tunnel_diameter)
+        return propagated
@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推理后知识库的快照与恢复
+快照是一个紧凑的二进制文件：排序后的符号表 + 按键排序的整数列（类事实、对象属性事实、数据属性事实），
+恢复时用 mmap 映射文件，列直接作为 memoryview 使用，不重建任何字典；
+查找通过二分完成，按谓词解码出的集合在首次访问时缓存。
+恢复后新增的事实保存在内存中的叠加层，并可写入快照旁的追加日志（<快照>.journal），
+下次打开时只重放日志，不必重写整个快照；compact 把叠加层合并为新的快照。
+incremental_forward_chain 只对新增事实所在的连通分量推理，不必在整个快照上重新运行规则。
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from swrl_reasoner import KnowledgeBase, SWRLInferenceEngine
+from swrl_parallel import heads_stay_on_subjects, infer_facts
+
+
+MAGIC = b"SWRLKB01"
+VERSION = 1
+ALIGN = 8
+SHIFT = 32  # 复合键：高 32 位为第一个ID，低 32 位为第二个ID
+LOW_MASK = (1 << SHIFT) - 1
+
+# 数据属性取值类型
+KIND_INT, KIND_FLOAT, KIND_STR, KIND_BOOL = range(4)
+
+
+def _key(high: int, low: int) -> int:
+    return (high << SHIFT) | low
+
+
+def _pad(size: int) -> int:
+    return -size % ALIGN
+
+
+def _kb_views(kb: KnowledgeBase) -> Tuple[Dict, Dict, Dict]:
+    return kb.class_facts, kb.object_property_facts, kb.data_property_facts
+
+
+def save_snapshot(kb: KnowledgeBase, path: str) -> Dict[str, int]:
+    """
+    把知识库（任意实现）写为快照文件
+
+    Returns:
+        统计信息：符号数、各类事实数与文件字节数
+    """
+    class_facts, object_facts, data_facts = _kb_views(kb)
+
+    names: Set[str] = set()
+    for individual, classes in class_facts.items():
+        if classes:
+            names.add(individual)
+            names.update(classes)
+    for (subject, prop), objects in object_facts.items():
+        if objects:
+            names.add(subject)
+            names.add(prop)
+            names.update(objects)
+    for subject, values in data_facts.items():
+        for prop, value in values.items():
+            names.add(subject)
+            names.add(prop)
+            if isinstance(value, str):
+                names.add(value)
+    # 按 UTF-8 字节排序，使符号ID与名称顺序一致，恢复时可以二分查找名称
+    encoded = sorted(name.encode("utf-8") for name in names)
+    ids = {name.decode("utf-8"): i for i, name in enumerate(encoded)}
+    offsets = array("Q", [0])
+    for name in encoded:
+        offsets.append(offsets[-1] + len(name))
+
+    class_keys = sorted(_key(ids[c], ids[i]) for i, classes in class_facts.items() for c in classes)
+    triples = sorted((ids[s], ids[p], ids[o]) for (s, p), objects in object_facts.items() for o in objects)
+    inverse = sorted((p, o, s) for s, p, o in triples)
+    data_rows = sorted((ids[s], ids[p], value) for s, values in data_facts.items() for p, value in values.items())
+
+    data_kind, data_num, data_int = array("b"), array("d"), array("q")
+    for _, _, value in data_rows:
+        if isinstance(value, bool):
+            kind, number, integer = KIND_BOOL, 0.0, int(value)
+        elif isinstance(value, int):
+            kind, number, integer = KIND_INT, 0.0, value
+        elif isinstance(value, float):
+            kind, number, integer = KIND_FLOAT, value, 0
+        elif isinstance(value, str):
+            kind, number, integer = KIND_STR, 0.0, ids[value]
+        else:
+            raise TypeError(f"快照不支持的数据属性取值类型: {type(value).__name__}")
+        data_kind.append(kind)
+        data_num.append(number)
+        data_int.append(integer)
+
+    property_subjects: Dict[int, int] = {}
+    previous = None
+    for s, p, _ in triples:
+        if (s, p) != previous:
+            property_subjects[p] = property_subjects.get(p, 0) + 1
+            previous = (s, p)
+
+    sections = {
+        "symbols": array("B", b"".join(encoded)),
+        "symbol_offsets": offsets,
+        "class_keys": array("q", class_keys),
+        "class_ic": array("q", sorted(_key(key & LOW_MASK, key >> SHIFT) for key in class_keys)),
+        "object_sp": array("q", (_key(s, p) for s, p, _ in triples)),
+        "object_o": array("i", (o for _, _, o in triples)),
+        "object_po": array("q", (_key(p, o) for p, o, _ in inverse)),
+        "object_po_s": array("i", (s for _, _, s in inverse)),
+        "object_os": array("q", sorted({_key(o, s) for s, _, o in triples})),
+        "data_sp": array("q", (_key(s, p) for s, p, _ in data_rows)),
+        "data_ps": array("q", sorted(_key(p, s) for s, p, _ in data_rows)),
+        "data_kind": data_kind,
+        "data_num": data_num,
+        "data_int": data_int,
+    }
+    header = {
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "sections": {},
+        "property_subjects": {str(p): count for p, count in property_subjects.items()},
+        "class_individuals": len({key & LOW_MASK for key in class_keys}),
+        "object_keys": len(set(sections["object_sp"])),
+    }
+    # 先计算各段偏移，再写出文件头与数据
+    offset = 0
+    layout = []
+    for name, column in sections.items():
+        size = len(column) * column.itemsize
+        layout.append((name, column, offset))
+        header["sections"][name] = [offset, len(column), column.typecode]
+        offset += size + _pad(size)
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix = len(MAGIC) + 4 + len(header_bytes)
+    data_start = prefix + _pad(prefix)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (data_start - prefix))
+        for _, column, _ in layout:
+            raw = column.tobytes()
+            f.write(raw)
+            f.write(b"\0" * _pad(len(raw)))
+    os.replace(tmp_path, path)
+
+    return {"symbols": len(encoded), "class_facts": len(class_keys), "object_facts": len(triples),
+            "data_facts": len(data_rows), "bytes": os.path.getsize(path)}
+
+
+class SnapshotKnowledgeBase(KnowledgeBase):
+    """
+    由快照文件支撑的知识库，接口与 KnowledgeBase 一致
+
+    快照中的事实只读；新增事实进入叠加层（一个普通 KnowledgeBase），读取时两层合并。
+    数据属性按函数式处理，叠加层中的取值覆盖快照中的取值。
+    快照中的事实不能删除，因此 Rete 引擎的真值维护只适用于恢复后新增的事实。
+    """
+
+    def __init__(self, path: str, journal: bool = True):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"不是知识库快照文件: {path}")
+        (header_size,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(bytes(self._map[header_start:header_start + header_size]).decode("utf-8"))
+        if header["version"] != VERSION or header["byteorder"] != sys.byteorder:
+            raise ValueError(f"快照版本或字节序不兼容: {path}")
+        prefix = header_start + header_size
+        data_start = prefix + _pad(prefix)
+
+        view = memoryview(self._map)
+        columns = {}
+        for name, (offset, length, typecode) in header["sections"].items():
+            start = data_start + offset
+            size = length * array(typecode).itemsize
+            columns[name] = view[start:start + size].cast(typecode)
+        self._columns = columns
+        self._symbols = columns["symbols"]
+        self._offsets = columns["symbol_offsets"]
+        self._property_subjects = {int(p): count for p, count in header["property_subjects"].items()}
+        self._class_individuals = header["class_individuals"]
+        self._object_keys = header["object_keys"]
+
+        self._ids: Dict[str, Optional[int]] = {}  # 名称 → 符号ID 的查找缓存
+        self._names: Dict[int, str] = {}  # 符号ID → 名称 的解码缓存
+        self._decoded: Dict[tuple, Any] = {}  # 按谓词解码的集合缓存（快照只读，缓存永不失效）
+        self._shadowed: Dict[str, int] = {}  # 数据属性 → 叠加层中覆盖了快照取值的主语数
+        self.appended = KnowledgeBase()  # 恢复后新增的事实
+        self.pending: Set[str] = set()  # 有新增事实、尚未增量推理的主语
+
+        self._journal = None
+        journal_path = f"{path}.journal"
+        if os.path.exists(journal_path):
+            self._replay(journal_path)
+        if journal:
+            self._journal = open(journal_path, "a", encoding="utf-8")
+
+    # ---- 文件与日志 ----
+    def close(self):
+        """关闭快照映射与追加日志"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self._columns = {}
+        self._symbols = self._offsets = None
+        self._map.close()
+        self._file.close()
+
+    def flush(self):
+        if self._journal is not None:
+            self._journal.flush()
+
+    def _log(self, record: list):
+        if self._journal is not None:
+            self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _replay(self, journal_path: str):
+        journal, self._journal = self._journal, None
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                kind, *terms = json.loads(line)
+                if kind == "class":
+                    self.add_class_fact(*terms)
+                elif kind == "object":
+                    self.add_object_property_fact(*terms)
+                else:
+                    self.add_data_property_fact(*terms)
+        self._journal = journal
+
+    def compact(self, path: Optional[str] = None) -> Dict[str, int]:
+        """把快照与叠加层合并写为新快照；写回原路径时清空追加日志并重新打开"""
+        target = path or self.path
+        tmp_path = f"{target}.compact"
+        stats = save_snapshot(self, tmp_path)
+        if target != self.path:
+            os.replace(tmp_path, target)
+            return stats
+        self.close()
+        os.replace(tmp_path, target)
+        journal_path = f"{target}.journal"
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+        self.__init__(target)
+        return stats
+
+    # ---- 符号 ----
+    def _name(self, symbol: int) -> str:
+        name = self._names.get(symbol)
+        if name is None:
+            offsets = self._offsets
+            name = self._names[symbol] = bytes(self._symbols[offsets[symbol]:offsets[symbol + 1]]).decode("utf-8")
+        return name
+
+    def _id(self, name: str) -> Optional[int]:
+        """名称的符号ID；符号表按字节排序，二分查找"""
+        if name in self._ids:
+            return self._ids[name]
+        target = name.encode("utf-8")
+        symbols, offsets = self._symbols, self._offsets
+        lo, hi = 0, len(offsets) - 1
+        found = None
+        while lo < hi:
+            mid = (lo + hi) // 2
+            candidate = bytes(symbols[offsets[mid]:offsets[mid + 1]])
+            if candidate < target:
+                lo = mid + 1
+            elif candidate > target:
+                hi = mid
+            else:
+                found = mid
+                break
+        self._ids[name] = found
+        return found
+
+    # ---- 列上的范围查找 ----
+    def _range(self, column: str, low: int, high: int) -> Tuple[int, int]:
+        keys = self._columns[column]
+        return bisect.bisect_left(keys, low), bisect.bisect_left(keys, high)
+
+    def _prefix_range(self, column: str, first: int) -> Tuple[int, int]:
+        return self._range(column, _key(first, 0), _key(first + 1, 0))
+
+    def _contains(self, column: str, key: int) -> bool:
+        keys = self._columns[column]
+        i = bisect.bisect_left(keys, key)
+        return i < len(keys) and keys[i] == key
+
+    def _decode_set(self, cache_key: tuple, column: str, lo: int, hi: int, mask: bool) -> Set[str]:
+        cached = self._decoded.get(cache_key)
+        if cached is None:
+            values = self._columns[column][lo:hi]
+            name = self._name
+            cached = {name(v & LOW_MASK) for v in values} if mask else {name(v) for v in values}
+            self._decoded[cache_key] = cached
+        return cached
+
+    def _base_value(self, subject: int, prop: int) -> Any:
+        keys = self._columns["data_sp"]
+        i = bisect.bisect_left(keys, _key(subject, prop))
+        if i == len(keys) or keys[i] != _key(subject, prop):
+            return None
+        kind = self._columns["data_kind"][i]
+        if kind == KIND_FLOAT:
+            return self._columns["data_num"][i]
+        integer = self._columns["data_int"][i]
+        if kind == KIND_STR:
+            return self._name(integer)
+        return bool(integer) if kind == KIND_BOOL else integer
+
+    @staticmethod
+    def _merge(base: Set, appended: Set) -> Set:
+        return base | appended if appended else base
+
+    # ---- 写入（进入叠加层） ----
+    def add_class_fact(self, individual: str, class_name: str):
+        if self._has_base_class(individual, class_name) or self.appended.has_class_fact(individual, class_name):
+            return
+        self.appended.add_class_fact(individual, class_name)
+        self.pending.add(individual)
+        self._log(["class", individual, class_name])
+
+    def add_object_property_fact(self, subject: str, property_name: str, object_val: str):
+        if (self._has_base_object(subject, property_name, object_val)
+                or self.appended.has_object_property_fact(subject, property_name, object_val)):
+            return
+        self.appended.add_object_property_fact(subject, property_name, object_val)
+        self.pending.add(subject)
+        self._log(["object", subject, property_name, object_val])
+
+    def add_data_property_fact(self, subject: str, property_name: str, value: Any):
+        if self.get_data_property_value(subject, property_name) == value:
+            return
+        if (self.appended.get_data_property_value(subject, property_name) is None
+                and self._base_data(subject, property_name) is not None):
+            self._shadowed[property_name] = self._shadowed.get(property_name, 0) + 1
+        self.appended.add_data_property_fact(subject, property_name, value)
+        self.pending.add(subject)
+        self._log(["data", subject, property_name, value])
+
+    def remove_class_fact(self, individual: str, class_name: str):
+        if self._has_base_class(individual, class_name):
+            raise ValueError("快照中的事实为只读，不能删除")
+        self.appended.remove_class_fact(individual, class_name)
+
+    def remove_object_property_fact(self, subject: str, property_name: str, object_val: str):
+        if self._has_base_object(subject, property_name, object_val):
+            raise ValueError("快照中的事实为只读，不能删除")
+        self.appended.remove_object_property_fact(subject, property_name, object_val)
+
+    def remove_data_property_fact(self, subject: str, property_name: str):
+        if self._base_data(subject, property_name) is not None:
+            raise ValueError("快照中的事实为只读，不能删除")
+        self.appended.remove_data_property_fact(subject, property_name)
+
+    # ---- 快照层查找 ----
+    def _has_base_class(self, individual: str, class_name: str) -> bool:
+        individual_id, class_id = self._id(individual), self._id(class_name)
+        return individual_id is not None and class_id is not None and \
+            self._contains("class_keys", _key(class_id, individual_id))
+
+    def _has_base_object(self, subject: str, property_name: str, object_val: str) -> bool:
+        ids = (self._id(subject), self._id(property_name), self._id(object_val))
+        if None in ids:
+            return False
+        return object_val in self._base_objects(ids[0], ids[1])
+
+    def _base_objects(self, subject: int, prop: int) -> Set[str]:
+        lo, hi = self._range("object_sp", _key(subject, prop), _key(subject, prop + 1))
+        return self._decode_set(("objects", subject, prop), "object_o", lo, hi, mask=False)
+
+    def _base_data(self, subject: str, property_name: str) -> Any:
+        subject_id, prop_id = self._id(subject), self._id(property_name)
+        if subject_id is None or prop_id is None:
+            return None
+        return self._base_value(subject_id, prop_id)
+
+    # ---- 按个体取事实（增量推理使用） ----
+    def has_facts(self, individual: str) -> bool:
+        """个体是否作为类事实个体或属性主语出现（否则只是词汇常量）"""
+        if (individual in self.appended.class_facts or individual in self.appended.data_property_facts
+                or any(subject == individual for subject, _ in self.appended.object_property_facts)):
+            return True
+        symbol = self._id(individual)
+        if symbol is None:
+            return False
+        return any(lo < hi for lo, hi in (self._prefix_range(column, symbol)
+                                          for column in ("class_ic", "object_sp", "data_sp")))
+
+    def individual_facts(self, individual: str) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str, str]],
+                                                         List[Tuple[str, str, Any]]]:
+        """个体作为主语的全部事实（快照与叠加层合并），格式同 swrl_parallel.FactBatch"""
+        classes = {class_name for class_name in self.appended.class_facts.get(individual, ())}
+        objects = {(individual, prop, obj) for (subject, prop), values in self.appended.object_property_facts.items()
+                   if subject == individual for obj in values}
+        data = dict(self.appended.data_property_facts.get(individual, {}))
+        symbol = self._id(individual)
+        if symbol is not None:
+            name, columns = self._name, self._columns
+            lo, hi = self._prefix_range("class_ic", symbol)
+            classes.update(name(key & LOW_MASK) for key in columns["class_ic"][lo:hi])
+            lo, hi = self._prefix_range("object_sp", symbol)
+            objects.update((individual, name(key & LOW_MASK), name(obj))
+                           for key, obj in zip(columns["object_sp"][lo:hi], columns["object_o"][lo:hi]))
+            lo, hi = self._prefix_range("data_sp", symbol)
+            for key in columns["data_sp"][lo:hi]:
+                prop = name(key & LOW_MASK)
+                if prop not in data:
+                    data[prop] = self._base_value(symbol, key & LOW_MASK)
+        return ([(individual, class_name) for class_name in classes], list(objects),
+                [(individual, prop, value) for prop, value in data.items()])
+
+    def referrers(self, individual: str) -> Set[str]:
+        """以该个体为宾语的全部主语（任意对象属性）"""
+        subjects = {subject for (subject, _), values in self.appended.object_property_facts.items()
+                    if individual in values}
+        symbol = self._id(individual)
+        if symbol is not None:
+            lo, hi = self._prefix_range("object_os", symbol)
+            subjects.update(self._name(key & LOW_MASK) for key in self._columns["object_os"][lo:hi])
+        return subjects
+
+    # ---- 读取（与 KnowledgeBase 一致） ----
+    def has_class_fact(self, individual: str, class_name: str) -> bool:
+        return self.appended.has_class_fact(individual, class_name) or self._has_base_class(individual, class_name)
+
+    def has_object_property_fact(self, subject: str, property_name: str, object_val: str) -> bool:
+        return (self.appended.has_object_property_fact(subject, property_name, object_val)
+                or self._has_base_object(subject, property_name, object_val))
+
+    def get_data_property_value(self, subject: str, property_name: str) -> Any:
+        value = self.appended.get_data_property_value(subject, property_name)
+        return value if value is not None else self._base_data(subject, property_name)
+
+    def get_individuals_of_class(self, class_name: str) -> Set[str]:
+        class_id = self._id(class_name)
+        base: Set[str] = set()
+        if class_id is not None:
+            lo, hi = self._prefix_range("class_keys", class_id)
+            base = self._decode_set(("class", class_id), "class_keys", lo, hi, mask=True)
+        return self._merge(base, self.appended.get_individuals_of_class(class_name))
+
+    def get_objects(self, subject: str, property_name: str) -> Set[str]:
+        subject_id, prop_id = self._id(subject), self._id(property_name)
+        base = self._base_objects(subject_id, prop_id) if subject_id is not None and prop_id is not None else set()
+        return self._merge(base, self.appended.get_objects(subject, property_name))
+
+    def get_subjects(self, property_name: str, object_val: Optional[str] = None) -> Set[str]:
+        prop_id = self._id(property_name)
+        base: Set[str] = set()
+        if prop_id is not None and object_val is None:
+            lo, hi = self._prefix_range("object_po", prop_id)
+            base = self._decode_set(("subjects", prop_id), "object_po_s", lo, hi, mask=False)
+        elif prop_id is not None:
+            object_id = self._id(object_val)
+            if object_id is not None:
+                lo, hi = self._range("object_po", _key(prop_id, object_id), _key(prop_id, object_id + 1))
+                base = self._decode_set(("subjects", prop_id, object_id), "object_po_s", lo, hi, mask=False)
+        return self._merge(base, self.appended.get_subjects(property_name, object_val))
+
+    def get_property_pairs(self, property_name: str) -> Set[Tuple[str, str]]:
+        prop_id = self._id(property_name)
+        base: Set[Tuple[str, str]] = set()
+        if prop_id is not None:
+            lo, hi = self._prefix_range("object_po", prop_id)
+            keys, subjects, name = self._columns["object_po"], self._columns["object_po_s"], self._name
+            base = {(name(subjects[i]), name(keys[i] & LOW_MASK)) for i in range(lo, hi)}
+        return self._merge(base, self.appended.get_property_pairs(property_name))
+
+    def get_data_property_subjects(self, property_name: str) -> Set[str]:
+        prop_id = self._id(property_name)
+        base: Set[str] = set()
+        if prop_id is not None:
+            lo, hi = self._prefix_range("data_ps", prop_id)
+            base = self._decode_set(("data", prop_id), "data_ps", lo, hi, mask=True)
+        return self._merge(base, self.appended.get_data_property_subjects(property_name))
+
+    def count_individuals_of_class(self, class_name: str) -> int:
+        class_id = self._id(class_name)
+        base = 0
+        if class_id is not None:
+            lo, hi = self._prefix_range("class_keys", class_id)
+            base = hi - lo
+        return base + self.appended.count_individuals_of_class(class_name)
+
+    def count_subjects(self, property_name: str, object_val: Optional[str] = None) -> int:
+        prop_id = self._id(property_name)
+        base = 0
+        if prop_id is not None and object_val is None:
+            base = self._property_subjects.get(prop_id, 0)
+        elif prop_id is not None and self._id(object_val) is not None:
+            object_id = self._id(object_val)
+            lo, hi = self._range("object_po", _key(prop_id, object_id), _key(prop_id, object_id + 1))
+            base = hi - lo
+        return base + self.appended.count_subjects(property_name, object_val)
+
+    def count_property_pairs(self, property_name: str) -> int:
+        prop_id = self._id(property_name)
+        base = 0
+        if prop_id is not None:
+            lo, hi = self._prefix_range("object_po", prop_id)
+            base = hi - lo
+        return base + self.appended.count_property_pairs(property_name)
+
+    def count_data_property_subjects(self, property_name: str) -> int:
+        prop_id = self._id(property_name)
+        base = 0
+        if prop_id is not None:
+            lo, hi = self._prefix_range("data_ps", prop_id)
+            base = hi - lo
+        return (base + self.appended.count_data_property_subjects(property_name)
+                - self._shadowed.get(property_name, 0))
+
+    def key_count(self) -> int:
+        return self._class_individuals + self._object_keys + self.appended.key_count()
+
+    # ---- 解码视图（只读副本） ----
+    @property
+    def class_facts(self) -> Dict[str, Set[str]]:
+        name = self._name
+        facts: Dict[str, Set[str]] = {}
+        for key in self._columns["class_keys"]:
+            facts.setdefault(name(key & LOW_MASK), set()).add(name(key >> SHIFT))
+        for individual, classes in self.appended.class_facts.items():
+            facts.setdefault(individual, set()).update(classes)
+        return facts
+
+    @property
+    def object_property_facts(self) -> Dict[Tuple[str, str], Set[str]]:
+        name = self._name
+        facts: Dict[Tuple[str, str], Set[str]] = {}
+        for key, obj in zip(self._columns["object_sp"], self._columns["object_o"]):
+            facts.setdefault((name(key >> SHIFT), name(key & LOW_MASK)), set()).add(name(obj))
+        for key, objects in self.appended.object_property_facts.items():
+            facts.setdefault(key, set()).update(objects)
+        return facts
+
+    @property
+    def data_property_facts(self) -> Dict[str, Dict[str, Any]]:
+        name = self._name
+        facts: Dict[str, Dict[str, Any]] = {}
+        for key in self._columns["data_sp"]:
+            subject, prop = key >> SHIFT, key & LOW_MASK
+            facts.setdefault(name(subject), {})[name(prop)] = self._base_value(subject, prop)
+        for subject, values in self.appended.data_property_facts.items():
+            facts.setdefault(subject, {}).update(values)
+        return facts
+
+
+def load_snapshot(path: str, journal: bool = True) -> SnapshotKnowledgeBase:
+    """打开快照文件（mmap），重放追加日志；journal 为 False 时新增事实不写入日志"""
+    return SnapshotKnowledgeBase(path, journal)
+
+
+def incremental_forward_chain(engine: SWRLInferenceEngine, engine_class: Any = None,
+                              **chain_options) -> Dict[str, int]:
+    """
+    只对恢复后新增事实所在的连通分量推理，并把推出的事实合并回快照知识库
+
+    与 swrl_parallel 的分区推理同理：规则头的主语总在规则体的主语位置时，各连通分量互不影响，
+    分量内推理的结果与在整个知识库上运行 forward_chain 一致。
+    条件不满足时退回到 engine.forward_chain。溯源日志只记录在临时引擎中，不合并回 engine。
+
+    Returns:
+        统计信息：分量中的个体数、输入事实数与合并的事实数
+    """
+    kb = engine.kb
+    if not heads_stay_on_subjects(engine.rules):
+        engine.forward_chain(**chain_options)
+        kb.pending.clear()
+        return {"individuals": None, "facts": None, "merged_facts": None}
+
+    # 从待推理主语出发，沿对象属性双向扩展连通分量；没有事实的宾语是词汇常量，不扩展
+    component = set()
+    frontier = [individual for individual in kb.pending if kb.has_facts(individual)]
+    batch: Tuple[list, list, list] = ([], [], [])
+    while frontier:
+        individual = frontier.pop()
+        if individual in component:
+            continue
+        component.add(individual)
+        classes, objects, data = kb.individual_facts(individual)
+        batch[0].extend(classes)
+        batch[1].extend(objects)
+        batch[2].extend(data)
+        neighbours = {obj for _, _, obj in objects} | kb.referrers(individual)
+        frontier.extend(node for node in neighbours if node not in component and kb.has_facts(node))
+
+    merged = 0
+    if component:
+        classes, objects, data = infer_facts(engine.rules, batch, engine_class or type(engine), **chain_options)
+        for individual, class_name in classes:
+            kb.add_class_fact(individual, class_name)
+        for subject, prop, obj in objects:
+            kb.add_object_property_fact(subject, prop, obj)
+        for subject, prop, value in data:
+            kb.add_data_property_fact(subject, prop, value)
+        merged = len(classes) + len(objects) + len(data)
+    kb.pending.clear()
+    return {"individuals": len(component), "facts": sum(map(len, batch)), "merged_facts": merged}
+
+
+def restore_engine(rules: List[Any], path: str, engine_class: Any = SWRLInferenceEngine,
+                   journal: bool = True, **engine_options) -> SWRLInferenceEngine:
+    """
+    创建推理引擎并以快照作为其知识库
+
+    恢复后的知识库已是推理结果；新增隧道后调用 incremental_forward_chain 只推理新事实所在的分量，
+    也可以照常调用 forward_chain（在整个知识库上重新运行规则）。
+    InternedInferenceEngine 使用自己的整数ID知识库，不能直接挂接快照。
+    """
+    engine = engine_class(rules, **engine_options)
+    if hasattr(engine.kb, "add_class_fact_id"):
+        raise TypeError("整数ID引擎不支持以快照作为知识库，请使用 SWRLInferenceEngine 或 ReteInferenceEngine")
+    engine.kb = load_snapshot(path, journal)
+    engine.planner.kb = engine.kb
+    return engine
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+隧道规则的预编译调度
+直接由 tunnel_rules.TUNNEL_RULES 编译，逐组参数求出全部规则头属性，结果与在知识库上运行
+SWRLInferenceEngine（分层求值）一致：
+- 规则先经 swrl_analyzer 去掉永远会被覆盖的规则头，再按引擎的求值顺序（分层，层内按规则顺序）排列；
+- 每条规则拆成分类条件（类原子与对象属性原子）和数值程序（数据属性原子读取取值、内置函数求值）；
+- 分类条件按 add_tunnel_individual 的建模约定在 (隧道类型, 围岩等级, 水文条件, 土壤类型) 键上判定，
+  每个键只在第一次出现时选出适用的规则，只有常量规则头的规则折叠为一个字典，
+  之后同一键的调用只执行数值程序。
+next_program 的库接口与命令行（json_to_owl_inference）共用这里的调度，参数先经 tunnel_vocabulary 规范化。
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Any, Callable, Optional, Tuple, Union
+
+from swrl_reasoner import ClassAtom, ObjectPropertyAtom, DataPropertyAtom, BuiltInAtom
+from swrl_builtins import BUILTINS
+from swrl_analyzer import RuleAnalyzer, ROOT_CLASS, rules_from_dicts
+from tunnel_rules import TUNNEL_RULES
+from tunnel_vocabulary import normalize_params
+
+
+# 参数字典中的数据属性输入（取值为数值）
+DATA_PARAMETERS = ("hasTunnelLength", "hasTunnelDiameter")
+
+
+def _is_variable(term: Any) -> bool:
+    return isinstance(term, str) and term.startswith(':')
+
+
+@dataclass(frozen=True)
+class _Program:
+    """
+    一条规则的数值部分
+
+    reads: (数据属性, 变量或常量)，变量从取值中绑定，常量要求取值相等
+    builtins: (内置函数, 输入项, 输出变量)，输入项为 (变量, 字面量) 对
+    heads: (属性, 变量或常量, 是否对象属性)
+    """
+    index: int
+    reads: Tuple[Tuple[str, Any], ...]
+    builtins: Tuple[Tuple[Any, Tuple[Tuple[Optional[str], Any], ...], Optional[str]], ...]
+    heads: Tuple[Tuple[str, Any, bool], ...]
+
+    @property
+    def constant(self) -> bool:
+        return not self.reads and not self.builtins and not any(_is_variable(value) for _, value, _ in self.heads)
+
+    def run(self, values: Dict[str, Any]) -> bool:
+        """在取值上求值，触发时写入规则头并返回 True"""
+        bindings: Dict[str, Any] = {}
+        for prop, term in self.reads:
+            value = values.get(prop)
+            if value is None:
+                return False
+            if _is_variable(term):
+                if bindings.setdefault(term, value) != value:
+                    return False
+            elif term != value:
+                return False
+
+        for spec, arguments, output in self.builtins:
+            inputs = []
+            for var, literal in arguments:
+                value = literal if var is None else bindings.get(var)
+                if value is None:
+                    return False
+                inputs.append(value)
+            try:
+                result = spec.scalar(*inputs)
+            except Exception:
+                return False
+            if output is None:
+                if not result:
+                    return False
+            elif result is None:
+                return False
+            else:
+                bindings[output] = result
+
+        for prop, term, is_object in self.heads:
+            value = bindings.get(term) if _is_variable(term) else term
+            if value is None:
+                continue
+            _write(values, prop, value, is_object)
+        return True
+
+
+def _write(values: Dict[str, Any], prop: str, value: Any, is_object: bool):
+    """数据属性是函数式的，后写入的覆盖先写入的；对象属性累积，多个宾语时为排序后的元组"""
+    if not is_object or values.get(prop) in (None, value):
+        values[prop] = value
+        return
+    current = values[prop]
+    objects = set(current) if isinstance(current, tuple) else {current}
+    objects.add(value)
+    values[prop] = tuple(sorted(objects))
+
+
+def _round(values: Dict[str, Any], rounding: Optional[Dict[str, int]]):
+    for prop, digits in (rounding or {}).items():
+        if isinstance(values.get(prop), float):
+            values[prop] = round(values[prop], digits)
+
+
+@dataclass(frozen=True)
+class _Plan:
+    """一个分类键上的调度：先写入折叠后的常量，再依次执行数值程序"""
+    constants: Tuple[Tuple[str, Any, bool], ...]
+    programs: Tuple[_Program, ...]
+
+
+class TunnelRuleDispatcher:
+    """
+    预编译的隧道规则调度
+
+    规则体只能含类原子、对象属性原子、以规则头主语为主语的数据属性原子和内置原子，
+    规则头只能写规则头主语；其它形式的规则无法按键调度，编译时报错。
+    """
+
+    def __init__(self, rule_dicts: Optional[Dict[str, Dict[str, Any]]] = None):
+        rules = rules_from_dicts(TUNNEL_RULES if rule_dicts is None else rule_dicts)
+        self.analyzer = RuleAnalyzer(rules)
+        self.programs: List[Tuple[_Program, str]] = []
+        for i in sorted(range(len(rules)), key=lambda i: (self.analyzer.stratum[i], i)):
+            program = self._compile(i)
+            if program is not None:
+                self.programs.append(program)
+        self.head_properties = list(dict.fromkeys(prop for program, _ in self.programs
+                                                  for prop, _, _ in program.heads))
+        self.plans: Dict[Tuple[str, str, str, str], _Plan] = {}
+
+    def _compile(self, index: int) -> Optional[Tuple[_Program, str]]:
+        rule = self.analyzer.rules[index]
+        dead = self.analyzer.dead_heads.get(index, set())
+        head = [atom for h, atom in enumerate(rule.head) if h not in dead]
+        if not head:
+            return None
+        subjects = {getattr(atom, "subject", None) for atom in head}
+        if len(subjects) != 1 or any(not isinstance(atom, (DataPropertyAtom, ObjectPropertyAtom)) for atom in head):
+            raise ValueError(f"{self.analyzer.describe(index)} 的规则头不是同一主语上的属性，无法按键调度")
+        subject = subjects.pop()
+
+        reads, builtins = [], []
+        for atom in rule.body:
+            if isinstance(atom, DataPropertyAtom):
+                if atom.subject != subject:
+                    raise ValueError(f"{self.analyzer.describe(index)} 读取了其它主语的数据属性，无法按键调度")
+                reads.append((atom.property_name, atom.value))
+            elif isinstance(atom, BuiltInAtom):
+                spec = BUILTINS.get(atom.function_name)
+                if spec is None or len(atom.arguments) < spec.min_arguments:
+                    return None  # 引擎中同样永远不会触发
+                if spec.assigns:
+                    builtins.append((spec, tuple(atom.arguments[1:spec.arity + 1]), atom.variables[0]))
+                else:
+                    builtins.append((spec, tuple(atom.arguments[:spec.arity]), None))
+        heads = tuple((atom.property_name, atom.object if isinstance(atom, ObjectPropertyAtom) else atom.value,
+                       isinstance(atom, ObjectPropertyAtom)) for atom in head)
+        return _Program(index, tuple(reads), tuple(builtins), heads), subject
+
+    def plan(self, tunnel_type: str, rock_grade: str, hydro_condition: str,
+             soil_type: str = "MediumSoil") -> _Plan:
+        """分类键上的调度（第一次出现时编译）"""
+        key = (tunnel_type, rock_grade, hydro_condition, soil_type)
+        plan = self.plans.get(key)
+        if plan is None:
+            plan = self.plans[key] = self._compile_plan(*key)
+        return plan
+
+    def _compile_plan(self, tunnel_type: str, rock_grade: str, hydro_condition: str, soil_type: str) -> _Plan:
+        # 与 add_tunnel_individual 相同的建模方式
+        facts = [ClassAtom(ROOT_CLASS, ":t"),
+                 ObjectPropertyAtom("hasGeologicalCondition", ":t", ":gc"),
+                 ObjectPropertyAtom("hasGeologicalCondition", ":t", rock_grade),
+                 ObjectPropertyAtom("hasHydroCondition", ":t", hydro_condition),
+                 ObjectPropertyAtom("hasSoilType", ":t", soil_type),
+                 ObjectPropertyAtom("hasRockGrade", ":gc", rock_grade),
+                 ObjectPropertyAtom("hasHydroCondition", ":gc", hydro_condition),
+                 ObjectPropertyAtom("hasSoilType", ":gc", soil_type)]
+        if tunnel_type != ROOT_CLASS:
+            facts.append(ClassAtom(tunnel_type, ":t"))
+        instance = self.analyzer.fact_instance(facts)
+        applicable = [program for program, subject in self.programs
+                      if self.analyzer.matches(instance, program.index, subject)]
+
+        # 常量规则头的属性没有数值程序写入时，写入顺序与数值程序无关，可以折叠
+        computed = {prop for program in applicable if not program.constant for prop, _, _ in program.heads}
+        folded: Dict[str, Any] = {}
+        kinds: Dict[str, bool] = {}
+        programs = []
+        for program in applicable:
+            if program.constant and not any(prop in computed for prop, _, _ in program.heads):
+                for prop, value, is_object in program.heads:
+                    _write(folded, prop, value, is_object)
+                    kinds[prop] = is_object
+            else:
+                programs.append(program)
+        constants = tuple((prop, value, kinds[prop]) for prop, value in folded.items())
+        return _Plan(constants, tuple(programs))
+
+    def infer(self, tunnel_type: str, rock_grade: str, hydro_condition: str, soil_type: str = "MediumSoil",
+              data: Optional[Dict[str, Any]] = None,
+              defaults: Optional[Dict[str, Union[Any, Callable[[Dict[str, Any]], Any]]]] = None,
+              rounding: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """
+        对一组参数执行调度，返回规则头属性 → 取值（没有规则触发的属性不出现）
+
+        Args:
+            tunnel_type, rock_grade, hydro_condition, soil_type: 规则词汇中的分类取值
+            data: 数据属性输入，如 {"hasTunnelLength": 2500, "hasTunnelDiameter": 12.0}
+            defaults: 没有规则写入时的默认取值（常量，或以输入取值字典为参数的函数）；
+                      默认值在规则之前写入，所以读取该属性的后续规则会看到默认值
+            rounding: 属性 → 小数位数；这些属性每次写入后立即舍入，后续规则读到的是舍入后的取值
+        """
+        values = dict(data or {})
+        inputs = set(values)
+        for prop, default in (defaults or {}).items():
+            value = default(values) if callable(default) else default
+            if value is not None:
+                values[prop] = value
+        plan = self.plan(tunnel_type, rock_grade, hydro_condition, soil_type)
+        for prop, value, is_object in plan.constants:
+            if is_object and prop in values:
+                _write(values, prop, value, True)
+            else:
+                values[prop] = value
+        _round(values, rounding)
+        for program in plan.programs:
+            if program.run(values):
+                _round(values, rounding)
+        return {prop: value for prop, value in values.items() if prop not in inputs}
+
+    def infer_params(self, params: Dict[str, Any], defaults=None, rounding=None) -> Dict[str, Any]:
+        """
+        按参数字典（与 next_program / Web 端的 JSON 相同的键）调度
+
+        分类取值先统一为规则词汇；缺省取值与 swrl_batch / add_tunnel_individual 一致
+        （隧道类型 TunnelProject，土壤类型 MediumSoil）
+        """
+        params = normalize_params(params)
+        data = {prop: params[prop] for prop in DATA_PARAMETERS if params.get(prop) is not None}
+        return self.infer(params.get("tunnelType") or ROOT_CLASS,
+                          params.get("hasGeologicalCondition") or "",
+                          params.get("hasHydroCondition") or "",
+                          params.get("hasSoilType") or "MediumSoil",
+                          data, defaults, rounding)
+
+
+_default_dispatcher: Optional[TunnelRuleDispatcher] = None
+
+
+def get_dispatcher() -> TunnelRuleDispatcher:
+    """获取基于 TUNNEL_RULES 的默认调度（首次调用时编译）"""
+    global _default_dispatcher
+    if _default_dispatcher is None:
+        _default_dispatcher = TunnelRuleDispatcher()
+    return _default_dispatcher
@@ -5,7 +5,9 @@
 包含149个推理规则的Python实现
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+from functools import lru_cache
+from types import MappingProxyType
 import math
 
 # 规则数据结构
@@ -1155,9 +1157,11 @@ TUNNEL_RULES = {
         "body": [
             {"type": "class", "class_name": "TunnelProject", "individual": ":t"},
             {"type": "object_property", "property_name": "hasGeologicalCondition", "subject": ":t", "object": "RockGrade_I"},
+            {"type": "data_property", "property_name": "hasTunnelDiameter", "subject": ":t", "value": ':d'},
             {"type": "builtin", "function_name": "multiply", "variables": [':len', ':d', '0.25']},
         ],
         "head": [
+            {"type": "data_property", "property_name": "hasBoltLength", "subject": ":t", "value": ':len'},
         ]
     },
     "91": {
@@ -1166,9 +1170,11 @@ TUNNEL_RULES = {
         "body": [
             {"type": "class", "class_name": "TunnelProject", "individual": ":t"},
             {"type": "object_property", "property_name": "hasGeologicalCondition", "subject": ":t", "object": "RockGrade_II"},
+            {"type": "data_property", "property_name": "hasTunnelDiameter", "subject": ":t", "value": ':d'},
             {"type": "builtin", "function_name": "multiply", "variables": [':len', ':d', '0.3']},
         ],
         "head": [
+            {"type": "data_property", "property_name": "hasBoltLength", "subject": ":t", "value": ':len'},
         ]
     },
     "92": {
@@ -1177,6 +1183,8 @@ TUNNEL_RULES = {
         "body": [
             {"type": "class", "class_name": "TunnelProject", "individual": ":t"},
             {"type": "object_property", "property_name": "hasGeologicalCondition", "subject": ":t", "object": "RockGrade_III"},
+            {"type": "data_property", "property_name": "hasTunnelDiameter", "subject": ":t", "value": ':w'},
+            {"type": "data_property", "property_name": "hasBoltLength", "subject": ":t", "value": ':len'},
             {"type": "builtin", "function_name": "divide", "variables": [':len', ':w', '3']},
         ],
         "head": [
@@ -1188,9 +1196,11 @@ TUNNEL_RULES = {
         "body": [
             {"type": "class", "class_name": "TunnelProject", "individual": ":t"},
             {"type": "object_property", "property_name": "hasGeologicalCondition", "subject": ":t", "object": "RockGrade_IV"},
+            {"type": "data_property", "property_name": "hasTunnelDiameter", "subject": ":t", "value": ':d'},
             {"type": "builtin", "function_name": "multiply", "variables": [':len', ':d', '0.45']},
         ],
         "head": [
+            {"type": "data_property", "property_name": "hasBoltLength", "subject": ":t", "value": ':len'},
         ]
     },
     "94": {
@@ -1199,6 +1209,8 @@ TUNNEL_RULES = {
         "body": [
             {"type": "class", "class_name": "TunnelProject", "individual": ":t"},
             {"type": "object_property", "property_name": "hasGeologicalCondition", "subject": ":t", "object": "RockGrade_V"},
+            {"type": "data_property", "property_name": "hasTunnelDiameter", "subject": ":t", "value": ':d'},
+            {"type": "data_property", "property_name": "hasBoltLength", "subject": ":t", "value": ':len'},
             {"type": "builtin", "function_name": "divide", "variables": [':len', ':d', '2']},
         ],
         "head": [
@@ -1209,9 +1221,11 @@ TUNNEL_RULES = {
         "comment": "锚杆间距与岩石等级的关系，结合岩体质量和长度推荐: 锚杆间距 =锚杆长度/2，规范建议锚杆间距应为锚杆长度的一半或更密集(IS 15026规则)",
         "body": [
             {"type": "class", "class_name": "TunnelProject", "individual": ":t"},
+            {"type": "data_property", "property_name": "hasBoltLength", "subject": ":t", "value": ':len'},
             {"type": "builtin", "function_name": "divide", "variables": [':spacing', ':len', '2']},
         ],
         "head": [
+            {"type": "data_property", "property_name": "hasBoltSpacing", "subject": ":t", "value": ':spacing'},
         ]
     },
     "96": {
@@ -1219,11 +1233,14 @@ TUNNEL_RULES = {
         "comment": "计算列数（圆弧长度 / 间距）",
         "body": [
             {"type": "class", "class_name": "TunnelProject", "individual": ":t"},
+            {"type": "data_property", "property_name": "hasTunnelDiameter", "subject": ":t", "value": ':D'},
+            {"type": "data_property", "property_name": "hasBoltSpacing", "subject": ":t", "value": ':S'},
             {"type": "builtin", "function_name": "multiply", "variables": [':arcLength', ':D', '3.1416']},
             {"type": "builtin", "function_name": "divide", "variables": [':colCountRaw', ':arcLength', ':S']},
             {"type": "builtin", "function_name": "floor", "variables": [':colCount', ':colCountRaw']},
         ],
         "head": [
+            {"type": "data_property", "property_name": "hasBoltColumnCount", "subject": ":t", "value": ':colCount'},
         ]
     },
     "97": {
@@ -1231,10 +1248,13 @@ TUNNEL_RULES = {
         "comment": "计算行数（隧道长度 / 锚杆间距）《岩土锚杆技术规程》（JGJ 120）",
         "body": [
             {"type": "class", "class_name": "TunnelProject", "individual": ":t"},
+            {"type": "data_property", "property_name": "hasTunnelLength", "subject": ":t", "value": ':L'},
+            {"type": "data_property", "property_name": "hasBoltSpacing", "subject": ":t", "value": ':S'},
             {"type": "builtin", "function_name": "divide", "variables": [':rowCountRaw', ':L', ':S']},
             {"type": "builtin", "function_name": "floor", "variables": [':rowCount', ':rowCountRaw']},
         ],
         "head": [
+            {"type": "data_property", "property_name": "hasBoltRowCount", "subject": ":t", "value": ':rowCount'},
         ]
     },
     "98": {
@@ -1242,10 +1262,13 @@ TUNNEL_RULES = {
         "comment": "钢拱架数量 = 长度 / 间距，四舍五入",
         "body": [
             {"type": "class", "class_name": "TunnelProject", "individual": ":t"},
+            {"type": "data_property", "property_name": "hasTunnelLength", "subject": ":t", "value": ':len'},
+            {"type": "data_property", "property_name": "hasSteelArchSpacing", "subject": ":t", "value": ':spacing'},
             {"type": "builtin", "function_name": "divide", "variables": [':rawCount', ':len', ':spacing']},
             {"type": "builtin", "function_name": "round", "variables": [':count', ':rawCount']},
         ],
         "head": [
+            {"type": "data_property", "property_name": "hasSteelArchCount", "subject": ":t", "value": ':count'},
         ]
     },
     "99": {
@@ -1253,6 +1276,7 @@ TUNNEL_RULES = {
         "comment": "隧道长度大于3000m选择钻爆法",
         "body": [
             {"type": "class", "class_name": "TunnelProject", "individual": ":t"},
+            {"type": "data_property", "property_name": "hasTunnelLength", "subject": ":t", "value": ':len'},
             {"type": "builtin", "function_name": "greaterThan", "variables": [':len', '3000']},
         ],
         "head": [
@@ -1264,6 +1288,7 @@ TUNNEL_RULES = {
         "comment": "隧道长度 ≤ 3000 → 使用盾构法（TBM_001）",
         "body": [
             {"type": "class", "class_name": "TunnelProject", "individual": ":t"},
+            {"type": "data_property", "property_name": "hasTunnelLength", "subject": ":t", "value": ':len'},
             {"type": "builtin", "function_name": "lessThanOrEqual", "variables": [':len', '3000']},
         ],
         "head": [
@@ -1899,149 +1924,161 @@ TUNNEL_RULES = {
     },
 }
 
-def infer_lining_thickness(tunnel_type: str, rock_grade: str, hydro_condition: str) -> Optional[float]:
-    """快速推断衬砌厚度"""
-    rules_map = {
-        ("DeepTunnelProject", "RockGrade_I", "Dry"): 25.0,
-        ("DeepTunnelProject", "RockGrade_II", "Dry"): 27.5,
-        ("DeepTunnelProject", "RockGrade_III", "Dry"): 30.0,
-        ("DeepTunnelProject", "RockGrade_V", "Dry"): 35.0,
-        ("DeepTunnelProject", "RockGrade_I", "WaterRich"): 27.5,
-        ("DeepTunnelProject", "RockGrade_II", "WaterRich"): 30.0,
-        ("DeepTunnelProject", "RockGrade_III", "WaterRich"): 32.5,
-        ("DeepTunnelProject", "RockGrade_IV", "WaterRich"): 35.0,
-        ("DeepTunnelProject", "RockGrade_IV", "WaterRich"): 35.0,
-        ("DeepTunnelProject", "RockGrade_V", "WaterRich"): 37.5,
-        ("MountainTunnelProject", "RockGrade_I", "Dry"): 20.0,
-        ("MountainTunnelProject", "RockGrade_II", "Dry"): 22.5,
-        ("MountainTunnelProject", "RockGrade_III", "Dry"): 25.0,
-        ("MountainTunnelProject", "RockGrade_IV", "Dry"): 27.5,
-        ("MountainTunnelProject", "RockGrade_V", "Dry"): 30.0,
-        ("MountainTunnelProject", "RockGrade_I", "WaterRich"): 22.5,
-        ("MountainTunnelProject", "RockGrade_II", "WaterRich"): 25.0,
-        ("MountainTunnelProject", "RockGrade_III", "WaterRich"): 27.5,
-        ("MountainTunnelProject", "RockGrade_IV", "WaterRich"): 30.0,
-        ("MountainTunnelProject", "RockGrade_V", "WaterRich"): 32.5,
-        ("ShallowTunnelProject", "RockGrade_I", "Dry"): 22.5,
-        ("ShallowTunnelProject", "RockGrade_II", "Dry"): 25.0,
-        ("ShallowTunnelProject", "RockGrade_III", "Dry"): 27.5,
-        ("ShallowTunnelProject", "RockGrade_IV", "Dry"): 30.0,
-        ("ShallowTunnelProject", "RockGrade_V", "Dry"): 32.5,
-        ("ShallowTunnelProject", "RockGrade_I", "WaterRich"): 25.0,
-        ("ShallowTunnelProject", "RockGrade_II", "WaterRich"): 27.5,
-        ("ShallowTunnelProject", "RockGrade_III", "WaterRich"): 30.0,
-        ("ShallowTunnelProject", "RockGrade_IV", "WaterRich"): 32.5,
-        ("ShallowTunnelProject", "RockGrade_V", "WaterRich"): 35.0,
-        ("TunnelProject", "RockGrade_V", "WaterRich"): 45.0,
-        ("UnderwaterTunnelProject", "RockGrade_I", "Dry"): 25.0,
-        ("UnderwaterTunnelProject", "RockGrade_II", "Dry"): 27.5,
-        ("UnderwaterTunnelProject", "RockGrade_III", "Dry"): 30.0,
-        ("UnderwaterTunnelProject", "RockGrade_IV", "Dry"): 32.5,
-        ("UnderwaterTunnelProject", "RockGrade_V", "Dry"): 35.0,
-        ("UnderwaterTunnelProject", "RockGrade_I", "WaterRich"): 27.5,
-        ("UnderwaterTunnelProject", "RockGrade_II", "WaterRich"): 30.0,
-        ("UnderwaterTunnelProject", "RockGrade_III", "WaterRich"): 32.5,
-        ("UnderwaterTunnelProject", "RockGrade_IV", "WaterRich"): 35.0,
-        ("UnderwaterTunnelProject", "RockGrade_V", "WaterRich"): 37.5,
-        ("UrbanTunnelProject", "RockGrade_I", "Dry"): 22.5,
-        ("UrbanTunnelProject", "RockGrade_II", "Dry"): 25.0,
-        ("UrbanTunnelProject", "RockGrade_III", "Dry"): 27.5,
-        ("UrbanTunnelProject", "RockGrade_IV", "Dry"): 30.0,
-        ("UrbanTunnelProject", "RockGrade_V", "Dry"): 32.5,
-        ("UrbanTunnelProject", "RockGrade_I", "WaterRich"): 25.0,
-        ("UrbanTunnelProject", "RockGrade_II", "WaterRich"): 27.5,
-        ("UrbanTunnelProject", "RockGrade_III", "WaterRich"): 30.0,
-        ("UrbanTunnelProject", "RockGrade_IV", "WaterRich"): 32.5,
-        ("UrbanTunnelProject", "RockGrade_V", "WaterRich"): 35.0,
-    }
-    return rules_map.get((tunnel_type, rock_grade, hydro_condition))
+# 衬砌厚度：(隧道类型, 围岩等级, 水文条件[, 土壤类型]) → 厚度
+LINING_THICKNESS_TABLE = MappingProxyType({
+    ("DeepTunnelProject", "RockGrade_I", "Dry"): 25.0,
+    ("DeepTunnelProject", "RockGrade_II", "Dry"): 27.5,
+    ("DeepTunnelProject", "RockGrade_III", "Dry"): 30.0,
+    ("DeepTunnelProject", "RockGrade_V", "Dry"): 35.0,
+    ("DeepTunnelProject", "RockGrade_I", "WaterRich"): 27.5,
+    ("DeepTunnelProject", "RockGrade_II", "WaterRich"): 30.0,
+    ("DeepTunnelProject", "RockGrade_III", "WaterRich"): 32.5,
+    ("DeepTunnelProject", "RockGrade_IV", "WaterRich"): 35.0,
+    ("DeepTunnelProject", "RockGrade_V", "WaterRich"): 37.5,
+    ("MountainTunnelProject", "RockGrade_I", "Dry"): 20.0,
+    ("MountainTunnelProject", "RockGrade_II", "Dry"): 22.5,
+    ("MountainTunnelProject", "RockGrade_III", "Dry"): 25.0,
+    ("MountainTunnelProject", "RockGrade_IV", "Dry"): 27.5,
+    ("MountainTunnelProject", "RockGrade_V", "Dry"): 30.0,
+    ("MountainTunnelProject", "RockGrade_I", "WaterRich"): 22.5,
+    ("MountainTunnelProject", "RockGrade_II", "WaterRich"): 25.0,
+    ("MountainTunnelProject", "RockGrade_III", "WaterRich"): 27.5,
+    ("MountainTunnelProject", "RockGrade_IV", "WaterRich"): 30.0,
+    ("MountainTunnelProject", "RockGrade_V", "WaterRich"): 32.5,
+    ("ShallowTunnelProject", "RockGrade_I", "Dry"): 22.5,
+    ("ShallowTunnelProject", "RockGrade_II", "Dry"): 25.0,
+    ("ShallowTunnelProject", "RockGrade_III", "Dry"): 27.5,
+    ("ShallowTunnelProject", "RockGrade_IV", "Dry"): 30.0,
+    ("ShallowTunnelProject", "RockGrade_V", "Dry"): 32.5,
+    ("ShallowTunnelProject", "RockGrade_I", "WaterRich"): 25.0,
+    ("ShallowTunnelProject", "RockGrade_II", "WaterRich"): 27.5,
+    ("ShallowTunnelProject", "RockGrade_III", "WaterRich"): 30.0,
+    ("ShallowTunnelProject", "RockGrade_IV", "WaterRich"): 32.5,
+    ("ShallowTunnelProject", "RockGrade_V", "WaterRich"): 35.0,
+    ("TunnelProject", "RockGrade_V", "WaterRich", "WeakSoil"): 45.0,
+    ("DeepTunnelProject", "RockGrade_V", "WaterRich", "WeakSoil"): 45.0,
+    ("MountainTunnelProject", "RockGrade_V", "WaterRich", "WeakSoil"): 45.0,
+    ("ShallowTunnelProject", "RockGrade_V", "WaterRich", "WeakSoil"): 45.0,
+    ("UnderwaterTunnelProject", "RockGrade_I", "Dry"): 25.0,
+    ("UnderwaterTunnelProject", "RockGrade_II", "Dry"): 27.5,
+    ("UnderwaterTunnelProject", "RockGrade_III", "Dry"): 30.0,
+    ("UnderwaterTunnelProject", "RockGrade_IV", "Dry"): 32.5,
+    ("UnderwaterTunnelProject", "RockGrade_V", "Dry"): 35.0,
+    ("UnderwaterTunnelProject", "RockGrade_I", "WaterRich"): 27.5,
+    ("UnderwaterTunnelProject", "RockGrade_II", "WaterRich"): 30.0,
+    ("UnderwaterTunnelProject", "RockGrade_III", "WaterRich"): 32.5,
+    ("UnderwaterTunnelProject", "RockGrade_IV", "WaterRich"): 35.0,
+    ("UnderwaterTunnelProject", "RockGrade_V", "WaterRich"): 37.5,
+    ("UrbanTunnelProject", "RockGrade_I", "Dry"): 22.5,
+    ("UrbanTunnelProject", "RockGrade_II", "Dry"): 25.0,
+    ("UrbanTunnelProject", "RockGrade_III", "Dry"): 27.5,
+    ("UrbanTunnelProject", "RockGrade_IV", "Dry"): 30.0,
+    ("UrbanTunnelProject", "RockGrade_V", "Dry"): 32.5,
+    ("UrbanTunnelProject", "RockGrade_I", "WaterRich"): 25.0,
+    ("UrbanTunnelProject", "RockGrade_II", "WaterRich"): 27.5,
+    ("UrbanTunnelProject", "RockGrade_III", "WaterRich"): 30.0,
+    ("UrbanTunnelProject", "RockGrade_IV", "WaterRich"): 32.5,
+    ("UrbanTunnelProject", "RockGrade_V", "WaterRich"): 35.0,
+})
 
-def infer_steel_arch_spacing(tunnel_type: str, rock_grade: str, hydro_condition: str) -> Optional[float]:
-    """快速推断钢拱架间距"""
-    rules_map = {
-        ("DeepTunnelProject", "RockGrade_I", "Dry"): 1.2,
-        ("DeepTunnelProject", "RockGrade_II", "Dry"): 1.0,
-        ("DeepTunnelProject", "RockGrade_III", "Dry"): 0.8,
-        ("DeepTunnelProject", "RockGrade_IV", "Dry"): 0.6,
-        ("DeepTunnelProject", "RockGrade_V", "Dry"): 0.5,
-        ("DeepTunnelProject", "RockGrade_I", "WaterRich"): 1.0,
-        ("DeepTunnelProject", "RockGrade_II", "WaterRich"): 0.8,
-        ("DeepTunnelProject", "RockGrade_III", "WaterRich"): 0.6,
-        ("DeepTunnelProject", "RockGrade_IV", "WaterRich"): 0.5,
-        ("DeepTunnelProject", "RockGrade_V", "WaterRich"): 0.5,
-        ("MountainTunnelProject", "RockGrade_I", "Dry"): 1.4,
-        ("MountainTunnelProject", "RockGrade_II", "Dry"): 1.2,
-        ("MountainTunnelProject", "RockGrade_III", "Dry"): 1.0,
-        ("MountainTunnelProject", "RockGrade_IV", "Dry"): 0.8,
-        ("MountainTunnelProject", "RockGrade_V", "Dry"): 0.6,
-        ("MountainTunnelProject", "RockGrade_II", "WaterRich"): 1.0,
-        ("MountainTunnelProject", "RockGrade_III", "WaterRich"): 0.8,
-        ("MountainTunnelProject", "RockGrade_IV", "WaterRich"): 0.6,
-        ("MountainTunnelProject", "RockGrade_V", "WaterRich"): 0.5,
-        ("ShallowTunnelProject", "RockGrade_I", "Dry"): 1.2,
-        ("ShallowTunnelProject", "RockGrade_II", "Dry"): 1.0,
-        ("ShallowTunnelProject", "RockGrade_III", "Dry"): 0.8,
-        ("ShallowTunnelProject", "RockGrade_IV", "Dry"): 0.6,
-        ("ShallowTunnelProject", "RockGrade_V", "Dry"): 0.5,
-        ("ShallowTunnelProject", "RockGrade_I", "WaterRich"): 1.0,
-        ("ShallowTunnelProject", "RockGrade_II", "WaterRich"): 0.8,
-        ("ShallowTunnelProject", "RockGrade_III", "WaterRich"): 0.6,
-        ("ShallowTunnelProject", "RockGrade_IV", "WaterRich"): 0.5,
-        ("ShallowTunnelProject", "RockGrade_V", "WaterRich"): 0.5,
-        ("UnderwaterTunnelProject", "RockGrade_I", "Dry"): 1.2,
-        ("UnderwaterTunnelProject", "RockGrade_II", "Dry"): 1.0,
-        ("UnderwaterTunnelProject", "RockGrade_III", "Dry"): 0.8,
-        ("UnderwaterTunnelProject", "RockGrade_IV", "Dry"): 0.6,
-        ("UnderwaterTunnelProject", "RockGrade_V", "Dry"): 0.5,
-        ("UnderwaterTunnelProject", "RockGrade_I", "WaterRich"): 1.0,
-        ("UnderwaterTunnelProject", "RockGrade_II", "WaterRich"): 0.8,
-        ("UnderwaterTunnelProject", "RockGrade_III", "WaterRich"): 0.6,
-        ("UnderwaterTunnelProject", "RockGrade_IV", "WaterRich"): 0.5,
-        ("UnderwaterTunnelProject", "RockGrade_V", "WaterRich"): 0.5,
-        ("UrbanTunnelProject", "RockGrade_I", "Dry"): 1.2,
-        ("UrbanTunnelProject", "RockGrade_II", "Dry"): 1.0,
-        ("UrbanTunnelProject", "RockGrade_III", "Dry"): 0.8,
-        ("UrbanTunnelProject", "RockGrade_IV", "Dry"): 0.5,
-        ("UrbanTunnelProject", "RockGrade_I", "WaterRich"): 1.0,
-        ("UrbanTunnelProject", "RockGrade_II", "WaterRich"): 0.8,
-        ("UrbanTunnelProject", "RockGrade_III", "WaterRich"): 0.6,
-        ("UrbanTunnelProject", "RockGrade_IV", "WaterRich"): 0.5,
-        ("UrbanTunnelProject", "RockGrade_V", "WaterRich"): 0.5,
-    }
-    return rules_map.get((tunnel_type, rock_grade, hydro_condition))
+def infer_lining_thickness(tunnel_type: str, rock_grade: str, hydro_condition: str,
+                           soil_type: Optional[str] = None) -> Optional[float]:
+    """快速推断衬砌厚度（给出土壤类型时先查带土壤条件的键）"""
+    if soil_type is not None:
+        value = LINING_THICKNESS_TABLE.get((tunnel_type, rock_grade, hydro_condition, soil_type))
+        if value is not None:
+            return value
+    return LINING_THICKNESS_TABLE.get((tunnel_type, rock_grade, hydro_condition))
+
+# 钢拱架间距：(隧道类型, 围岩等级, 水文条件[, 土壤类型]) → 间距
+STEEL_ARCH_SPACING_TABLE = MappingProxyType({
+    ("DeepTunnelProject", "RockGrade_I", "Dry"): 1.2,
+    ("DeepTunnelProject", "RockGrade_II", "Dry"): 1.0,
+    ("DeepTunnelProject", "RockGrade_III", "Dry"): 0.8,
+    ("DeepTunnelProject", "RockGrade_IV", "Dry"): 0.6,
+    ("DeepTunnelProject", "RockGrade_V", "Dry"): 0.5,
+    ("DeepTunnelProject", "RockGrade_I", "WaterRich"): 1.0,
+    ("DeepTunnelProject", "RockGrade_II", "WaterRich"): 0.8,
+    ("DeepTunnelProject", "RockGrade_III", "WaterRich"): 0.6,
+    ("DeepTunnelProject", "RockGrade_IV", "WaterRich"): 0.5,
+    ("DeepTunnelProject", "RockGrade_V", "WaterRich"): 0.5,
+    ("MountainTunnelProject", "RockGrade_I", "Dry"): 1.4,
+    ("MountainTunnelProject", "RockGrade_II", "Dry"): 1.2,
+    ("MountainTunnelProject", "RockGrade_III", "Dry"): 1.0,
+    ("MountainTunnelProject", "RockGrade_IV", "Dry"): 0.8,
+    ("MountainTunnelProject", "RockGrade_V", "Dry"): 0.6,
+    ("MountainTunnelProject", "RockGrade_II", "WaterRich"): 1.0,
+    ("MountainTunnelProject", "RockGrade_III", "WaterRich"): 0.8,
+    ("MountainTunnelProject", "RockGrade_IV", "WaterRich"): 0.6,
+    ("MountainTunnelProject", "RockGrade_V", "WaterRich"): 0.5,
+    ("ShallowTunnelProject", "RockGrade_I", "Dry"): 1.2,
+    ("ShallowTunnelProject", "RockGrade_II", "Dry"): 1.0,
+    ("ShallowTunnelProject", "RockGrade_III", "Dry"): 0.8,
+    ("ShallowTunnelProject", "RockGrade_IV", "Dry"): 0.6,
+    ("ShallowTunnelProject", "RockGrade_V", "Dry"): 0.5,
+    ("ShallowTunnelProject", "RockGrade_I", "WaterRich"): 1.0,
+    ("ShallowTunnelProject", "RockGrade_II", "WaterRich"): 0.8,
+    ("ShallowTunnelProject", "RockGrade_III", "WaterRich"): 0.6,
+    ("ShallowTunnelProject", "RockGrade_IV", "WaterRich"): 0.5,
+    ("ShallowTunnelProject", "RockGrade_V", "WaterRich"): 0.5,
+    ("UnderwaterTunnelProject", "RockGrade_I", "Dry"): 1.2,
+    ("UnderwaterTunnelProject", "RockGrade_II", "Dry"): 1.0,
+    ("UnderwaterTunnelProject", "RockGrade_III", "Dry"): 0.8,
+    ("UnderwaterTunnelProject", "RockGrade_IV", "Dry"): 0.6,
+    ("UnderwaterTunnelProject", "RockGrade_V", "Dry"): 0.5,
+    ("UnderwaterTunnelProject", "RockGrade_I", "WaterRich"): 1.0,
+    ("UnderwaterTunnelProject", "RockGrade_II", "WaterRich"): 0.8,
+    ("UnderwaterTunnelProject", "RockGrade_III", "WaterRich"): 0.6,
+    ("UnderwaterTunnelProject", "RockGrade_IV", "WaterRich"): 0.5,
+    ("UnderwaterTunnelProject", "RockGrade_V", "WaterRich"): 0.5,
+    ("UrbanTunnelProject", "RockGrade_I", "Dry"): 1.2,
+    ("UrbanTunnelProject", "RockGrade_II", "Dry"): 1.0,
+    ("UrbanTunnelProject", "RockGrade_III", "Dry"): 0.8,
+    ("UrbanTunnelProject", "RockGrade_IV", "Dry"): 0.5,
+    ("UrbanTunnelProject", "RockGrade_I", "WaterRich"): 1.0,
+    ("UrbanTunnelProject", "RockGrade_II", "WaterRich"): 0.8,
+    ("UrbanTunnelProject", "RockGrade_III", "WaterRich"): 0.6,
+    ("UrbanTunnelProject", "RockGrade_IV", "WaterRich"): 0.5,
+    ("UrbanTunnelProject", "RockGrade_V", "WaterRich"): 0.5,
+})
+
+def infer_steel_arch_spacing(tunnel_type: str, rock_grade: str, hydro_condition: str,
+                             soil_type: Optional[str] = None) -> Optional[float]:
+    """快速推断钢拱架间距（给出土壤类型时先查带土壤条件的键）"""
+    if soil_type is not None:
+        value = STEEL_ARCH_SPACING_TABLE.get((tunnel_type, rock_grade, hydro_condition, soil_type))
+        if value is not None:
+            return value
+    return STEEL_ARCH_SPACING_TABLE.get((tunnel_type, rock_grade, hydro_condition))
+
+# 防水层厚度：(隧道类型, 土壤类型, 水文条件) → 厚度
+WATERPROOF_THICKNESS_TABLE = MappingProxyType({
+    ("MountainTunnelProject", "MediumSoil", "Dry"): 3.5,
+    ("MountainTunnelProject", "StrongSoil", "Dry"): 3,
+    ("MountainTunnelProject", "WeakSoil", "Dry"): 4.5,
+    ("MountainTunnelProject", "MediumSoil", "WaterRich"): 4.5,
+    ("MountainTunnelProject", "StrongSoil", "WaterRich"): 4,
+    ("MountainTunnelProject", "WeakSoil", "WaterRich"): 5,
+    ("ShallowTunnelProject", "MediumSoil", "Dry"): 3.5,
+    ("ShallowTunnelProject", "StrongSoil", "Dry"): 3,
+    ("ShallowTunnelProject", "WeakSoil", "Dry"): 4.5,
+    ("ShallowTunnelProject", "MediumSoil", "WaterRich"): 4.5,
+    ("ShallowTunnelProject", "StrongSoil", "WaterRich"): 4,
+    ("ShallowTunnelProject", "WeakSoil", "WaterRich"): 5.5,
+    ("UnderwaterTunnelProject", "MediumSoil", "WaterRich"): 5.5,
+    ("UnderwaterTunnelProject", "StrongSoil", "WaterRich"): 5,
+    ("UnderwaterTunnelProject", "WeakSoil", "WaterRich"): 6,
+    ("UrbanTunnelProject", "MediumSoil", "Dry"): 3,
+    ("UrbanTunnelProject", "StrongSoil", "Dry"): 2.5,
+    ("UrbanTunnelProject", "WeakSoil", "Dry"): 4,
+    ("UrbanTunnelProject", "MediumSoil", "WaterRich"): 4,
+    ("UrbanTunnelProject", "StrongSoil", "WaterRich"): 3.5,
+    ("UrbanTunnelProject", "WeakSoil", "WaterRich"): 5,
+})
 
 def infer_waterproof_thickness(tunnel_type: str, soil_type: str, hydro_condition: str) -> Optional[float]:
     """快速推断防水层厚度"""
-    rules_map = {
-        ("MountainTunnelProject", "MediumSoil", "Dry"): 3.5,
-        ("MountainTunnelProject", "StrongSoil", "Dry"): 3,
-        ("MountainTunnelProject", "WeakSoil", "Dry"): 4.5,
-        ("MountainTunnelProject", "MediumSoil", "WaterRich"): 4.5,
-        ("MountainTunnelProject", "StrongSoil", "WaterRich"): 4,
-        ("MountainTunnelProject", "WeakSoil", "WaterRich"): 5,
-        ("ShallowTunnelProject", "MediumSoil", "Dry"): 3.5,
-        ("ShallowTunnelProject", "MediumSoil", "Dry"): 3.5,
-        ("ShallowTunnelProject", "StrongSoil", "Dry"): 3,
-        ("ShallowTunnelProject", "StrongSoil", "Dry"): 3,
-        ("ShallowTunnelProject", "WeakSoil", "Dry"): 4.5,
-        ("ShallowTunnelProject", "WeakSoil", "Dry"): 4.5,
-        ("ShallowTunnelProject", "MediumSoil", "WaterRich"): 4.5,
-        ("ShallowTunnelProject", "MediumSoil", "WaterRich"): 4.5,
-        ("ShallowTunnelProject", "StrongSoil", "WaterRich"): 4,
-        ("ShallowTunnelProject", "StrongSoil", "WaterRich"): 4,
-        ("ShallowTunnelProject", "WeakSoil", "WaterRich"): 5.5,
-        ("ShallowTunnelProject", "WeakSoil", "WaterRich"): 5.5,
-        ("UnderwaterTunnelProject", "MediumSoil", "WaterRich"): 5.5,
-        ("UnderwaterTunnelProject", "StrongSoil", "WaterRich"): 5,
-        ("UnderwaterTunnelProject", "WeakSoil", "WaterRich"): 6,
-        ("UrbanTunnelProject", "MediumSoil", "Dry"): 3,
-        ("UrbanTunnelProject", "StrongSoil", "Dry"): 2.5,
-        ("UrbanTunnelProject", "WeakSoil", "Dry"): 4,
-        ("UrbanTunnelProject", "MediumSoil", "WaterRich"): 4,
-        ("UrbanTunnelProject", "StrongSoil", "WaterRich"): 3.5,
-        ("UrbanTunnelProject", "WeakSoil", "WaterRich"): 5,
-    }
-    return rules_map.get((tunnel_type, soil_type, hydro_condition))
+    return WATERPROOF_THICKNESS_TABLE.get((tunnel_type, soil_type, hydro_condition))
 
 def apply_construction_method_rules(tunnel_length: float) -> str:
     """根据隧道长度确定施工方法"""
@@ -2050,16 +2087,19 @@ def apply_construction_method_rules(tunnel_length: float) -> str:
     else:
         return "TBM_001"
 
+# 锚杆长度系数：围岩等级 → 锚杆长度 / 隧道直径
+BOLT_LENGTH_MULTIPLIERS = MappingProxyType({
+    "RockGrade_I": 0.25,
+    "RockGrade_II": 0.3,
+    "RockGrade_III": 0.33,
+    "RockGrade_IV": 0.45,
+    "RockGrade_V": 0.5,
+})
+DEFAULT_BOLT_LENGTH_MULTIPLIER = 0.3
+
 def calculate_bolt_length(tunnel_diameter: float, rock_grade: str) -> float:
     """计算锚杆长度"""
-    multipliers = {
-        "RockGrade_I": 0.25,
-        "RockGrade_II": 0.3,
-        "RockGrade_III": 0.33,
-        "RockGrade_IV": 0.45,
-        "RockGrade_V": 0.5
-    }
-    return tunnel_diameter * multipliers.get(rock_grade, 0.3)
+    return tunnel_diameter * BOLT_LENGTH_MULTIPLIERS.get(rock_grade, DEFAULT_BOLT_LENGTH_MULTIPLIER)
 
 def calculate_steel_arch_count(tunnel_length: float, spacing: float) -> int:
     """计算钢拱架数量"""
@@ -2070,7 +2110,15 @@ def calculate_steel_arch_count(tunnel_length: float, spacing: float) -> int:
 def comprehensive_tunnel_design(tunnel_type: str, tunnel_length: float, tunnel_diameter: float,
                                 rock_grade: str, hydro_condition: str, 
                                 soil_type: str = "MediumSoil") -> Dict[str, Any]:
-    """综合隧道设计计算"""
+    """综合隧道设计计算（相同参数的结果由 lru_cache 缓存，每次调用返回新的字典）"""
+    return dict(_comprehensive_tunnel_design(tunnel_type, tunnel_length, tunnel_diameter,
+                                             rock_grade, hydro_condition, soil_type))
+
+@lru_cache(maxsize=4096)
+def _comprehensive_tunnel_design(tunnel_type: str, tunnel_length: float, tunnel_diameter: float,
+                                 rock_grade: str, hydro_condition: str,
+                                 soil_type: str) -> Tuple[Tuple[str, Any], ...]:
+    """综合隧道设计计算的缓存实现，返回不可变的 (键, 值) 元组，避免调用方修改缓存结果"""
     result = {}
     
     # 基本参数
@@ -2079,10 +2127,11 @@ def comprehensive_tunnel_design(tunnel_type: str, tunnel_length: float, tunnel_d
     result["tunnel_diameter"] = tunnel_diameter
     
     # 衬砌厚度
-    result["lining_thickness"] = infer_lining_thickness(tunnel_type, rock_grade, hydro_condition)
+    result["lining_thickness"] = infer_lining_thickness(tunnel_type, rock_grade, hydro_condition, soil_type)
     
     # 钢拱架间距
-    result["steel_arch_spacing"] = infer_steel_arch_spacing(tunnel_type, rock_grade, hydro_condition)
+    result["steel_arch_spacing"] = infer_steel_arch_spacing(tunnel_type, rock_grade, hydro_condition,
+                                                            soil_type)
     
     # 防水层厚度
     result["waterproof_thickness"] = infer_waterproof_thickness(tunnel_type, soil_type, hydro_condition)
@@ -2097,5 +2146,5 @@ def comprehensive_tunnel_design(tunnel_type: str, tunnel_length: float, tunnel_d
     if result["steel_arch_spacing"]:
         result["steel_arch_count"] = calculate_steel_arch_count(tunnel_length, result["steel_arch_spacing"])
     
-    return result
+    return tuple(result.items())
 
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+tunnel_rules 快速推理函数微基准
+测量 infer_* / calculate_bolt_length / comprehensive_tunnel_design 的每秒调用次数
+（comprehensive_tunnel_design 分别测量未命中与命中 lru_cache 的吞吐量），
+可通过 --baseline 指定旧版生成模块（例如 git show HEAD~1:tunnel_rules.py 的输出）进行前后对比
+"""
+
+import argparse
+import importlib.util
+import itertools
+import time
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+import tunnel_rules
+from swrl_benchmark import TUNNEL_TYPES, ROCK_GRADES, HYDRO_CONDITIONS, SOIL_TYPES
+
+
+def load_module(path: str, name: str = "tunnel_rules_baseline"):
+    """从文件路径加载生成的规则模块"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# 一致性校验额外覆盖的参数组合：规则 89（S05-0）对任意隧道类型的 V 级围岩 + 富水 + 弱土生效
+PARITY_KEYS = [("TunnelProject", "RockGrade_V", "WaterRich", "WeakSoil")]
+
+
+def parameter_grid() -> List[Tuple[str, str, str, str]]:
+    """所有分类取值组合：(隧道类型, 围岩等级, 水文条件, 土壤类型)"""
+    return list(itertools.product(TUNNEL_TYPES, ROCK_GRADES, HYDRO_CONDITIONS, SOIL_TYPES))
+
+
+def calls_per_second(func: Callable, args_list: List[tuple], min_seconds: float = 0.5,
+                     before_pass: Optional[Callable[[], Any]] = None) -> float:
+    """
+    循环调用 func 直到累计耗时超过 min_seconds，返回每秒调用次数
+
+    before_pass: 每遍调用前执行（不计入耗时），例如清空缓存
+    """
+    calls = 0
+    elapsed = 0.0
+    while elapsed < min_seconds:
+        if before_pass is not None:
+            before_pass()
+        start = time.perf_counter()
+        for args in args_list:
+            func(*args)
+        elapsed += time.perf_counter() - start
+        calls += len(args_list)
+    return calls / elapsed
+
+
+def measure(module, grid: List[Tuple[str, str, str, str]], min_seconds: float) -> Dict[str, float]:
+    """
+    测量一个规则模块中各快速函数的每秒调用次数
+
+    comprehensive_tunnel_design 测两次：每遍之前清空 lru_cache，一遍内的参数互不重复，
+    全部未命中缓存；不清空时第一遍之后全部命中缓存。没有缓存的模块（如旧版）两者相同。
+    """
+    design_args = [(t, 5000, 10.0, r, h, s) for t, r, h, s in grid]
+    cached = getattr(module, "_comprehensive_tunnel_design", None)
+    cache_clear = getattr(cached, "cache_clear", None)
+    cases = {
+        "infer_lining_thickness": ([(t, r, h) for t, r, h, _ in grid], None),
+        "infer_steel_arch_spacing": ([(t, r, h) for t, r, h, _ in grid], None),
+        "infer_waterproof_thickness": ([(t, s, h) for t, _, h, s in grid], None),
+        "calculate_bolt_length": ([(10.0, r) for _, r, _, _ in grid], None),
+        "comprehensive_tunnel_design (cache miss)": (design_args, cache_clear),
+    }
+    rates = {name: calls_per_second(getattr(module, name.split()[0]), args_list, min_seconds, before_pass)
+             for name, (args_list, before_pass) in cases.items()}
+    if cache_clear is not None:
+        cache_clear()
+    for args in design_args:  # 预热：之后的调用都命中缓存
+        module.comprehensive_tunnel_design(*args)
+    rates["comprehensive_tunnel_design (cache hit)"] = calls_per_second(
+        module.comprehensive_tunnel_design, design_args, min_seconds)
+    return rates
+
+
+def check_parity(baseline, grid: List[Tuple[str, str, str, str]]) -> List[str]:
+    """对比新旧模块在全部参数组合（及 PARITY_KEYS）上的结果，返回不一致的描述"""
+    mismatches = []
+    for t, r, h, s in grid + [key for key in PARITY_KEYS if key not in grid]:
+        for length in (2000, 5000):
+            current = tunnel_rules.comprehensive_tunnel_design(t, length, 10.0, r, h, s)
+            expected = baseline.comprehensive_tunnel_design(t, length, 10.0, r, h, s)
+            if current != expected:
+                changed = {key: (expected.get(key), current.get(key))
+                           for key in current.keys() | expected.keys() if current.get(key) != expected.get(key)}
+                mismatches.append(f"{(t, length, r, h, s)}: {changed}")
+    return mismatches
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="tunnel_rules 快速推理函数微基准")
+    arg_parser.add_argument("--baseline", help="用于对比的旧版 tunnel_rules.py 路径")
+    arg_parser.add_argument("--seconds", type=float, default=0.5, help="每个函数的最短计时时间")
+    args = arg_parser.parse_args()
+
+    grid = parameter_grid()
+    current = measure(tunnel_rules, grid, args.seconds)
+    baseline: Dict[str, Any] = {}
+    if args.baseline:
+        baseline_module = load_module(args.baseline)
+        baseline = measure(baseline_module, grid, args.seconds)
+        mismatches = check_parity(baseline_module, grid)
+        print(f"结果一致: {'是' if not mismatches else f'否（{len(mismatches)} 处）'}")
+        for line in mismatches:
+            print(f"  {line}  (基线, 当前)")
+
+    for name, rate in current.items():
+        line = f"{name:<42} {rate / 1e6:8.3f} M 次/秒"
+        if name in baseline:
+            line += f"  (基线 {baseline[name] / 1e6:.3f} M 次/秒，加速 {rate / baseline[name]:.1f}x)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+隧道规则的向量化决策表实现
+把 tunnel_rules.TUNNEL_RULES 编译为按分类编码索引的 NumPy 查找数组，
+决策表与逐条求值的规则都取自 swrl_analyzer 的去重结果（与 tunnel_rules 的查找表同源），
+内置函数使用 swrl_builtins 注册表中的列实现，
+使综合设计计算可以一次处理上百万组参数组合。
+"""
+
+import itertools
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+import tunnel_rules
+from tunnel_rules import TUNNEL_RULES
+from swrl_builtins import BUILTINS, parse_literal
+from swrl_analyzer import RuleAnalyzer, TUNNEL_TABLES, rules_from_dicts
+
+
+# 分类维度：规则体中的对象属性 → 维度名
+CATEGORICAL_PROPERTIES = {
+    "hasRockGrade": "rock_grade",
+    "hasHydroCondition": "hydro_condition",
+    "hasSoilType": "soil_type",
+}
+DIMENSIONS = ("tunnel_type", "rock_grade", "hydro_condition", "soil_type")
+
+# 决策表：输出列 → (swrl_analyzer.TUNNEL_TABLES 中的表名, 索引维度)，与 tunnel_rules 中快速推理函数的键一致
+DECISION_TABLES = {
+    "lining_thickness": ("LINING_THICKNESS_TABLE", ("tunnel_type", "rock_grade", "hydro_condition")),
+    "steel_arch_spacing": ("STEEL_ARCH_SPACING_TABLE", ("tunnel_type", "rock_grade", "hydro_condition")),
+    "waterproof_thickness": ("WATERPROOF_THICKNESS_TABLE", ("tunnel_type", "soil_type", "hydro_condition")),
+}
+
+
+def _is_variable(term: Any) -> bool:
+    return isinstance(term, str) and term.startswith(":")
+
+
+def _rule_dimensions(rule: Dict[str, Any]) -> Dict[str, str]:
+    """从规则体中提取分类维度的取值（与 RuleExporter 的提取方式一致：每个维度取第一次出现的值）"""
+    dims = {}
+    for atom in rule["body"]:
+        if atom["type"] == "class" and "Tunnel" in atom["class_name"]:
+            dims.setdefault("tunnel_type", atom["class_name"])
+        elif atom["type"] == "object_property" and not _is_variable(atom["object"]):
+            dim = CATEGORICAL_PROPERTIES.get(atom["property_name"])
+            if dim:
+                dims.setdefault(dim, atom["object"])
+    return dims
+
+
+class DecisionTableCompiler:
+    """把规则字典编译为 NumPy 查找数组和列运算"""
+
+    def __init__(self, rules: Dict[str, Dict[str, Any]] = TUNNEL_RULES):
+        self.analyzer = RuleAnalyzer(rules_from_dicts(rules))
+        self.rules = list(rules.values())
+        self.vocabularies = self._build_vocabularies()
+        # 逐条求值只使用调度后的规则：去掉永远会被后面的规则覆盖的规则头
+        self.rules = [dict(rule, head=[atom for h, atom in enumerate(rule["head"])
+                                       if h not in self.analyzer.dead_heads.get(i, ())])
+                      for i, rule in enumerate(self.rules)]
+        self.table_dimensions: Dict[str, Tuple[str, ...]] = {}
+        self.tables = {name: self._compile_table(name, table, dims) for name, (table, dims) in DECISION_TABLES.items()}
+        self.bolt_factors = self._compile_bolt_factors()
+
+    def _build_vocabularies(self) -> Dict[str, List[str]]:
+        """每个分类维度的取值表；编码 len(取值表) 保留给未知取值"""
+        values = {dim: set() for dim in DIMENSIONS}
+        for rule in self.rules:
+            for dim, value in _rule_dimensions(rule).items():
+                values[dim].add(value)
+        return {dim: sorted(vals) for dim, vals in values.items()}
+
+    def _compile_table(self, name: str, table_name: str, dims: Tuple[str, ...]) -> np.ndarray:
+        """
+        把 RuleAnalyzer 生成的决策表（键唯一，后出现的规则已覆盖先出现的规则）转为数组；未命中的位置为 NaN
+
+        决策表有限定属性（如土壤类型）时数组多一维：不带限定条件的键填满该维，
+        带限定条件的加长键再覆盖对应位置（与 tunnel_rules 中先查加长键的顺序一致）
+        """
+        spec = TUNNEL_TABLES[table_name]
+        if spec.qualifier:
+            dims = dims + (CATEGORICAL_PROPERTIES[spec.qualifier],)
+        self.table_dimensions[name] = dims
+        shape = tuple(len(self.vocabularies[dim]) + 1 for dim in dims)
+        table = np.full(shape, np.nan)
+        entries = sorted(self.analyzer.decision_table(spec).items(), key=lambda item: len(item[0]))
+        for key, value in entries:
+            if value:
+                table[tuple(self.vocabularies[dim].index(part) for dim, part in zip(dims, key))] = value
+        return table
+
+    def _compile_bolt_factors(self) -> np.ndarray:
+        """锚杆长度系数表：按围岩等级编码索引，最后一项为未知等级的默认系数"""
+        factors = [tunnel_rules.BOLT_LENGTH_MULTIPLIERS.get(grade, tunnel_rules.DEFAULT_BOLT_LENGTH_MULTIPLIER)
+                   for grade in self.vocabularies["rock_grade"]]
+        return np.array(factors + [tunnel_rules.DEFAULT_BOLT_LENGTH_MULTIPLIER])
+
+    def encode(self, dim: str, values: np.ndarray) -> np.ndarray:
+        """把分类取值数组转换为编码数组"""
+        vocabulary = self.vocabularies[dim]
+        values = np.asarray(values)
+        if values.dtype.kind not in "US":
+            values = values.astype(str)
+        # 取值表很小（不超过十几个），逐个取值做整列比较比排序去重更快
+        codes = np.full(values.shape, len(vocabulary), dtype=np.intp)
+        for code, value in enumerate(vocabulary):
+            codes[values == value] = code
+        return codes
+
+    def lookup(self, name: str, codes: Dict[str, np.ndarray]) -> np.ndarray:
+        """按分类编码查决策表"""
+        return self.tables[name][tuple(codes[dim] for dim in self.table_dimensions[name])]
+
+    def evaluate_rule(self, rule: Dict[str, Any], codes: Dict[str, np.ndarray],
+                      columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        按列求值一条规则的规则体
+
+        Returns:
+            (命中掩码, 变量 → 列值)
+        """
+        size = len(next(iter(codes.values())))
+        mask = np.ones(size, dtype=bool)
+        env: Dict[str, np.ndarray] = {}
+
+        for atom in rule["body"]:
+            if atom["type"] == "class":
+                if atom["class_name"] != "TunnelProject":
+                    mask &= codes["tunnel_type"] == self._code("tunnel_type", atom["class_name"])
+            elif atom["type"] == "object_property" and not _is_variable(atom["object"]):
+                dim = CATEGORICAL_PROPERTIES.get(atom["property_name"])
+                if atom["property_name"] == "hasGeologicalCondition":
+                    dim = "rock_grade"
+                if dim:
+                    mask &= codes[dim] == self._code(dim, atom["object"])
+            elif atom["type"] == "data_property":
+                column = columns.get(atom["property_name"])
+                if column is None:
+                    return np.zeros(size, dtype=bool), env
+                mask &= ~np.isnan(column)
+                if _is_variable(atom["value"]):
+                    env[atom["value"]] = column
+                else:
+                    mask &= column == atom["value"]
+            elif atom["type"] == "builtin":
+                builtin = BUILTINS.get(atom["function_name"])
+                terms = atom["variables"]
+                if builtin is None or builtin.vector is None or len(terms) < builtin.min_arguments:
+                    return np.zeros(size, dtype=bool), env
+                args = [env.get(term) if _is_variable(term) else float(parse_literal(term)) for term in terms]
+                inputs = args[1:builtin.arity + 1] if builtin.assigns else args[:builtin.arity]
+                if any(arg is None for arg in inputs):
+                    return np.zeros(size, dtype=bool), env
+                result = builtin.vector(*inputs)
+                if builtin.assigns:
+                    mask &= ~np.isnan(result)
+                    env[terms[0]] = result
+                else:
+                    mask &= result
+        return mask, env
+
+    def _code(self, dim: str, value: str) -> int:
+        """规则中常量的编码；不在取值表中的常量返回 -1，不会与任何输入（含未知取值）匹配"""
+        vocabulary = self.vocabularies[dim]
+        return vocabulary.index(value) if value in vocabulary else -1
+
+    def evaluate_property(self, property_name: str, codes: Dict[str, np.ndarray],
+                          columns: Dict[str, np.ndarray], dtype=float) -> np.ndarray:
+        """按规则顺序求值所有以该属性为规则头的规则，后命中的规则覆盖先命中的规则"""
+        size = len(next(iter(codes.values())))
+        result = np.full(size, np.nan) if dtype is float else np.full(size, None, dtype=object)
+        for rule in self.rules:
+            for atom in rule["head"]:
+                if atom.get("property_name") != property_name:
+                    continue
+                mask, env = self.evaluate_rule(rule, codes, columns)
+                value = atom["value"] if atom["type"] == "data_property" else atom["object"]
+                if _is_variable(value):
+                    if value not in env:
+                        continue
+                    result[mask] = env[value][mask]
+                else:
+                    result[mask] = value
+        return result
+
+
+_default_compiler: Optional[DecisionTableCompiler] = None
+
+
+def get_compiler() -> DecisionTableCompiler:
+    """获取基于 TUNNEL_RULES 的默认编译结果（首次调用时编译）"""
+    global _default_compiler
+    if _default_compiler is None:
+        _default_compiler = DecisionTableCompiler()
+    return _default_compiler
+
+
+def comprehensive_tunnel_design_vectorized(tunnel_type, tunnel_length, tunnel_diameter,
+                                           rock_grade, hydro_condition,
+                                           soil_type="MediumSoil") -> Dict[str, np.ndarray]:
+    """
+    comprehensive_tunnel_design 的向量化版本
+
+    参数可以是数组或标量（按 NumPy 规则广播）。返回每个输出一列；
+    逐行版本中为 None（或缺失）的结果在这里为 NaN，施工方法为对象数组。
+    """
+    compiler = get_compiler()
+    inputs = np.broadcast_arrays(np.asarray(tunnel_type), np.asarray(tunnel_length, dtype=float),
+                                 np.asarray(tunnel_diameter, dtype=float), np.asarray(rock_grade),
+                                 np.asarray(hydro_condition), np.asarray(soil_type))
+    tunnel_type, tunnel_length, tunnel_diameter, rock_grade, hydro_condition, soil_type = (
+        np.ravel(column) for column in inputs)
+
+    codes = {
+        "tunnel_type": compiler.encode("tunnel_type", tunnel_type),
+        "rock_grade": compiler.encode("rock_grade", rock_grade),
+        "hydro_condition": compiler.encode("hydro_condition", hydro_condition),
+        "soil_type": compiler.encode("soil_type", soil_type),
+    }
+
+    result = {
+        "tunnel_type": tunnel_type,
+        "tunnel_length": tunnel_length,
+        "tunnel_diameter": tunnel_diameter,
+    }
+    for name in DECISION_TABLES:
+        result[name] = compiler.lookup(name, codes)
+
+    columns = {
+        "hasTunnelLength": tunnel_length,
+        "hasTunnelDiameter": tunnel_diameter,
+        "hasSteelArchSpacing": result["steel_arch_spacing"],
+    }
+    result["construction_method"] = compiler.evaluate_property("hasConstructionMethod", codes, columns, dtype=object)
+    result["bolt_length"] = tunnel_diameter * compiler.bolt_factors[codes["rock_grade"]]
+    result["steel_arch_count"] = compiler.evaluate_property("hasSteelArchCount", codes, columns)
+    return result
+
+
+def check_parity(samples: List[Tuple[str, float, float, str, str, str]]) -> List[str]:
+    """对比向量化结果与逐行的 comprehensive_tunnel_design，返回不一致的描述"""
+    columns = list(zip(*samples))
+    vectorized = comprehensive_tunnel_design_vectorized(*columns)
+    mismatches = []
+    for i, sample in enumerate(samples):
+        expected = tunnel_rules.comprehensive_tunnel_design(*sample)
+        for key, column in vectorized.items():
+            actual = column[i]
+            wanted = expected.get(key)
+            if wanted is None:
+                same = actual is None or (isinstance(actual, float) and np.isnan(actual))
+            elif isinstance(wanted, str):
+                same = actual == wanted
+            else:
+                same = np.isclose(actual, wanted, rtol=0, atol=1e-12)
+            if not same:
+                mismatches.append(f"{sample} {key}: 逐行={wanted!r} 向量化={actual!r}")
+    return mismatches
+
+
+def main():
+    """一致性校验与百万组合的性能演示"""
+    compiler = get_compiler()
+    vocab = compiler.vocabularies
+    grid = list(itertools.product(vocab["tunnel_type"] + ["UnknownTunnel"], [800.0, 3000.0, 4500.5],
+                                  [6.0, 10.8, 13.3], vocab["rock_grade"] + ["RockGrade_X"],
+                                  vocab["hydro_condition"], vocab["soil_type"]))
+    mismatches = check_parity(grid)
+    print(f"一致性校验: {len(grid)} 组参数，{len(mismatches)} 处不一致")
+    for line in mismatches[:10]:
+        print(f"  {line}")
+
+    rng = np.random.default_rng(42)
+    n = 1_000_000
+    args = (rng.choice(vocab["tunnel_type"], n), rng.uniform(500, 8000, n), rng.uniform(6, 15, n),
+            rng.choice(vocab["rock_grade"], n), rng.choice(vocab["hydro_condition"], n),
+            rng.choice(vocab["soil_type"], n))
+    start = time.perf_counter()
+    comprehensive_tunnel_design_vectorized(*args)
+    vector_seconds = time.perf_counter() - start
+
+    rows = 20_000
+    row_args = [tuple(column[i].item() for column in args) for i in range(rows)]
+    start = time.perf_counter()
+    for row in row_args:
+        tunnel_rules.comprehensive_tunnel_design(*row)
+    row_seconds = (time.perf_counter() - start) * n / rows
+    print(f"{n} 组参数: 向量化 {vector_seconds:.3f} s，逐行（按 {rows} 组外推）{row_seconds:.3f} s")
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+隧道参数的规范词汇
+规则（TUNNEL_RULES / pure_swrl_rules.txt）使用 RockGrade_III、WaterRich、MountainTunnelProject 等个体名，
+Web 端与 next_program 的 JSON 参数则常写作 III、water-rich、Mountain。
+这里把各种写法统一为规则词汇，供 swrl_batch、tunnel_dispatch 与 next_program 共用。
+"""
+
+from typing import Dict, Any
+
+
+TUNNEL_TYPES = ["DeepTunnelProject", "MountainTunnelProject", "ShallowTunnelProject",
+                "UnderwaterTunnelProject", "UrbanTunnelProject"]
+ROOT_TUNNEL_TYPE = "TunnelProject"
+ROCK_GRADES = ["RockGrade_I", "RockGrade_II", "RockGrade_III", "RockGrade_IV", "RockGrade_V"]
+HYDRO_CONDITIONS = ["Dry", "WaterRich"]
+SOIL_TYPES = ["MediumSoil", "StrongSoil", "WeakSoil"]
+
+# 别名（小写，去掉空格、连字符和下划线）→ 规则词汇
+ROCK_GRADE_ALIASES = {
+    "i": "RockGrade_I", "ii": "RockGrade_II", "iii": "RockGrade_III", "iv": "RockGrade_IV", "v": "RockGrade_V",
+    "1": "RockGrade_I", "2": "RockGrade_II", "3": "RockGrade_III", "4": "RockGrade_IV", "5": "RockGrade_V",
+    "ⅰ": "RockGrade_I", "ⅱ": "RockGrade_II", "ⅲ": "RockGrade_III", "ⅳ": "RockGrade_IV", "ⅴ": "RockGrade_V",
+}
+HYDRO_ALIASES = {
+    "dry": "Dry", "干燥": "Dry", "无水": "Dry",
+    "waterrich": "WaterRich", "wet": "WaterRich", "富水": "WaterRich",
+}
+TUNNEL_TYPE_ALIASES = {
+    "deep": "DeepTunnelProject", "深埋": "DeepTunnelProject",
+    "mountain": "MountainTunnelProject", "山岭": "MountainTunnelProject",
+    "shallow": "ShallowTunnelProject", "浅埋": "ShallowTunnelProject",
+    "underwater": "UnderwaterTunnelProject", "水下": "UnderwaterTunnelProject",
+    "urban": "UrbanTunnelProject", "城市": "UrbanTunnelProject",
+    "tunnel": ROOT_TUNNEL_TYPE,
+}
+SOIL_ALIASES = {
+    "medium": "MediumSoil", "中等": "MediumSoil",
+    "strong": "StrongSoil", "坚硬": "StrongSoil",
+    "weak": "WeakSoil", "软弱": "WeakSoil",
+}
+
+# 参数字典键（与 Web 端生成的 JSON 一致）→ 规范化函数名
+PARAMETER_VOCABULARY = {
+    "tunnelType": "tunnel_type",
+    "hasGeologicalCondition": "rock_grade",
+    "hasHydroCondition": "hydro_condition",
+    "hasSoilType": "soil_type",
+}
+
+
+def _fold(value: Any) -> str:
+    return str(value).strip().lower().replace("-", "").replace("_", "").replace(" ", "")
+
+
+def _lookup(value: Any, vocabulary, aliases: Dict[str, str], affix: str = "") -> str:
+    """
+    按规则词汇（忽略大小写与分隔符）或别名查找，找不到时原样返回去掉首尾空白的字符串
+
+    affix 是词汇共有的前缀或后缀（如 'rockgrade'、'soil'），查别名前先去掉
+    """
+    folded = _fold(value)
+    for name in vocabulary:
+        if _fold(name) == folded:
+            return name
+    if affix and folded != affix:
+        if folded.startswith(affix):
+            folded = folded[len(affix):]
+        elif folded.endswith(affix):
+            folded = folded[:-len(affix)]
+    return aliases.get(folded, str(value).strip())
+
+
+def canonical_rock_grade(value: Any) -> str:
+    """'III' / 'iii' / '3' / 'RockGrade_III' → 'RockGrade_III'"""
+    return _lookup(value, ROCK_GRADES, ROCK_GRADE_ALIASES, "rockgrade")
+
+
+def canonical_hydro_condition(value: Any) -> str:
+    """'water-rich' / '富水' → 'WaterRich'，'dry' → 'Dry'"""
+    return _lookup(value, HYDRO_CONDITIONS, HYDRO_ALIASES)
+
+
+def canonical_tunnel_type(value: Any) -> str:
+    """'Mountain' / 'mountain_tunnel_project' / '山岭' → 'MountainTunnelProject'"""
+    return _lookup(value, TUNNEL_TYPES + [ROOT_TUNNEL_TYPE], TUNNEL_TYPE_ALIASES, "tunnelproject")
+
+
+def canonical_soil_type(value: Any) -> str:
+    """'medium' / 'medium_soil' → 'MediumSoil'"""
+    return _lookup(value, SOIL_TYPES, SOIL_ALIASES, "soil")
+
+
+NORMALIZERS = {
+    "tunnel_type": canonical_tunnel_type,
+    "rock_grade": canonical_rock_grade,
+    "hydro_condition": canonical_hydro_condition,
+    "soil_type": canonical_soil_type,
+}
+
+
+def normalize_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """把参数字典中的分类取值统一为规则词汇，其余键值原样保留（返回新字典）"""
+    normalized = dict(params)
+    for key, kind in PARAMETER_VOCABULARY.items():
+        value = normalized.get(key)
+        if value is not None and value != "":
+            normalized[key] = NORMALIZERS[kind](value)
+    return normalized